@@ -14,15 +14,22 @@ from app.routes.users import router as users_route
 from app.routes.utils import utils_router
 from app.routes.votes import votes_router
 from app.services.auth.middleware import TokenAuthMiddleware
+from app.services.lifecycle import register_lifecycle
+from app.services.suggest import register_track_suggest
+from app.services.vote_buffer import register_vote_buffer
 from app.settings import TORTOISE_CONFIG
+from app.utils.migrations import register_migrations
 from app.utils.redis import register_redis
+from app.utils.responses import ORJSONResponse
 
 
 def get_application() -> FastAPI:
     """
     Generate application
     """
-    app: FastAPI = FastAPI(title="Beat Me", docs_url="/swagger/")
+    app: FastAPI = FastAPI(
+        title="Beat Me", docs_url="/swagger/", default_response_class=ORJSONResponse,
+    )
 
     # Init extensions sections
     register_tortoise(
@@ -32,7 +39,11 @@ def get_application() -> FastAPI:
         generate_schemas=True,
         add_exception_handlers=True,
     )
+    register_migrations(app)
     register_redis(app)
+    register_vote_buffer(app)
+    register_lifecycle(app)
+    register_track_suggest(app)
 
     # Router section
     router = APIRouter()
@@ -20,8 +20,9 @@ ChallengeList = pydantic_queryset_creator(Challenge, name="ChallengeList")
 
 
 class ChallengeListOut(BaseModel):
-    count: int
+    count: Optional[int]
     items: List[ChallengeOut]  # type: ignore
+    next_cursor: Optional[str] = None
 
 
 class ChallengeIn(BaseModel):
@@ -67,3 +68,16 @@ class ChallengeIn(BaseModel):
             return value
 
         raise ValueError("must not be empty")
+
+
+class ChallengeStatsOut(BaseModel):
+    participants_count: int
+    submissions_count: int
+    votes_count: int
+
+
+class ChallengeChangesOut(BaseModel):
+    items: List[ChallengeOut]  # type: ignore
+    deleted: List[UUID]
+    next_cursor: Optional[str] = None
+    has_more: bool
@@ -3,6 +3,7 @@
 import re
 
 from typing import List
+from typing import Optional
 
 from pydantic import validator
 from pydantic.main import BaseModel
@@ -19,8 +20,9 @@ SubmissionList = pydantic_queryset_creator(Submission, name="SubmissionList")
 
 
 class SubmissionListOut(BaseModel):
-    count: int
+    count: Optional[int]
     items: List[SubmissionOut]  # type: ignore
+    next_cursor: Optional[str] = None
 
 
 class SubmissionIn(BaseModel):
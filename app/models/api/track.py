@@ -1,8 +1,30 @@
 # pylint: skip-file
 """Track pydantic schemas"""
+from typing import List
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
 from tortoise.contrib.pydantic import pydantic_model_creator
 
 from app.models.db import Track
 
 
 TrackOut = pydantic_model_creator(Track, name="Track")
+
+
+class TrackListOut(BaseModel):
+    count: Optional[int]
+    items: List[TrackOut]  # type: ignore
+    next_cursor: Optional[str] = None
+
+
+class TrackSuggestion(BaseModel):
+    id: UUID
+    name: Optional[str]
+    author_name: Optional[str]
+    cover_url: Optional[str]
+
+
+class TrackSuggestionsOut(BaseModel):
+    items: List[TrackSuggestion]
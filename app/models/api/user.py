@@ -1,6 +1,7 @@
 # pylint: skip-file
 """User pydantic schemas"""
 from typing import List
+from typing import Optional
 
 from pydantic import BaseModel
 from tortoise.contrib.pydantic import pydantic_model_creator
@@ -16,5 +17,6 @@ UserList = pydantic_queryset_creator(User, name="UserList")
 
 
 class UserListOut(BaseModel):
-    count: int
+    count: Optional[int]
     items: List[UserOut]  # type: ignore
+    next_cursor: Optional[str] = None
@@ -2,6 +2,7 @@
 """Vote pydantic schemas"""
 
 from typing import List
+from typing import Optional
 from uuid import UUID
 
 from pydantic.main import BaseModel
@@ -26,3 +27,35 @@ class VoteIn(BaseModel):
 
 class VoteCount(BaseModel):
     count: int
+
+
+class SubmissionVoteCount(BaseModel):
+    submission_id: UUID
+    count: int
+
+
+class ChallengeVoteCountsOut(BaseModel):
+    items: List[SubmissionVoteCount]
+
+
+class LeaderboardItem(BaseModel):
+    submission_id: UUID
+    count: int
+    rank: int
+
+
+class LeaderboardOut(BaseModel):
+    items: List[LeaderboardItem]
+    my: Optional[LeaderboardItem]
+
+
+class ChallengeResultOut(BaseModel):
+    winner_id: Optional[UUID]
+    votes_count: int
+    items: List[LeaderboardItem]
+
+
+class VoteBufferStatsOut(BaseModel):
+    enabled: bool
+    pending: int
+    lag_ms: int
@@ -1,7 +1,9 @@
 """Explore models for tortoise orm"""
 from .challenge import Challenge
 from .playlist import Playlist
+from .result import ChallengeResult
 from .submission import Submission
+from .tombstone import ChallengeTombstone
 from .track import Track
 from .user import AuthAccount
 from .user import User
@@ -17,5 +19,7 @@ __models__ = [
     Challenge,
     Submission,
     Vote,
+    ChallengeResult,
+    ChallengeTombstone,
     Text,
 ]
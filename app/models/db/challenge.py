@@ -1,6 +1,9 @@
 """Challenge models"""
+from functools import lru_cache
+from hmac import compare_digest
 from typing import Dict
 from typing import Optional
+from uuid import UUID
 
 import jwt
 
@@ -10,9 +13,50 @@ from tortoise import fields
 from app.models.db.base import BaseModel
 from app.settings import ITEM_SECRET
 from app.settings import JWT_ALGORITHM
+from app.settings import SECRET_KEY_CACHE_SIZE
 from app.utils.exceptions import PermissionsDeniedError
 
 
+@lru_cache(maxsize=SECRET_KEY_CACHE_SIZE)
+def sign_secret_key(challenge_id: str) -> str:
+    """
+    Sign item access secret key, it is jwt with item id inside.
+    Secret key never changes for an item, so signed keys are memoized.
+    :param challenge_id: challenge id string
+    :return: secret string
+    """
+    payload: Dict[str, str] = {"id": challenge_id}
+    secret: str = jwt.encode(
+        payload=payload, key=ITEM_SECRET, algorithm=JWT_ALGORITHM,
+    ).decode("utf-8")
+
+    return secret
+
+
+def create_secret_key(challenge_id: UUID) -> str:
+    """
+    Create item access secret key.
+    :param challenge_id: challenge id
+    :return: secret string
+    """
+    return sign_secret_key(str(challenge_id))
+
+
+def check_secret_key(secret_key: Optional[str], secret: Optional[str]) -> bool:
+    """
+    Check secret against item secret key, strings are compared in constant time.
+    :param secret_key: item secret key, None for public items
+    :param secret: secret string
+    :return: true if everything is good
+    """
+    if not secret or not secret_key or not compare_digest(
+            secret.encode("utf-8"), secret_key.encode("utf-8"),
+    ):
+        raise PermissionsDeniedError
+
+    return True
+
+
 class Challenge(BaseModel):
     """Challenge model."""
 
@@ -21,6 +65,7 @@ class Challenge(BaseModel):
     vote_end = fields.DatetimeField(null=False)
     is_public = fields.BooleanField(null=True, default=True)
     is_open = fields.BooleanField(null=True, default=True)
+    participants_count = fields.IntField(default=0)
     owner = fields.ForeignKeyField("models.User", related_name="own_challenges")
     track = fields.ForeignKeyField("models.Track", related_name="challenges")
 
@@ -30,29 +75,21 @@ class Challenge(BaseModel):
 
     def secret_key(self) -> Optional[str]:
         """
-        Create item access secret key, it is jwt with item id inside.
+        Item access secret key, public challenges have no secret.
         :return: secret string
         """
         if self.is_public is True:
             return None
 
-        payload: Dict[str, str] = {"id": str(self.id)}
-        secret: str = jwt.encode(
-            payload=payload, key=ITEM_SECRET, algorithm=JWT_ALGORITHM,
-        ).decode("utf-8")
-
-        return secret
+        return create_secret_key(self.id)
 
     def check_secret(self, secret: Optional[str]) -> bool:
         """
-        Check secret key.
+        Check secret key, see `check_secret_key`.
         :param secret: secret string
         :return: true if everything is good
         """
-        if not secret or secret != self.secret_key():
-            raise PermissionsDeniedError
-
-        return True
+        return check_secret_key(self.secret_key(), secret)
 
     class PydanticMeta:  # pylint: disable=too-few-public-methods
         """Serializations options."""
@@ -0,0 +1,18 @@
+"""Challenge result models."""
+from tortoise import fields
+
+from app.models.db.base import BaseModel
+
+
+class ChallengeResult(BaseModel):
+    """
+    Final results of closed challenge, written once after `vote_end`.
+
+    `ranking` is list of submissions: submission_id, count, rank(from 1),
+    winner is the first submission if it has votes.
+    """
+
+    challenge = fields.OneToOneField("models.Challenge", related_name=False)
+    winner = fields.ForeignKeyField("models.Submission", related_name=False, null=True)
+    votes_count = fields.IntField(default=0)
+    ranking = fields.JSONField(default=list)
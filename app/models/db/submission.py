@@ -6,9 +6,10 @@ from app.models.db.base import BaseModel
 
 
 class Submission(BaseModel):
-    """Submission models."""
+    """Submission models, user has one submission per challenge."""
 
     url = fields.CharField(max_length=1024, null=False)
+    vote_count = fields.IntField(default=0)
 
     challenge = fields.ForeignKeyField("models.Challenge", related_name="submissions")
     user = fields.ForeignKeyField("models.User", related_name="submissions")
@@ -16,6 +17,10 @@ class Submission(BaseModel):
     def __str__(self) -> str:
         return str(self.url)
 
+    class Meta:  # pylint: disable=too-few-public-methods
+        """Submission model meta"""
+        unique_together = (("challenge", "user"), )
+
     class PydanticMeta:  # pylint: disable=too-few-public-methods
         """Serializations options."""
 
@@ -0,0 +1,10 @@
+"""Deleted items models."""
+from app.models.db.base import BaseModel
+
+
+class ChallengeTombstone(BaseModel):
+    """
+    Deleted challenge for delta sync clients.
+
+    `id` is id of deleted challenge, `created_at` is deletion time.
+    """
@@ -18,36 +18,40 @@ class AuthProvider(str, Enum):
 
 
 class User(BaseModel):
-    """User model."""
-    auth_accounts: fields.ReverseRelation["AuthAccount"]
+    """
+    User model.
 
-    def name(self) -> str:
-        """Last auth account name."""
-        return getattr(
-            self.auth_accounts[-1], "name"  # pylint: disable=unsubscriptable-object
-        )
+    Public profile fields are copied from the last linked auth account
+    by `update_profile`, so user is serialized without auth accounts.
+    Accounts are taken in linking order, the order in which unordered
+    `auth_accounts` relation was returned to former computed fields.
+    """
 
-    def image(self) -> str:
-        """Last auth account image."""
-        return getattr(
-            self.auth_accounts[-1], "image"  # pylint: disable=unsubscriptable-object
-        )
+    name = fields.CharField(max_length=255, null=True)
+    image = fields.CharField(max_length=2048, null=True)
+    url = fields.CharField(max_length=2048, null=True)
+    providers = fields.JSONField(default=list)
 
-    def url(self) -> str:
-        """Last auth account image."""
-        return getattr(
-            self.auth_accounts[-1], "url"  # pylint: disable=unsubscriptable-object
-        )
+    auth_accounts: fields.ReverseRelation["AuthAccount"]
 
-    def providers(self) -> List[str]:
-        """User's auth accounts provides."""
-        return [
-            getattr(auth_account, "provider")
-            for auth_account in self.auth_accounts  # pylint: disable=not-an-iterable
+    async def update_profile(self) -> None:
+        """Copy public profile fields from user's auth accounts."""
+        auth_accounts: List[AuthAccount] = await AuthAccount.filter(
+            user_id=self.id
+        ).order_by("created_at")
+        last_account: AuthAccount = auth_accounts[-1]
+        self.name = last_account.name
+        self.image = last_account.image
+        self.url = last_account.url
+        self.providers = [  # type: ignore
+            AuthProvider(auth_account.provider).value for auth_account in auth_accounts
         ]
+        await self.save(
+            update_fields=["name", "image", "url", "providers", "updated_at"]
+        )
 
     def __str__(self) -> str:
-        return self.name()
+        return str(self.name)
 
     class PydanticMeta:  # pylint: disable=too-few-public-methods
         """Serializations options."""
@@ -57,12 +61,7 @@ class User(BaseModel):
             "challenges",
             "submissions",
             "votes",
-        )
-        computed = (
-            "name",
-            "image",
-            "url",
-            "providers",
+            "auth_accounts",
         )
 
 
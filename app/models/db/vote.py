@@ -5,13 +5,24 @@ from app.models.db.base import BaseModel
 
 
 class Vote(BaseModel):
-    """Voting model."""
+    """
+    Voting model, user has one vote per challenge.
+
+    `previous_submission_id` is set by vote upsert to submission
+    which vote was on before, see `app.services.votes.cast_vote`.
+    """
 
     user = fields.ForeignKeyField("models.User", related_name="votes")
+    challenge = fields.ForeignKeyField("models.Challenge", related_name="votes")
     submission = fields.ForeignKeyField("models.Submission", related_name="votes")
+    previous_submission_id = fields.UUIDField(null=True)
+
+    class Meta:  # pylint: disable=too-few-public-methods
+        """Vote model meta"""
+        unique_together = (("challenge", "user"), )
 
     class PydanticMeta:  # pylint: disable=too-few-public-methods
         """Serializations options."""
 
-        exclude = ("user", "submission", )
+        exclude = ("user", "challenge", "submission", "previous_submission_id", )
         exclude_raw_fields = True
@@ -1,30 +1,70 @@
 """Challenges endpoints"""
 from datetime import datetime
+from functools import partial
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Union
 from uuid import UUID
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Query
+from fastapi import Request
+from fastapi.responses import StreamingResponse
 from tortoise.contrib.pydantic import PydanticModel
 
+from app.models.api.challenge import ChallengeChangesOut
 from app.models.api.challenge import ChallengeIn
 from app.models.api.challenge import ChallengeList
 from app.models.api.challenge import ChallengeListOut
 from app.models.api.challenge import ChallengeOut
+from app.models.api.challenge import ChallengeStatsOut
 from app.models.api.submission import SubmissionIn
 from app.models.api.submission import SubmissionList
 from app.models.api.submission import SubmissionListOut
 from app.models.api.submission import SubmissionOut
 from app.models.api.user import UserList
 from app.models.api.user import UserListOut
+from app.models.api.vote import ChallengeResultOut
+from app.models.api.vote import ChallengeVoteCountsOut
+from app.models.api.vote import LeaderboardItem
+from app.models.api.vote import LeaderboardOut
+from app.models.api.vote import SubmissionVoteCount
 from app.models.db import Challenge
 from app.models.db import Submission
-from app.models.db import User
+from app.models.db.challenge import check_secret_key
+from app.models.db.challenge import create_secret_key
 from app.services.auth.base import bearer_auth
+from app.services.auth.base import optional_auth
+from app.services.challenges import get_challenge_detail
+from app.services.challenges import get_challenge_header
+from app.services.challenges import get_challenge_rows
+from app.services.challenges import get_challenge_stats
+from app.services.challenges import get_challenges_json
+from app.services.challenges import get_submission_json
+from app.services.challenges import get_submissions_json
+from app.services.challenges import join_challenge
+from app.services.challenges import public_challenges_counter
+from app.services.changes import get_challenge_changes
+from app.services.leaderboard import get_rank
+from app.services.leaderboard import get_top
+from app.services.lifecycle import schedule_challenge
+from app.services.memberships import get_challenge_ids
+from app.services.results import get_results
+from app.services.search import search_challenges
+from app.services.submissions import submit_track
+from app.services.tallies import stream_tallies
+from app.settings import DB_JSON_RESPONSES
+from app.settings import PAGE_LIMIT
+from app.settings import PAGE_MAX_LIMIT
 from app.utils.db import Paginate
+from app.utils.exceptions import NotFoundError
 from app.utils.exceptions import PermissionsDeniedError
+from app.utils.responses import ORJSONResponse
+from app.utils.responses import encode_json
+from app.utils.single_flight import single_flight
 
 
 challenges_router = APIRouter()  # pylint: disable-msg=C0103
@@ -47,7 +87,18 @@ async def create_challenge_route(
     challenge_dict["owner_id"] = user_id
     challenge: Challenge = await Challenge.create(**challenge_dict)
     await challenge.fetch_related("owner")
-    await challenge.participants.add(challenge.owner)
+
+    if await join_challenge(challenge_id=challenge.id, user_id=user_id):
+        challenge.participants_count += 1  # type: ignore
+
+    await schedule_challenge(
+        challenge_id=challenge.id,
+        challenge_end=challenge.challenge_end,
+        vote_end=challenge.vote_end,
+    )
+
+    if challenge.is_public:
+        await public_challenges_counter.invalidate()
 
     response: PydanticModel = await ChallengeOut.from_tortoise_orm(challenge)
 
@@ -59,18 +110,33 @@ async def create_challenge_route(
 )
 async def get_public_challenges_route(
         pagination: Paginate = Depends(Paginate),
-) -> ChallengeListOut:
+) -> ORJSONResponse:
     """
-    Return public challenges
+    Return public challenges, lean path: response is built from selected columns
+    and encoded by orjson without models and pydantic instantiation,
+    or built by database with `DB_JSON_RESPONSES`.
     :param pagination: pagination class
-    :param user_id: current user id
     :return: challenges
     """
     queryset = Challenge.filter(is_public=True)
-    count, items = await pagination.paginate(
-        queryset=queryset, serializer=ChallengeList,
-    )
-    response = ChallengeListOut(count=count, items=items)
+
+    if DB_JSON_RESPONSES:
+        content: bytes = await pagination.paginate_json(
+            queryset=queryset,
+            fetcher=get_challenges_json,
+            counter=public_challenges_counter,
+        )
+    else:
+        count, items = await pagination.paginate_with(
+            queryset=queryset,
+            fetcher=get_challenge_rows,
+            counter=public_challenges_counter,
+        )
+        content = encode_json(
+            {"count": count, "items": items, "next_cursor": pagination.next_cursor}
+        )
+
+    response = ORJSONResponse(content=content)
 
     return response
 
@@ -91,7 +157,9 @@ async def get_my_challenges_route(
     count, items = await pagination.paginate(
         queryset=queryset, serializer=ChallengeList,
     )
-    response = ChallengeListOut(count=count, items=items)
+    response = ChallengeListOut(
+        count=count, items=items, next_cursor=pagination.next_cursor,
+    )
 
     return response
 
@@ -105,20 +173,69 @@ async def get_participant_challenges_route(
         pagination: Paginate = Depends(Paginate), user_id: str = Depends(bearer_auth),
 ) -> ChallengeListOut:
     """
-    Return challenges where user is participant
+    Return challenges where user is participant,
+    they are fetched by ids from user's memberships set.
     :param pagination: pagination class
     :param user_id: current user id
     :return: challenges
     """
-    queryset = Challenge.filter(participants__id=user_id)
+    challenge_ids: List[str] = await get_challenge_ids(user_id)
+    queryset = Challenge.filter(id__in=challenge_ids)
     count, items = await pagination.paginate(
         queryset=queryset, serializer=ChallengeList,
     )
-    response = ChallengeListOut(count=count, items=items)
+    response = ChallengeListOut(
+        count=count, items=items, next_cursor=pagination.next_cursor,
+    )
 
     return response
 
 
+@challenges_router.get(
+    "/changes/",
+    response_model=ChallengeChangesOut,
+    summary="Return public challenges changed and deleted since cursor",
+)
+async def get_challenge_changes_route(
+        since: Optional[str] = Query(default=None),
+        limit: int = Query(default=PAGE_LIMIT, gt=0, le=PAGE_MAX_LIMIT),
+) -> ORJSONResponse:
+    """
+    Delta sync of public challenges: client passes `next_cursor` of previous
+    response and gets changes after it, more pages follow while `has_more`.
+    :param since: `next_cursor` of previous response, full sync without it
+    :param limit: max changes count
+    :return: changed challenges and deleted challenges ids
+    """
+    changes: Dict[str, Any] = await get_challenge_changes(cursor=since, limit=limit)
+
+    return ORJSONResponse(content=encode_json(changes))
+
+
+@challenges_router.get(
+    "/search/",
+    response_model=ChallengeListOut,
+    summary="Search public challenges by name",
+)
+async def search_challenges_route(
+        text: str = Query(..., alias="q", min_length=1, max_length=255),
+        limit: int = Query(default=PAGE_LIMIT, gt=0, le=PAGE_MAX_LIMIT),
+        cursor: Optional[str] = Query(default=None),
+) -> ORJSONResponse:
+    """
+    Return public challenges ranked by name match, paged by cursor.
+    :param text: search text, `q` query param
+    :param limit: page size
+    :param cursor: `next_cursor` of previous page
+    :return: challenges
+    """
+    items, next_cursor = await search_challenges(text=text, limit=limit, cursor=cursor)
+
+    return ORJSONResponse(content=encode_json(
+        {"count": None, "items": items, "next_cursor": next_cursor}
+    ))
+
+
 @challenges_router.post(
     "/{challenge_id}/accept/", response_model=ChallengeOut, summary="Accept"
 )
@@ -126,26 +243,32 @@ async def accept_challenge_route(
         challenge_id: UUID,
         secret: Optional[str] = None,
         user_id: str = Depends(bearer_auth),
-) -> PydanticModel:
+) -> ORJSONResponse:
     """
-    Accept challenge.
+    Accept challenge, checks use cached challenge header, participation
+    is one idempotent write and challenge is read through cache.
     :param challenge_id: challenge id
     :param secret: challenge access secret key
     :param user_id: user id
     :return: challenge
     """
-    challenge: Challenge = await Challenge.get(id=challenge_id)
+    challenge: Optional[Dict[str, Any]] = await get_challenge_header(challenge_id)
+
+    if challenge is None:
+        raise NotFoundError
 
-    if challenge.is_public is False:
-        challenge.check_secret(secret=secret)
+    if challenge["is_public"] is False:
+        check_secret_key(create_secret_key(challenge_id), secret)
 
-    if challenge.challenge_end < datetime.utcnow():
+    if challenge["challenge_end"] < datetime.utcnow():
         raise PermissionsDeniedError
 
-    user: User = await User.get(id=user_id)
-    await challenge.participants.add(user)
+    # cached challenge is dropped by join, so changed counter is read
+    await join_challenge(challenge_id=challenge_id, user_id=user_id)
+    response: Optional[ORJSONResponse] = await get_challenge_detail(challenge_id)
 
-    response: PydanticModel = await ChallengeOut.from_tortoise_orm(challenge)
+    if response is None:
+        raise NotFoundError
 
     return response
 
@@ -164,7 +287,9 @@ async def get_challenge_participants_route(
     count, items = await pagination.paginate(
         queryset=challenge.participants.all(), serializer=UserList,
     )
-    response = UserListOut(count=count, items=items)
+    response = UserListOut(
+        count=count, items=items, next_cursor=pagination.next_cursor,
+    )
 
     return response
 
@@ -177,38 +302,44 @@ async def add_submission_route(
         submission_data: SubmissionIn,
         user_id: str = Depends(bearer_auth),
         secret: Optional[str] = None,
-) -> PydanticModel:
+) -> Union[PydanticModel, ORJSONResponse]:
     """
     Submit track for a challenge.
 
     If submission exists for a current challenge, url will be updated.
+    Checks use cached challenge header, submission is stored by one upsert
+    and response is built by database with `DB_JSON_RESPONSES`.
     :param challenge_id: challenge id
     :param submission_data: submission data(url)
     :param user_id: user's id
     :param secret: challenge access secret key
     :return: submission
     """
-    challenge: Challenge = await Challenge.get(id=challenge_id)
+    challenge: Optional[Dict[str, Any]] = await get_challenge_header(challenge_id)
 
-    if challenge.is_public is False:
-        challenge.check_secret(secret=secret)
+    if challenge is None:
+        raise NotFoundError
 
-    if challenge.challenge_end < datetime.utcnow():
+    secret_key: str = create_secret_key(challenge_id)
+
+    if challenge["is_public"] is False:
+        check_secret_key(secret_key, secret)
+
+    if challenge["challenge_end"] < datetime.utcnow():
         raise PermissionsDeniedError
 
-    submission: Optional[Submission] = await Submission.filter(
-        challenge=challenge, user_id=user_id
-    ).first()
+    submission_id: Any = await submit_track(
+        challenge_id=challenge_id, user_id=user_id, url=submission_data.url,
+    )
+
+    if DB_JSON_RESPONSES:
+        document: str = await get_submission_json(submission_id, secret_key=secret_key)
 
-    if not submission:
-        submission = await Submission.create(
-            url=submission_data.url, challenge=challenge, user_id=user_id,
-        )
-    else:
-        submission.url = submission_data.url  # type: ignore
-        await submission.save()
+        return ORJSONResponse(content=document.encode("utf-8"))
 
-    response = await SubmissionOut.from_tortoise_orm(submission)
+    response: PydanticModel = await SubmissionOut.from_queryset_single(
+        Submission.get(id=submission_id)
+    )
 
     return response
 
@@ -216,14 +347,189 @@ async def add_submission_route(
 @challenges_router.get("/{challenge_id}/submissions/", response_model=SubmissionListOut)
 async def get_challenge_submission_route(
         challenge_id: UUID, pagination: Paginate = Depends(Paginate),
-) -> SubmissionListOut:
-    """Get challenge submissions."""
+) -> Union[SubmissionListOut, ORJSONResponse]:
+    """Get challenge submissions, built by database with `DB_JSON_RESPONSES`."""
     queryset = Submission.filter(challenge_id=challenge_id)
+
+    if DB_JSON_RESPONSES:
+        content: bytes = await pagination.paginate_json(
+            queryset=queryset,
+            fetcher=partial(
+                get_submissions_json, secret_key=create_secret_key(challenge_id),
+            ),
+        )
+
+        return ORJSONResponse(content=content)
+
     count, items = await pagination.paginate(
         queryset=queryset, serializer=SubmissionList,
     )
 
-    response = SubmissionListOut(count=count, items=items)
+    response = SubmissionListOut(
+        count=count, items=items, next_cursor=pagination.next_cursor,
+    )
+
+    return response
+
+
+@challenges_router.get(
+    "/{challenge_id}/votes/",
+    response_model=ChallengeVoteCountsOut,
+    summary="Return votes counts of challenge submissions",
+)
+@single_flight()
+async def get_challenge_votes_route(challenge_id: UUID) -> ChallengeVoteCountsOut:
+    """
+    Return votes counts of all challenge submissions in one call,
+    final results are used for closed challenge.
+    :param challenge_id: challenge id
+    :return: submissions votes counts
+    """
+    results: Optional[Dict[str, Any]] = await get_results(challenge_id)
+
+    if results is not None:
+        return ChallengeVoteCountsOut(
+            items=[
+                SubmissionVoteCount(submission_id=item["submission_id"], count=item["count"])
+                for item in results["ranking"]
+            ]
+        )
+
+    counts: List[Dict[str, Any]] = await Submission.filter(
+        challenge_id=challenge_id
+    ).values("id", "vote_count")
+    response = ChallengeVoteCountsOut(
+        items=[
+            SubmissionVoteCount(submission_id=count["id"], count=count["vote_count"])
+            for count in counts
+        ]
+    )
+
+    return response
+
+
+@challenges_router.get(
+    "/{challenge_id}/stats/",
+    response_model=ChallengeStatsOut,
+    summary="Return participants, submissions and votes counts",
+)
+@single_flight()
+async def get_challenge_stats_route(challenge_id: UUID) -> ChallengeStatsOut:
+    """
+    Return challenge aggregates by one query instead of counts of lists.
+    :param challenge_id: challenge id
+    :return: stats
+    """
+    stats: Optional[Dict[str, Any]] = await get_challenge_stats(challenge_id)
+
+    if stats is None:
+        raise NotFoundError
+
+    return ChallengeStatsOut(**stats)
+
+
+@challenges_router.get(
+    "/{challenge_id}/votes/stream/",
+    response_class=StreamingResponse,
+    summary="Stream live votes counts of challenge submissions",
+)
+async def stream_challenge_votes_route(
+        challenge_id: UUID, request: Request,
+) -> StreamingResponse:
+    """
+    Server-sent events with votes counts: all submissions on connect,
+    then changed submissions at most every `TALLY_STREAM_INTERVAL` ms.
+    :param challenge_id: challenge id
+    :param request: client request
+    :return: event stream
+    """
+    if not await Challenge.filter(id=challenge_id).exists():
+        raise NotFoundError
+
+    return StreamingResponse(
+        stream_tallies(challenge_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@challenges_router.get(
+    "/{challenge_id}/leaderboard/",
+    response_model=LeaderboardOut,
+    summary="Return top submissions by votes",
+)
+async def get_challenge_leaderboard_route(
+        challenge_id: UUID,
+        limit: int = Query(default=PAGE_LIMIT, gt=0, le=PAGE_MAX_LIMIT),
+        user_id: Optional[str] = Depends(optional_auth),
+) -> LeaderboardOut:
+    """
+    Return challenge leaderboard, with current user's submission rank if authorized,
+    final results are used for closed challenge.
+    :param challenge_id: challenge id
+    :param limit: top size
+    :param user_id: current user id
+    :return: leaderboard
+    """
+    my_submission_ids: List[UUID] = []
+
+    if user_id:
+        my_submission_ids = await Submission.filter(
+            challenge_id=challenge_id, user_id=user_id
+        ).limit(1).values_list("id", flat=True)
+
+    results: Optional[Dict[str, Any]] = await get_results(challenge_id)
+    my_rank: Optional[Dict[str, Any]] = None
+
+    if results is not None:
+        top: List[Dict[str, Any]] = results["ranking"][:limit]
+
+        if my_submission_ids:
+            my_rank = next(
+                (
+                    item for item in results["ranking"]
+                    if item["submission_id"] == str(my_submission_ids[0])
+                ),
+                None,
+            )
+    else:
+        top = await get_top(challenge_id=challenge_id, limit=limit)
+
+        if my_submission_ids:
+            my_rank = await get_rank(
+                challenge_id=challenge_id, submission_id=my_submission_ids[0],
+            )
+
+    response = LeaderboardOut(
+        items=[LeaderboardItem(**item) for item in top],
+        my=LeaderboardItem(**my_rank) if my_rank is not None else None,
+    )
+
+    return response
+
+
+@challenges_router.get(
+    "/{challenge_id}/results/",
+    response_model=ChallengeResultOut,
+    summary="Return final results of closed challenge",
+)
+@single_flight()
+async def get_challenge_results_route(challenge_id: UUID) -> ChallengeResultOut:
+    """
+    Return final results written once after vote end.
+    :param challenge_id: challenge id
+    :return: ranking, votes count and winner
+    """
+    results: Optional[Dict[str, Any]] = await get_results(challenge_id)
+
+    if results is None:
+        raise NotFoundError
+
+    response = ChallengeResultOut(
+        winner_id=results["winner_id"],
+        votes_count=results["votes_count"],
+        items=results["ranking"],
+    )
 
     return response
 
@@ -233,18 +539,25 @@ async def get_challenge_submission_route(
 )
 async def get_challenge_route(
         challenge_id: UUID, secret: Optional[str] = None,
-) -> PydanticModel:
+) -> ORJSONResponse:
     """
-    Return challenge details
+    Return challenge details, access is checked by cached challenge header
+    and encoded challenge is read through cache.
     :param challenge_id: challenge id
     :param secret: challenge access secret key
     :return: challenge info
     """
-    challenge: Challenge = await Challenge.get(id=challenge_id)
+    challenge: Optional[Dict[str, Any]] = await get_challenge_header(challenge_id)
 
-    if challenge.is_public is False:
-        challenge.check_secret(secret=secret)
+    if challenge is None:
+        raise NotFoundError
 
-    response: PydanticModel = await ChallengeOut.from_tortoise_orm(challenge)
+    if challenge["is_public"] is False:
+        check_secret_key(create_secret_key(challenge_id), secret)
+
+    response: Optional[ORJSONResponse] = await get_challenge_detail(challenge_id)
+
+    if response is None:
+        raise NotFoundError
 
     return response
@@ -1,4 +1,5 @@
 """Submissions endpoints"""
+from typing import List
 from uuid import UUID
 
 from fastapi import APIRouter
@@ -7,7 +8,6 @@ from tortoise.contrib.pydantic import PydanticModel
 from app.models.api.submission import SubmissionOut
 from app.models.api.vote import VoteCount
 from app.models.db import Submission
-from app.models.db import Vote
 
 
 submissions_router = APIRouter()  # pylint: disable-msg=C0103
@@ -15,10 +15,12 @@ submissions_router = APIRouter()  # pylint: disable-msg=C0103
 
 @submissions_router.get("/{submission_id}/votes/", response_model=VoteCount)
 async def get_submission_votes_route(submission_id: UUID) -> VoteCount:
-    """Get submission votes"""
-    count: int = await Vote.filter(submission_id=submission_id).count()
+    """Get submission votes, counter is kept on submission."""
+    counts: List[int] = await Submission.filter(id=submission_id).values_list(
+        "vote_count", flat=True,
+    )
 
-    response = VoteCount(count=count)
+    response = VoteCount(count=counts[0] if counts else 0)
 
     return response
 
@@ -4,10 +4,20 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter
+from fastapi import Query
 from tortoise.contrib.pydantic import PydanticModel
 
+from app.models.api.track import TrackListOut
 from app.models.api.track import TrackOut
+from app.models.api.track import TrackSuggestionsOut
 from app.models.db import Track
+from app.services.search import search_tracks
+from app.services.suggest import track_suggest_index
+from app.settings import PAGE_LIMIT
+from app.settings import PAGE_MAX_LIMIT
+from app.settings import TRACK_SUGGEST_LIMIT
+from app.utils.responses import ORJSONResponse
+from app.utils.responses import encode_json
 
 
 tracks_router = APIRouter()  # pylint: disable-msg=C0103
@@ -30,6 +40,51 @@ async def get_random_track_route() -> PydanticModel:
     return response
 
 
+@tracks_router.get(
+    "/search/", response_model=TrackListOut, summary="Search tracks by name and author",
+)
+async def search_tracks_route(
+        text: str = Query(..., alias="q", min_length=1, max_length=255),
+        limit: int = Query(default=PAGE_LIMIT, gt=0, le=PAGE_MAX_LIMIT),
+        cursor: Optional[str] = Query(default=None),
+) -> ORJSONResponse:
+    """
+    Return tracks ranked by name and author name match, paged by cursor.
+    :param text: search text, `q` query param
+    :param limit: page size
+    :param cursor: `next_cursor` of previous page
+    :return: tracks
+    """
+    items, next_cursor = await search_tracks(text=text, limit=limit, cursor=cursor)
+
+    return ORJSONResponse(content=encode_json(
+        {"count": None, "items": items, "next_cursor": next_cursor}
+    ))
+
+
+@tracks_router.get(
+    "/suggest/",
+    response_model=TrackSuggestionsOut,
+    summary="Autocomplete recommended tracks by typed prefix",
+)
+async def suggest_tracks_route(
+        text: str = Query(..., alias="q", min_length=1, max_length=255),
+        limit: int = Query(default=TRACK_SUGGEST_LIMIT, gt=0, le=PAGE_MAX_LIMIT),
+) -> ORJSONResponse:
+    """
+    Return recommended tracks which "author - name" or name starts with text,
+    served by in-process prefix index.
+    :param text: typed text, `q` query param
+    :param limit: max tracks count
+    :return: tracks
+    """
+    await track_suggest_index.ensure()
+
+    return ORJSONResponse(content=encode_json(
+        {"items": track_suggest_index.suggest(text, limit)}
+    ))
+
+
 @tracks_router.get("/{track_id}/", response_model=TrackOut, summary="Return track")
 async def get_track_route(track_id: UUID) -> PydanticModel:
     """
@@ -14,6 +14,6 @@ router = APIRouter()  # pylint: disable-msg=C0103
 @router.get("/me/", response_model=UserOut, summary="Get current user info")
 async def get_me_route(user_id: str = Depends(bearer_auth)) -> PydanticModel:
     """User information"""
-    user: User = await User.get(id=user_id).prefetch_related("auth_accounts")
+    user: User = await User.get(id=user_id)
 
     return await UserOut.from_tortoise_orm(user)
@@ -1,17 +1,24 @@
 """Votes endpoints"""
 from datetime import datetime
-from typing import Optional
+from typing import Any
+from typing import Dict
+from typing import List
 
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
 from tortoise.contrib.pydantic import PydanticModel
 
+from app.models.api.vote import VoteBufferStatsOut
 from app.models.api.vote import VoteIn
 from app.models.api.vote import VoteOut
-from app.models.db import Submission
-from app.models.db import Vote
+from app.models.db import Challenge
 from app.services.auth.base import bearer_auth
+from app.services.vote_buffer import buffer_vote
+from app.services.vote_buffer import get_buffer_stats
+from app.services.votes import cast_vote
+from app.settings import VOTE_BUFFER_ENABLED
+from app.utils.exceptions import NotFoundError
 
 
 votes_router = APIRouter()  # pylint: disable-msg=C0103
@@ -25,31 +32,51 @@ async def make_vote_route(
     Make vote for a submission.
 
     If vote for a challenge exists, submission will be changed.
+    With `VOTE_BUFFER_ENABLED` vote is acknowledged after it is buffered in redis.
     :param vote_data: vote data(submission_id)
     :param user_id: user's id
     :return: vote
     """
-    submission: Submission = await Submission.get(
-        id=vote_data.submission_id
-    ).prefetch_related("challenge")
+    challenges: List[Dict[str, Any]] = await Challenge.filter(
+        submissions__id=vote_data.submission_id
+    ).values("id", "challenge_end", "vote_end")
+
+    if not challenges:
+        raise NotFoundError
+
+    challenge: Dict[str, Any] = challenges[0]
     now_time: datetime = datetime.utcnow()
 
-    if now_time < submission.challenge.challenge_end:  # type: ignore
+    if now_time < challenge["challenge_end"]:
         raise HTTPException(status_code=400, detail={"message": "Too early"})
 
-    if now_time > submission.challenge.vote_end:  # type: ignore
+    if now_time > challenge["vote_end"]:
         raise HTTPException(status_code=400, detail={"message": "Too late"})
 
-    vote: Optional[Vote] = await Vote.filter(
-        submission__challenge=submission.challenge, user_id=user_id
-    ).first()
-
-    if not vote:
-        vote = await Vote.create(submission=submission, user_id=user_id)
+    if VOTE_BUFFER_ENABLED:
+        vote: Dict[str, Any] = await buffer_vote(
+            challenge_id=challenge["id"],
+            submission_id=vote_data.submission_id,
+            user_id=user_id,
+            vote_end=challenge["vote_end"],
+        )
     else:
-        vote.submission = submission
-        await vote.save()
+        vote = await cast_vote(
+            challenge_id=challenge["id"],
+            submission_id=vote_data.submission_id,
+            user_id=user_id,
+        )
 
-    response = await VoteOut.from_tortoise_orm(vote)
+    response = VoteOut.parse_obj({field: vote[field] for field in VoteOut.__fields__})
 
     return response
+
+
+@votes_router.get(
+    "/buffer/", response_model=VoteBufferStatsOut, summary="Votes buffer metrics",
+)
+async def get_vote_buffer_stats_route() -> Dict[str, Any]:
+    """Pending votes of write-behind buffer and flush lag in ms."""
+    stats: Dict[str, Any] = await get_buffer_stats()
+
+    return stats
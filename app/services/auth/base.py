@@ -13,7 +13,6 @@ from typing import Union
 import jwt
 
 from fastapi import Depends
-from fastapi.responses import ORJSONResponse
 from fastapi.routing import APIRoute
 from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.security import HTTPBearer
@@ -32,6 +31,7 @@ from app.settings import JWT_SECRET
 from app.settings import REFRESH_TOKEN_LIFETIME
 from app.utils.exceptions import BadRequestError
 from app.utils.exceptions import UnauthorizedError
+from app.utils.responses import ORJSONResponse
 
 
 class OAuthRoute(APIRoute):
@@ -102,6 +102,8 @@ class OAuthRoute(APIRoute):
 
             auth_account = await AuthAccount.create(**account_info, user=user)
 
+        await auth_account.user.update_profile()  # type: ignore
+
         tokens: Dict[str, Union[str, int]] = await create_tokens(
             user_id=str(auth_account.user.id)  # type: ignore
         )
@@ -202,6 +204,13 @@ async def bearer_auth(
     return user_id
 
 
+async def optional_auth(request: Request) -> Optional[str]:
+    """Auth dependence for public endpoints, user id if token was passed."""
+    user_id: Optional[str] = request.scope.get("token_data", {}).get("user_id")
+
+    return user_id
+
+
 async def logout(access_token: Optional[str]) -> bool:
     """
     Wipe user's tokens
@@ -5,7 +5,6 @@ from typing import Optional
 
 import jwt
 
-from fastapi.responses import ORJSONResponse
 from fastapi.security.utils import get_authorization_scheme_param
 from orjson import loads  # pylint: disable-msg=E0611
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -17,6 +16,7 @@ from app.extensions import redis_client
 from app.settings import JWT_ALGORITHM
 from app.settings import JWT_SECRET
 from app.utils.exceptions import UnauthorizedError
+from app.utils.responses import ORJSONResponse
 
 
 class TokenAuthMiddleware(BaseHTTPMiddleware):
@@ -0,0 +1,473 @@
+"""Challenge services"""
+from asyncio import gather
+from datetime import datetime
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from orjson import dumps  # pylint: disable-msg=E0611
+from orjson import loads  # pylint: disable-msg=E0611
+from tortoise import QuerySet
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from app.extensions import redis_client
+from app.models.db.challenge import Challenge
+from app.models.db.challenge import create_secret_key
+from app.models.db.submission import Submission
+from app.models.db.track import Track
+from app.models.db.user import User
+from app.services.memberships import add_membership
+from app.settings import CHALLENGE_HEADER_TTL
+from app.utils.db import CachedCounter
+from app.utils.db import execute_sql
+from app.utils.json_sql import JSONBuilder
+from app.utils.responses import LocalCache
+from app.utils.responses import ORJSONResponse
+from app.utils.responses import ResponseCache
+from app.utils.single_flight import single_flight
+
+
+PARTICIPANT_INSERT: str = (
+    'INSERT INTO "challenges_participants" ("challenge_id", "user_id") '
+    'VALUES ($1, $2) ON CONFLICT DO NOTHING RETURNING "challenge_id"'
+)
+# changed counter is a change of challenge for delta sync
+PARTICIPANTS_COUNT_INCREMENT: str = (
+    'UPDATE "challenge" SET "participants_count" = "participants_count" + 1, '
+    '"updated_at" = $3'
+)
+# data-modifying CTE makes join one statement on postgres
+PARTICIPANT_JOIN_POSTGRES: str = (
+    f'WITH "participant" AS ({PARTICIPANT_INSERT}) {PARTICIPANTS_COUNT_INCREMENT} '
+    'WHERE "id" IN (SELECT "challenge_id" FROM "participant") RETURNING "id"'
+)
+PARTICIPANTS_COUNT_INCREMENT_BY_ID: str = (
+    'UPDATE "challenge" SET "participants_count" = "participants_count" + 1, '
+    '"updated_at" = $2 WHERE "id" = $1'
+)
+
+# one pass over covering (challenge_id, vote_count) index,
+# participants are counted by maintained counter
+CHALLENGE_STATS: str = (
+    'SELECT "challenge"."participants_count", '
+    'COUNT("submission"."challenge_id") AS "submissions_count", '
+    'COALESCE(SUM("submission"."vote_count"), 0) AS "votes_count" '
+    'FROM "challenge" LEFT JOIN "submission" '
+    'ON "submission"."challenge_id" = "challenge"."id" '
+    'WHERE "challenge"."id" = $1 GROUP BY "challenge"."id"'
+)
+
+# header fields are not updated after creation, so header is cached
+# until challenge is deleted, changed counters are not part of it
+CHALLENGE_HEADER_FIELDS: Tuple[str, ...] = ("id", "is_public", "challenge_end", "vote_end")
+
+CHALLENGE_FIELDS: Tuple[str, ...] = (
+    "id",
+    "created_at",
+    "updated_at",
+    "name",
+    "challenge_end",
+    "vote_end",
+    "is_public",
+    "is_open",
+    "participants_count",
+    "owner_id",
+    "track_id",
+)
+# encoded `ChallengeOut` by challenge id, dropped when challenge changes
+challenge_detail_cache = ResponseCache(  # pylint: disable-msg=C0103
+    prefix="challenges:detail", local=LocalCache(),
+)
+challenge_headers_cache = LocalCache()  # pylint: disable-msg=C0103
+public_challenges_counter = CachedCounter(  # pylint: disable-msg=C0103
+    key="challenges:public:count"
+)
+
+USER_FIELDS: Tuple[str, ...] = (
+    "id",
+    "created_at",
+    "updated_at",
+    "name",
+    "image",
+    "url",
+    "providers",
+)
+TRACK_FIELDS: Tuple[str, ...] = (
+    "id",
+    "created_at",
+    "updated_at",
+    "name",
+    "author_name",
+    "cover_url",
+    "preview_url",
+    "youtube_id",
+    "spotify_id",
+    "recommended",
+    "meta",
+)
+SUBMISSION_FIELDS: Tuple[str, ...] = (
+    "id",
+    "created_at",
+    "updated_at",
+    "url",
+    "vote_count",
+    "challenge_id",
+    "user_id",
+)
+
+
+async def join_challenge(challenge_id: Any, user_id: Any) -> bool:
+    """
+    Add challenge participant without fetching models, repeated joins are ignored
+    by unique (challenge_id, user_id) and do not change participants counter.
+    User's memberships set and cached challenge are changed after commit.
+    :param challenge_id: challenge id
+    :param user_id: user id
+    :return: true if user joined now
+    """
+    connection: BaseDBAsyncClient = Tortoise.get_connection("default")
+    now_time: datetime = datetime.utcnow()
+
+    if connection.capabilities.dialect == "postgres":
+        rows: List[Dict[str, Any]] = await execute_sql(
+            PARTICIPANT_JOIN_POSTGRES, challenge_id, user_id, now_time,
+        )
+    else:
+        async with in_transaction() as transaction:
+            rows = await execute_sql(
+                PARTICIPANT_INSERT, challenge_id, user_id, connection=transaction,
+            )
+
+            if rows:
+                await execute_sql(
+                    PARTICIPANTS_COUNT_INCREMENT_BY_ID,
+                    challenge_id,
+                    now_time,
+                    connection=transaction,
+                )
+
+    if rows:
+        await add_membership(user_id=user_id, challenge_id=challenge_id)
+        await invalidate_challenge_detail(challenge_id)
+
+    return bool(rows)
+
+
+def challenge_header_key(challenge_id: Any) -> str:
+    """
+    Redis key of challenge header.
+    :param challenge_id: challenge id
+    :return: redis key
+    """
+    return f"challenges:{challenge_id}:header"
+
+
+async def get_challenge_header(challenge_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Challenge fields for access and phase checks, cached in process and redis.
+    :param challenge_id: challenge id
+    :return: header: id, is_public, challenge_end, vote_end or None if challenge is missed
+    """
+    key: str = challenge_header_key(challenge_id)
+    header: Optional[Dict[str, Any]] = challenge_headers_cache.get(key)
+
+    if header is not None:
+        return dict(header)
+
+    cached_header: Optional[bytes] = await redis_client.get(key)
+
+    if cached_header is not None:
+        header = loads(cached_header)
+        header["challenge_end"] = datetime.fromisoformat(header["challenge_end"])
+        header["vote_end"] = datetime.fromisoformat(header["vote_end"])
+        challenge_headers_cache.set(key, header)
+
+        return dict(header)
+
+    header = await fetch_challenge_header(challenge_id)
+
+    return dict(header) if header is not None else None
+
+
+@single_flight(key=str)
+async def fetch_challenge_header(challenge_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Fetch challenge header from database and cache it,
+    concurrent misses of the process share one query.
+    :param challenge_id: challenge id
+    :return: header or None if challenge is missed
+    """
+    headers: List[Dict[str, Any]] = await Challenge.filter(
+        id=challenge_id
+    ).limit(1).values(*CHALLENGE_HEADER_FIELDS)
+
+    if not headers:
+        return None
+
+    header: Dict[str, Any] = headers[0]
+    header["id"] = str(header["id"])
+    key: str = challenge_header_key(challenge_id)
+    await redis_client.set(key=key, value=dumps(header), expire=CHALLENGE_HEADER_TTL)
+    challenge_headers_cache.set(key, header)
+
+    return header
+
+
+async def get_challenge_stats(challenge_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Challenge aggregates by one query.
+    :param challenge_id: challenge id
+    :return: stats: participants_count, submissions_count, votes_count
+        or None if challenge is missed
+    """
+    rows: List[Dict[str, Any]] = await execute_sql(CHALLENGE_STATS, challenge_id)
+
+    if not rows:
+        return None
+
+    return dict(rows[0])
+
+
+async def get_challenge_rows(queryset: QuerySet[Challenge]) -> List[Dict[str, Any]]:
+    """
+    Lean challenges fetching, selects needed columns only and assembles
+    `ChallengeOut` shaped dicts without models and pydantic instantiation.
+    :param queryset: challenges queryset
+    :return: challenges dicts
+    """
+    challenges: List[Dict[str, Any]] = await queryset.values(*CHALLENGE_FIELDS)
+
+    if not challenges:
+        return challenges
+
+    owners, tracks = await gather(
+        User.filter(
+            id__in=list({challenge["owner_id"] for challenge in challenges})
+        ).values(*USER_FIELDS),
+        Track.filter(
+            id__in=list({challenge["track_id"] for challenge in challenges})
+        ).values(*TRACK_FIELDS),
+    )
+    owners_map: Dict[Any, Dict[str, Any]] = {owner["id"]: owner for owner in owners}
+    tracks_map: Dict[Any, Dict[str, Any]] = {track["id"]: track for track in tracks}
+
+    for challenge in challenges:
+        challenge["owner"] = owners_map[challenge.pop("owner_id")]
+        challenge["track"] = tracks_map[challenge.pop("track_id")]
+        challenge["secret_key"] = None
+
+        if challenge["is_public"] is not True:
+            challenge["secret_key"] = create_secret_key(challenge["id"])
+
+    return challenges
+
+
+async def get_challenge_detail(challenge_id: Any) -> Optional[ORJSONResponse]:
+    """
+    Encoded challenge, read through local and redis caches,
+    concurrent misses share one fetch.
+    :param challenge_id: challenge id
+    :return: response or None if challenge is missed
+    """
+    async def fetch() -> Optional[Dict[str, Any]]:
+        challenges: List[Dict[str, Any]] = await get_challenge_rows(
+            Challenge.filter(id=challenge_id)
+        )
+
+        return challenges[0] if challenges else None
+
+    return await challenge_detail_cache.get_or_set(str(challenge_id), fetch)
+
+
+async def invalidate_challenge_detail(challenge_id: Any) -> None:
+    """
+    Drop cached challenge after its changes,
+    other processes keep local entry for `LOCAL_CACHE_TTL` seconds at most.
+    :param challenge_id: challenge id
+    """
+    await challenge_detail_cache.invalidate(str(challenge_id))
+
+
+def track_object(builder: JSONBuilder, alias: str) -> str:
+    """
+    `TrackOut` JSON expression.
+    :param builder: JSON builder
+    :param alias: track table alias
+    :return: SQL expression
+    """
+    return builder.object(
+        ("id", f'"{alias}"."id"'),
+        ("created_at", builder.datetime(f'"{alias}"."created_at"')),
+        ("updated_at", builder.datetime(f'"{alias}"."updated_at"')),
+        ("name", f'"{alias}"."name"'),
+        ("author_name", f'"{alias}"."author_name"'),
+        ("cover_url", f'"{alias}"."cover_url"'),
+        ("preview_url", f'"{alias}"."preview_url"'),
+        ("youtube_id", f'"{alias}"."youtube_id"'),
+        ("spotify_id", f'"{alias}"."spotify_id"'),
+        ("recommended", builder.boolean(f'"{alias}"."recommended"')),
+        ("meta", builder.json(f'"{alias}"."meta"')),
+    )
+
+
+def user_object(builder: JSONBuilder, alias: str) -> str:
+    """
+    `UserOut` JSON expression.
+    :param builder: JSON builder
+    :param alias: user table alias
+    :return: SQL expression
+    """
+    return builder.object(
+        ("id", f'"{alias}"."id"'),
+        ("created_at", builder.datetime(f'"{alias}"."created_at"')),
+        ("updated_at", builder.datetime(f'"{alias}"."updated_at"')),
+        ("name", f'"{alias}"."name"'),
+        ("image", f'"{alias}"."image"'),
+        ("url", f'"{alias}"."url"'),
+        ("providers", builder.json(f'"{alias}"."providers"')),
+    )
+
+
+def challenge_object(
+        builder: JSONBuilder,
+        alias: str,
+        owner_alias: str,
+        track_alias: str,
+        secret_key: str,
+) -> str:
+    """
+    `ChallengeOut` JSON expression.
+    :param builder: JSON builder
+    :param alias: challenge table alias
+    :param owner_alias: owner user table alias
+    :param track_alias: track table alias
+    :param secret_key: secret key SQL expression
+    :return: SQL expression
+    """
+    return builder.object(
+        ("id", f'"{alias}"."id"'),
+        ("created_at", builder.datetime(f'"{alias}"."created_at"')),
+        ("updated_at", builder.datetime(f'"{alias}"."updated_at"')),
+        ("name", f'"{alias}"."name"'),
+        ("challenge_end", builder.datetime(f'"{alias}"."challenge_end"')),
+        ("vote_end", builder.datetime(f'"{alias}"."vote_end"')),
+        ("is_public", builder.boolean(f'"{alias}"."is_public"')),
+        ("is_open", builder.boolean(f'"{alias}"."is_open"')),
+        ("participants_count", f'"{alias}"."participants_count"'),
+        ("owner", user_object(builder, owner_alias)),
+        ("track", track_object(builder, track_alias)),
+        ("secret_key", secret_key),
+    )
+
+
+async def fetch_page_json(
+        queryset: QuerySet[Any],
+        fields: Tuple[str, ...],
+        item: Callable[[JSONBuilder], str],
+        joins: str,
+        *values: Any,
+) -> str:
+    """
+    Fetch page as JSON array built by database in one query,
+    items are ordered by (-created_at, -id) as pages of `Paginate`.
+    :param queryset: page queryset, its rows are available as "page" table
+    :param fields: page columns
+    :param item: item JSON expression factory
+    :param joins: joins of related tables
+    :param values: query params
+    :return: JSON array
+    """
+    builder = JSONBuilder(Tortoise.get_connection("default").capabilities.dialect)
+    page_sql: str = queryset.values(*fields).sql()
+    items: str = builder.array(
+        item(builder), f'"page" {joins}', '"page"."position"',
+    )
+    rows: List[Dict[str, Any]] = await execute_sql(
+        'WITH "page" AS (SELECT "rows".*, row_number() OVER '
+        '(ORDER BY "rows"."created_at" DESC, "rows"."id" DESC) AS "position" '
+        f'FROM ({page_sql}) AS "rows") SELECT {builder.text(items)} AS "items"',
+        *values,
+    )
+    document: str = rows[0]["items"]
+
+    return document
+
+
+async def get_challenges_json(queryset: QuerySet[Challenge]) -> str:
+    """
+    Public challenges as JSON array of `ChallengeOut` built by database,
+    secret keys are not available in database, so they are always null.
+    :param queryset: public challenges queryset
+    :return: JSON array
+    """
+    return await fetch_page_json(
+        queryset,
+        CHALLENGE_FIELDS,
+        lambda builder: challenge_object(
+            builder,
+            alias="page",
+            owner_alias="owner",
+            track_alias="track",
+            secret_key="NULL",
+        ),
+        'JOIN "user" AS "owner" ON "owner"."id" = "page"."owner_id" '
+        'JOIN "track" ON "track"."id" = "page"."track_id"',
+    )
+
+
+async def get_submissions_json(
+        queryset: QuerySet[Submission], secret_key: Optional[str] = None,
+) -> str:
+    """
+    Challenge submissions as JSON array of `SubmissionOut` built by database.
+    :param queryset: submissions queryset of one challenge
+    :param secret_key: challenge secret key, used if challenge is not public
+    :return: JSON array
+    """
+    return await fetch_page_json(
+        queryset,
+        SUBMISSION_FIELDS,
+        lambda builder: builder.object(
+            ("id", '"page"."id"'),
+            ("created_at", builder.datetime('"page"."created_at"')),
+            ("updated_at", builder.datetime('"page"."updated_at"')),
+            ("url", '"page"."url"'),
+            ("vote_count", '"page"."vote_count"'),
+            ("challenge", challenge_object(
+                builder,
+                alias="challenge",
+                owner_alias="owner",
+                track_alias="track",
+                secret_key=(
+                    'CASE WHEN "challenge"."is_public" IS TRUE THEN NULL '
+                    "ELSE CAST($1 AS TEXT) END"
+                ),
+            )),
+            ("user", user_object(builder, "author")),
+        ),
+        'JOIN "challenge" ON "challenge"."id" = "page"."challenge_id" '
+        'JOIN "user" AS "owner" ON "owner"."id" = "challenge"."owner_id" '
+        'JOIN "track" ON "track"."id" = "challenge"."track_id" '
+        'JOIN "user" AS "author" ON "author"."id" = "page"."user_id"',
+        secret_key,
+    )
+
+
+async def get_submission_json(submission_id: Any, secret_key: Optional[str] = None) -> str:
+    """
+    Submission as JSON object of `SubmissionOut` built by database.
+    :param submission_id: submission id
+    :param secret_key: challenge secret key, used if challenge is not public
+    :return: JSON object
+    """
+    document: str = await get_submissions_json(
+        Submission.filter(id=submission_id), secret_key=secret_key,
+    )
+
+    # array of one item
+    return document[1:-1]
@@ -0,0 +1,125 @@
+"""
+Challenges delta sync.
+
+Changes feed is public challenges ordered by (updated_at, id) merged with
+tombstones of deleted challenges ordered by (created_at, id). Cursor is
+position of the last returned change, so clients refresh their lists
+with changes after it instead of downloading whole lists.
+
+Change time is taken before commit, so change committed later may be placed
+before cursor of a concurrent read. Feed returns changes older than
+`CHANGES_SYNC_LAG` seconds only, transactions which did not commit
+during the lag are not expected.
+"""
+from asyncio import gather
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
+
+from tortoise.query_utils import Q
+from tortoise.transactions import in_transaction
+
+from app.extensions import redis_client
+from app.models.db.challenge import Challenge
+from app.models.db.tombstone import ChallengeTombstone
+from app.services.challenges import challenge_header_key
+from app.services.challenges import get_challenge_rows
+from app.services.challenges import invalidate_challenge_detail
+from app.services.challenges import public_challenges_counter
+from app.services.lifecycle import unschedule_challenge
+from app.settings import CHANGES_SYNC_LAG
+from app.utils.db import decode_cursor
+from app.utils.db import encode_cursor
+
+
+# change time, item id, changed challenge dict or None for deleted one
+Change = Tuple[datetime, str, Optional[Dict[str, Any]]]
+
+
+async def delete_challenge(challenge_id: Any) -> bool:
+    """
+    Delete challenge with its relations and leave tombstone for delta sync,
+    caches and lifecycle events of challenge and cached count of public ones
+    are dropped after commit.
+    :param challenge_id: challenge id
+    :return: true if challenge was deleted
+    """
+    async with in_transaction() as connection:
+        challenges = Challenge.filter(id=challenge_id).using_db(connection)
+        public_flags: List[bool] = await challenges.values_list("is_public", flat=True)
+        deleted: int = await challenges.delete()
+
+        # private challenges are not in changes feed, clients have nothing to drop
+        if deleted and public_flags[0]:
+            await ChallengeTombstone.create(id=challenge_id, using_db=connection)
+
+    if not deleted:
+        return False
+
+    if public_flags[0]:
+        await public_challenges_counter.invalidate()
+
+    await invalidate_challenge_detail(challenge_id)
+    await redis_client.delete(challenge_header_key(challenge_id))
+    await unschedule_challenge(challenge_id)
+
+    return True
+
+
+async def get_challenge_changes(
+        cursor: Optional[str], limit: int,
+) -> Dict[str, Any]:
+    """
+    Public challenges changed and ids of challenges deleted after cursor
+    and before sync lag, without cursor all public challenges are returned
+    page by page.
+    :param cursor: position of the last change client has
+    :param limit: max changes count
+    :return: changes: items, deleted, next_cursor, has_more
+    """
+    synced_before: datetime = datetime.utcnow() - timedelta(seconds=CHANGES_SYNC_LAG)
+    challenges = Challenge.filter(
+        is_public=True, updated_at__lt=synced_before,
+    ).order_by("updated_at", "id")
+    deleted_rows: List[Dict[str, Any]] = []
+
+    if cursor:
+        changed_at, item_id = decode_cursor(cursor)
+        challenges = challenges.filter(
+            Q(updated_at__gt=changed_at) | Q(updated_at=changed_at, id__gt=item_id)
+        )
+        tombstones = ChallengeTombstone.filter(
+            Q(created_at__gt=changed_at) | Q(created_at=changed_at, id__gt=item_id),
+            created_at__lt=synced_before,
+        ).order_by("created_at", "id")
+        rows, deleted_rows = await gather(
+            get_challenge_rows(challenges.limit(limit + 1)),
+            tombstones.limit(limit + 1).values("id", "created_at"),
+        )
+    else:
+        rows = await get_challenge_rows(challenges.limit(limit + 1))
+
+    changed: List[Change] = [(row["updated_at"], str(row["id"]), row) for row in rows]
+    deleted: List[Change] = [
+        (row["created_at"], str(row["id"]), None) for row in deleted_rows
+    ]
+    changes: List[Change] = sorted(
+        changed + deleted, key=lambda change: (change[0], change[1]),
+    )
+    page: List[Change] = changes[:limit]
+    next_cursor: Optional[str] = cursor
+
+    if page:
+        next_cursor = encode_cursor(created_at=page[-1][0], item_id=UUID(page[-1][1]))
+
+    return {
+        "items": [challenge for _, _, challenge in page if challenge is not None],
+        "deleted": [item_id for _, item_id, challenge in page if challenge is None],
+        "next_cursor": next_cursor,
+        "has_more": len(changes) > limit,
+    }
@@ -0,0 +1,151 @@
+"""
+Challenge leaderboard services.
+
+Leaderboard is a redis sorted set per challenge: submission id -> votes count.
+Database `Submission.vote_count` is the source of truth, missed sorted set
+is rebuilt from it, so votes changes are applied to existing sets only.
+"""
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import uuid4
+
+from app.extensions import redis_client
+from app.models.db.submission import Submission
+
+
+def leaderboard_key(challenge_id: Any) -> str:
+    """
+    Redis key of challenge leaderboard.
+    :param challenge_id: challenge id
+    :return: redis key
+    """
+    return f"challenges:{challenge_id}:leaderboard"
+
+
+async def rebuild_leaderboard(challenge_id: Any) -> bool:
+    """
+    Build missed challenge leaderboard from database counters.
+    Set is built under temporary key and renamed only if leaderboard is still
+    missed, so existing leaderboard with its increments is never replaced.
+    :param challenge_id: challenge id
+    :return: true if built leaderboard is installed
+    """
+    counts: List[Tuple[Any, int]] = await Submission.filter(
+        challenge_id=challenge_id
+    ).values_list("id", "vote_count")
+
+    if not counts:
+        return False
+
+    key: str = leaderboard_key(challenge_id)
+    build_key: str = f"{key}:{uuid4()}"
+    pairs: List[Any] = []
+
+    for submission_id, count in counts:
+        pairs.extend((count, str(submission_id)))
+
+    transaction = redis_client.multi_exec()
+    transaction.zadd(build_key, *pairs)
+    renamed_future = transaction.renamenx(build_key, key)
+    transaction.delete(build_key)
+    await transaction.execute()
+    renamed: int = await renamed_future
+
+    return bool(renamed)
+
+
+async def ensure_leaderboard(challenge_id: Any) -> bool:
+    """
+    Rebuild challenge leaderboard if it is missed.
+    Leaderboard installed by concurrent rebuild may be read before caller's
+    changes were committed, so callers apply their changes unless
+    their own build is installed.
+    :param challenge_id: challenge id
+    :return: true if leaderboard built by this call is installed
+    """
+    if await redis_client.exists(leaderboard_key(challenge_id)):
+        return False
+
+    return await rebuild_leaderboard(challenge_id)
+
+
+async def change_leaderboard(challenge_id: Any, changes: Dict[Any, int]) -> None:
+    """
+    Apply votes changes after they are committed to database,
+    missed leaderboard is rebuilt with changes already included.
+    :param challenge_id: challenge id
+    :param changes: votes count delta by submission id
+    """
+    if await ensure_leaderboard(challenge_id):
+        return
+
+    key: str = leaderboard_key(challenge_id)
+    transaction = redis_client.multi_exec()
+
+    for submission_id, delta in changes.items():
+        transaction.zincrby(key, delta, str(submission_id))
+
+    await transaction.execute()
+
+
+async def add_to_leaderboard(challenge_id: Any, submission_id: Any) -> None:
+    """
+    Add new submission without votes to existing leaderboard.
+    :param challenge_id: challenge id
+    :param submission_id: submission id
+    """
+    if await ensure_leaderboard(challenge_id):
+        return
+
+    await redis_client.zadd(
+        leaderboard_key(challenge_id),
+        0,
+        str(submission_id),
+        exist=redis_client.ZSET_IF_NOT_EXIST,
+    )
+
+
+async def get_top(challenge_id: Any, limit: int) -> List[Dict[str, Any]]:
+    """
+    Top submissions by votes, O(log(n) + limit).
+    :param challenge_id: challenge id
+    :param limit: submissions count
+    :return: leaderboard items: submission id, count, rank(from 1)
+    """
+    await ensure_leaderboard(challenge_id)
+    top: List[Tuple[str, float]] = await redis_client.zrevrange(
+        leaderboard_key(challenge_id), 0, limit - 1, withscores=True, encoding="utf-8",
+    )
+
+    return [
+        {"submission_id": submission_id, "count": int(count), "rank": index + 1}
+        for index, (submission_id, count) in enumerate(top)
+    ]
+
+
+async def get_rank(challenge_id: Any, submission_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Submission position in leaderboard, O(log(n)).
+    :param challenge_id: challenge id
+    :param submission_id: submission id
+    :return: leaderboard item or None if submission is not in leaderboard
+    """
+    await ensure_leaderboard(challenge_id)
+    key: str = leaderboard_key(challenge_id)
+    transaction = redis_client.multi_exec()
+    rank_future = transaction.zrevrank(key, str(submission_id))
+    count_future = transaction.zscore(key, str(submission_id))
+    await transaction.execute()
+    rank: Optional[int] = await rank_future
+
+    if rank is None:
+        return None
+
+    return {
+        "submission_id": str(submission_id),
+        "count": int(await count_future),
+        "rank": rank + 1,
+    }
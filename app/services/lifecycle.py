@@ -0,0 +1,216 @@
+"""
+Challenge lifecycle scheduler.
+
+Phase transitions are events in a redis sorted set scored by due timestamp:
+"challenge_id:submissions_closed" at `challenge_end` and
+"challenge_id:votes_closed" at `vote_end`. Due events are moved atomically
+to processing set scored by claim deadline, so every event is handled by one
+process, and removed from it after handling, failed events are rescheduled.
+Events of a process crashed during handling are claimed again when their
+claim deadline (`LIFECYCLE_CLAIM_TTL` seconds) has passed.
+
+When votes are closed buffered votes are drained, submissions counters are
+recounted from votes and frozen, final results are stored and the live
+leaderboard is evicted: reads of closed challenge use results.
+"""
+import asyncio
+import time
+import warnings
+
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import Dict
+from typing import List
+
+from fastapi import FastAPI
+
+from app.extensions import redis_client
+from app.services.challenges import invalidate_challenge_detail
+from app.services.leaderboard import ensure_leaderboard
+from app.services.leaderboard import leaderboard_key
+from app.services.results import store_results
+from app.services.vote_buffer import drain_votes
+from app.settings import LIFECYCLE_CLAIM_TTL
+from app.settings import LIFECYCLE_ENABLED
+from app.settings import LIFECYCLE_INTERVAL
+from app.settings import LIFECYCLE_RETRY_DELAY
+
+
+LIFECYCLE_KEY: str = "challenges:lifecycle"
+# claimed events: event -> claim deadline timestamp
+LIFECYCLE_PROCESSING_KEY: str = "challenges:lifecycle:processing"
+SUBMISSIONS_CLOSED: str = "submissions_closed"
+VOTES_CLOSED: str = "votes_closed"
+# KEYS: scheduled, processing; ARGV: now timestamp, claim deadline
+CLAIM_DUE_EVENTS: str = """
+local due = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1])
+local expired = redis.call("ZRANGEBYSCORE", KEYS[2], "-inf", ARGV[1])
+local events = {}
+for _, event in ipairs(due) do
+    redis.call("ZREM", KEYS[1], event)
+    table.insert(events, event)
+end
+for _, event in ipairs(expired) do
+    table.insert(events, event)
+end
+for _, event in ipairs(events) do
+    redis.call("ZADD", KEYS[2], ARGV[2], event)
+end
+return events
+"""
+
+
+def to_timestamp(value: datetime) -> float:
+    """
+    Timestamp of model datetime, naive datetimes of models are UTC.
+    :param value: datetime
+    :return: timestamp
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return value.timestamp()
+
+
+async def schedule_challenge(
+        challenge_id: Any, challenge_end: datetime, vote_end: datetime,
+) -> None:
+    """
+    Schedule challenge phase transitions, past ones are handled by the next tick.
+    :param challenge_id: challenge id
+    :param challenge_end: submissions end
+    :param vote_end: votes end
+    """
+    await redis_client.zadd(
+        LIFECYCLE_KEY,
+        to_timestamp(challenge_end),
+        f"{challenge_id}:{SUBMISSIONS_CLOSED}",
+        to_timestamp(vote_end),
+        f"{challenge_id}:{VOTES_CLOSED}",
+    )
+
+
+async def unschedule_challenge(challenge_id: Any) -> None:
+    """
+    Drop not handled phase transitions of challenge, e.g. deleted one.
+    :param challenge_id: challenge id
+    """
+    events: List[str] = [
+        f"{challenge_id}:{SUBMISSIONS_CLOSED}", f"{challenge_id}:{VOTES_CLOSED}",
+    ]
+    transaction = redis_client.multi_exec()
+    transaction.zrem(LIFECYCLE_KEY, *events)
+    transaction.zrem(LIFECYCLE_PROCESSING_KEY, *events)
+    await transaction.execute()
+
+
+async def claim_due_events(now_timestamp: float) -> List[str]:
+    """
+    Move due events and events with expired claim to processing atomically.
+    :param now_timestamp: current timestamp
+    :return: events: "challenge_id:phase"
+    """
+    events: List[bytes] = await redis_client.eval(
+        CLAIM_DUE_EVENTS,
+        keys=[LIFECYCLE_KEY, LIFECYCLE_PROCESSING_KEY],
+        args=[now_timestamp, now_timestamp + LIFECYCLE_CLAIM_TTL],
+    )
+
+    return [event.decode("utf-8") for event in events]
+
+
+async def close_submissions(challenge_id: Any) -> None:
+    """
+    Submissions are final: missed leaderboard is built with all of them,
+    existing one has every submission already.
+    :param challenge_id: challenge id
+    """
+    await ensure_leaderboard(challenge_id)
+    await invalidate_challenge_detail(challenge_id)
+
+
+async def close_votes(challenge_id: Any) -> None:
+    """
+    Votes are final: drain buffer, freeze counters, store results
+    and evict live leaderboard.
+    :param challenge_id: challenge id
+    """
+    await drain_votes()
+    await store_results(challenge_id)
+    await redis_client.delete(leaderboard_key(challenge_id))
+    await invalidate_challenge_detail(challenge_id)
+
+
+async def handle_event(event: str) -> None:
+    """
+    Run phase transition of event.
+    :param event: "challenge_id:phase"
+    """
+    challenge_id, phase = event.split(":")
+
+    if phase == SUBMISSIONS_CLOSED:
+        await close_submissions(challenge_id)
+    elif phase == VOTES_CLOSED:
+        await close_votes(challenge_id)
+
+
+async def lifecycle_tick() -> List[str]:
+    """
+    Handle due events, failed ones are retried after `LIFECYCLE_RETRY_DELAY`.
+    :return: handled events
+    """
+    now_timestamp: float = time.time()
+    events: List[str] = await claim_due_events(now_timestamp)
+    handled: List[str] = []
+
+    for event in events:
+        try:
+            await handle_event(event)
+        except Exception as error:  # pylint: disable=broad-except
+            warnings.warn(f"Challenge lifecycle event {event} error: {error}")
+            transaction = redis_client.multi_exec()
+            transaction.zadd(
+                LIFECYCLE_KEY, now_timestamp + LIFECYCLE_RETRY_DELAY, event,
+            )
+            transaction.zrem(LIFECYCLE_PROCESSING_KEY, event)
+            await transaction.execute()
+        else:
+            await redis_client.zrem(LIFECYCLE_PROCESSING_KEY, event)
+            handled.append(event)
+
+    return handled
+
+
+async def run_lifecycle_loop(interval: float) -> None:
+    """
+    Handle due events every interval.
+    :param interval: seconds between ticks
+    """
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            await lifecycle_tick()
+        except Exception as error:  # pylint: disable=broad-except
+            warnings.warn(f"Challenge lifecycle error: {error}")
+
+
+def register_lifecycle(app: FastAPI) -> None:
+    """Run lifecycle scheduler while app works if it is enabled."""
+    if not LIFECYCLE_ENABLED:
+        return
+
+    lifecycle_task: Dict[str, asyncio.Task] = {}  # type: ignore
+
+    @app.on_event("startup")
+    async def startup() -> None:  # pylint: disable=unused-variable
+        """On startup run scheduler loop"""
+        lifecycle_task["task"] = asyncio.create_task(
+            run_lifecycle_loop(LIFECYCLE_INTERVAL)
+        )
+
+    @app.on_event("shutdown")
+    async def shutdown() -> None:  # pylint: disable=unused-variable
+        """On shutdown stop scheduler loop, events stay in redis"""
+        lifecycle_task["task"].cancel()
@@ -0,0 +1,104 @@
+"""
+Challenges memberships of users.
+
+Every user has redis set of ids of challenges the user participates in.
+Database `challenges_participants` is the source of truth, missed set is
+rebuilt from it, so joins are applied to existing sets only. Built sets
+contain empty member, so users without challenges are not rebuilt every time.
+Rebuild only adds members, so join committed while set is rebuilt is not lost,
+sets expire after `MEMBERSHIPS_TTL` to bound staleness of any missed update.
+"""
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Set
+
+from app.extensions import redis_client
+from app.settings import MEMBERSHIPS_TTL
+from app.utils.db import execute_sql
+
+
+BUILT_MARKER: str = ""
+
+
+def memberships_key(user_id: Any) -> str:
+    """
+    Redis key of user's challenges set.
+    :param user_id: user id
+    :return: redis key
+    """
+    return f"users:{user_id}:challenges"
+
+
+async def rebuild_memberships(user_id: Any) -> None:
+    """
+    Rebuild user's challenges set from database.
+    :param user_id: user id
+    """
+    rows: List[Dict[str, Any]] = await execute_sql(
+        'SELECT "challenge_id" FROM "challenges_participants" WHERE "user_id" = $1',
+        user_id,
+    )
+    key: str = memberships_key(user_id)
+    transaction = redis_client.multi_exec()
+    transaction.sadd(key, BUILT_MARKER, *[str(row["challenge_id"]) for row in rows])
+    transaction.expire(key, MEMBERSHIPS_TTL)
+    await transaction.execute()
+
+
+async def ensure_memberships(user_id: Any) -> bool:
+    """
+    Rebuild user's challenges set if it is missed.
+    :param user_id: user id
+    :return: true if set was rebuilt
+    """
+    if await redis_client.exists(memberships_key(user_id)):
+        return False
+
+    await rebuild_memberships(user_id)
+
+    return True
+
+
+async def add_membership(user_id: Any, challenge_id: Any) -> None:
+    """
+    Add challenge to user's set after participant is stored to database.
+    :param user_id: user id
+    :param challenge_id: challenge id
+    """
+    if await ensure_memberships(user_id):
+        return
+
+    key: str = memberships_key(user_id)
+    transaction = redis_client.multi_exec()
+    transaction.sadd(key, str(challenge_id))
+    transaction.expire(key, MEMBERSHIPS_TTL)
+    await transaction.execute()
+
+
+async def is_member(user_id: Any, challenge_id: Any) -> bool:
+    """
+    Check user is challenge participant, O(1).
+    :param user_id: user id
+    :param challenge_id: challenge id
+    :return: true if user is participant
+    """
+    await ensure_memberships(user_id)
+    member: int = await redis_client.sismember(memberships_key(user_id), str(challenge_id))
+
+    return bool(member)
+
+
+async def get_challenge_ids(user_id: Any) -> List[str]:
+    """
+    Challenges where user is participant.
+    :param user_id: user id
+    :return: challenge ids
+    """
+    await ensure_memberships(user_id)
+    members: Set[str] = set(
+        await redis_client.smembers(memberships_key(user_id), encoding="utf-8")
+    )
+    members.discard(BUILT_MARKER)
+
+    return list(members)
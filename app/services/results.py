@@ -0,0 +1,84 @@
+"""
+Final results of closed challenges.
+
+Results are computed once from frozen submissions counters and stored
+in `ChallengeResult`, reads of closed challenge are one indexed lookup.
+"""
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from tortoise.transactions import in_transaction
+
+from app.models.db.result import ChallengeResult
+from app.models.db.submission import Submission
+from app.utils.db import execute_sql
+
+
+SUBMISSION_VOTE_COUNT_RECOUNT: str = (
+    'UPDATE "submission" SET "vote_count" = '
+    '(SELECT COUNT(*) FROM "vote" WHERE "vote"."submission_id" = "submission"."id") '
+    'WHERE "challenge_id" = $1'
+)
+RESULT_FIELDS = ("winner_id", "votes_count", "ranking")
+
+
+async def rank_submissions(challenge_id: Any) -> List[Dict[str, Any]]:
+    """
+    Challenge submissions ordered by votes, ties are ordered by submission time.
+    :param challenge_id: challenge id
+    :return: ranking items: submission id, count, rank(from 1)
+    """
+    counts: List[Dict[str, Any]] = await Submission.filter(
+        challenge_id=challenge_id
+    ).order_by("-vote_count", "created_at").values("id", "vote_count")
+
+    return [
+        {"submission_id": str(count["id"]), "count": count["vote_count"], "rank": index + 1}
+        for index, count in enumerate(counts)
+    ]
+
+
+async def store_results(challenge_id: Any) -> Dict[str, Any]:
+    """
+    Recount submissions counters from votes and store final results,
+    existing results of challenge are replaced.
+    :param challenge_id: challenge id
+    :return: results: winner_id, votes_count, ranking
+    """
+    await execute_sql(SUBMISSION_VOTE_COUNT_RECOUNT, challenge_id)
+    ranking: List[Dict[str, Any]] = await rank_submissions(challenge_id)
+    results: Dict[str, Any] = {
+        "winner_id": (
+            ranking[0]["submission_id"] if ranking and ranking[0]["count"] else None
+        ),
+        "votes_count": sum(item["count"] for item in ranking),
+        "ranking": ranking,
+    }
+
+    async with in_transaction() as connection:
+        await ChallengeResult.filter(challenge_id=challenge_id).using_db(
+            connection
+        ).delete()
+        await ChallengeResult.create(
+            challenge_id=challenge_id, using_db=connection, **results,
+        )
+
+    return results
+
+
+async def get_results(challenge_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Final results of closed challenge.
+    :param challenge_id: challenge id
+    :return: results: winner_id, votes_count, ranking or None if challenge is not closed
+    """
+    results: List[Dict[str, Any]] = await ChallengeResult.filter(
+        challenge_id=challenge_id
+    ).limit(1).values(*RESULT_FIELDS)
+
+    if not results:
+        return None
+
+    return results[0]
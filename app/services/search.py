@@ -0,0 +1,197 @@
+"""
+Search of public challenges by name and tracks by name and author.
+
+Postgres matches `simple` full-text vectors or trigram similarity, both
+served by GIN indexes of migration 8, results are ranked by text rank plus
+similarity. SQLite fallback matches substrings and ranks earlier matches
+higher. Pages are ordered by (-rank, -id), cursor is the last position.
+"""
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from binascii import Error as BinasciiError
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
+
+from orjson import JSONDecodeError  # pylint: disable-msg=E0611
+from orjson import dumps  # pylint: disable-msg=E0611
+from orjson import loads  # pylint: disable-msg=E0611
+from tortoise import Tortoise
+
+from app.models.db.challenge import Challenge
+from app.models.db.track import Track
+from app.services.challenges import TRACK_FIELDS
+from app.services.challenges import get_challenge_rows
+from app.utils.db import execute_sql
+from app.utils.exceptions import BadRequestError
+
+
+CHALLENGE_VECTOR: str = "to_tsvector('simple', coalesce(\"name\", ''))"
+TRACK_VECTOR: str = (
+    "to_tsvector('simple', coalesce(\"name\", '') || ' ' "
+    "|| coalesce(\"author_name\", ''))"
+)
+TS_QUERY: str = "plainto_tsquery('simple', $1)"
+
+# $1 - search text, $2, $3 - cursor rank and id or NULL, $4 - limit
+SEARCH_PAGE: Dict[str, str] = {
+    "postgres": (
+        'SELECT "id", "rank" FROM ({found}) AS "found" '
+        'WHERE $2::float8 IS NULL OR ("rank", "id") < ($2::float8, $3::uuid) '
+        'ORDER BY "rank" DESC, "id" DESC LIMIT $4'
+    ),
+    "sqlite": (
+        'SELECT "id", "rank" FROM ({found}) AS "found" '
+        'WHERE $2 IS NULL OR ("rank", "id") < ($2, $3) '
+        'ORDER BY "rank" DESC, "id" DESC LIMIT $4'
+    ),
+}
+
+
+def sqlite_rank(column: str) -> str:
+    """
+    Substring match rank of SQLite fallback: 1 for prefix, 0 for no match.
+    :param column: column name
+    :return: SQL expression
+    """
+    position: str = f'instr(lower(coalesce("{column}", \'\')), lower($1))'
+
+    return f"(CASE WHEN {position} > 0 THEN 1.0 / {position} ELSE 0 END)"
+
+
+CHALLENGE_FOUND: Dict[str, str] = {
+    "postgres": (
+        f'SELECT "id", (ts_rank({CHALLENGE_VECTOR}, {TS_QUERY}) '
+        '+ similarity(coalesce("name", \'\'), $1))::float8 AS "rank" '
+        'FROM "challenge" WHERE "is_public" = true '
+        f'AND ({CHALLENGE_VECTOR} @@ {TS_QUERY} OR "name" % $1)'
+    ),
+    "sqlite": (
+        f'SELECT "id", {sqlite_rank("name")} AS "rank" '
+        f'FROM "challenge" WHERE "is_public" = 1 AND {sqlite_rank("name")} > 0'
+    ),
+}
+TRACK_FOUND: Dict[str, str] = {
+    "postgres": (
+        f'SELECT "id", (ts_rank({TRACK_VECTOR}, {TS_QUERY}) + greatest('
+        'similarity(coalesce("name", \'\'), $1), '
+        'similarity(coalesce("author_name", \'\'), $1)))::float8 AS "rank" '
+        f'FROM "track" WHERE {TRACK_VECTOR} @@ {TS_QUERY} '
+        'OR "name" % $1 OR "author_name" % $1'
+    ),
+    "sqlite": (
+        f'SELECT "id", max({sqlite_rank("name")}, {sqlite_rank("author_name")}) '
+        f'AS "rank" FROM "track" WHERE {sqlite_rank("name")} > 0 '
+        f'OR {sqlite_rank("author_name")} > 0'
+    ),
+}
+
+
+def encode_search_cursor(rank: float, item_id: Any) -> str:
+    """
+    Encode search position to opaque cursor.
+    :param rank: last item rank
+    :param item_id: last item id
+    :return: cursor string
+    """
+    return urlsafe_b64encode(dumps([rank, str(item_id)])).decode("utf-8")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, UUID]:
+    """
+    Decode opaque cursor to search position.
+    :param cursor: cursor string
+    :return: last item rank and id
+    """
+    try:
+        rank, item_id = loads(urlsafe_b64decode(cursor.encode("utf-8")))
+        return float(rank), UUID(item_id)
+    except (BinasciiError, JSONDecodeError, TypeError, ValueError) as error:
+        raise BadRequestError from error
+
+
+async def search_ids(
+        found: Dict[str, str], text: str, limit: int, cursor: Optional[str] = None,
+) -> Tuple[List[str], Optional[str]]:
+    """
+    Ranked ids page, one extra row is fetched to find out next page.
+    :param found: matched ids and ranks query by dialect
+    :param text: search text
+    :param limit: page size
+    :param cursor: position of previous page end
+    :return: ids, next cursor
+    """
+    dialect: str = Tortoise.get_connection("default").capabilities.dialect
+    rank: Optional[float] = None
+    item_id: Optional[UUID] = None
+
+    if cursor:
+        rank, item_id = decode_search_cursor(cursor)
+
+    rows: List[Dict[str, Any]] = await execute_sql(
+        SEARCH_PAGE[dialect].format(found=found[dialect]), text, rank, item_id, limit + 1,
+    )
+    next_cursor: Optional[str] = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1]["rank"], rows[-1]["id"])
+
+    return [str(row["id"]) for row in rows], next_cursor
+
+
+def order_by_ids(items: List[Dict[str, Any]], ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Order fetched items as ranked ids.
+    :param items: items dicts
+    :param ids: ranked ids
+    :return: ordered items
+    """
+    items_map: Dict[str, Dict[str, Any]] = {str(item["id"]): item for item in items}
+
+    return [items_map[item_id] for item_id in ids if item_id in items_map]
+
+
+async def search_challenges(
+        text: str, limit: int, cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Search public challenges by name.
+    :param text: search text
+    :param limit: page size
+    :param cursor: position of previous page end
+    :return: `ChallengeOut` shaped dicts, next cursor
+    """
+    ids, next_cursor = await search_ids(CHALLENGE_FOUND, text, limit, cursor)
+
+    if not ids:
+        return [], next_cursor
+
+    challenges: List[Dict[str, Any]] = await get_challenge_rows(
+        Challenge.filter(id__in=ids)
+    )
+
+    return order_by_ids(challenges, ids), next_cursor
+
+
+async def search_tracks(
+        text: str, limit: int, cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Search tracks by name and author name.
+    :param text: search text
+    :param limit: page size
+    :param cursor: position of previous page end
+    :return: `TrackOut` shaped dicts, next cursor
+    """
+    ids, next_cursor = await search_ids(TRACK_FOUND, text, limit, cursor)
+
+    if not ids:
+        return [], next_cursor
+
+    tracks: List[Dict[str, Any]] = await Track.filter(id__in=ids).values(*TRACK_FIELDS)
+
+    return order_by_ids(tracks, ids), next_cursor
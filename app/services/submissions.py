@@ -0,0 +1,44 @@
+"""Submission services"""
+from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import List
+from uuid import uuid4
+
+from app.services.challenges import invalidate_challenge_detail
+from app.services.leaderboard import add_to_leaderboard
+from app.utils.db import execute_sql
+
+
+# existing submission keeps its id, so new id in result means insert
+SUBMISSION_UPSERT: str = (
+    'INSERT INTO "submission" '
+    '("id", "created_at", "updated_at", "url", "vote_count", "challenge_id", "user_id") '
+    "VALUES ($1, $2, $2, $3, 0, $4, $5) "
+    'ON CONFLICT ("challenge_id", "user_id") DO UPDATE SET '
+    '"url" = EXCLUDED."url", "updated_at" = EXCLUDED."updated_at" '
+    'RETURNING "id"'
+)
+
+
+async def submit_track(challenge_id: Any, user_id: Any, url: str) -> Any:
+    """
+    Create user's submission for a challenge or change url of existing one
+    by single upsert, unique (challenge_id, user_id) makes double submissions impossible.
+    New submission is added to leaderboard and cached challenge is dropped.
+    :param challenge_id: challenge id
+    :param user_id: user's id
+    :param url: track url
+    :return: submission id
+    """
+    submission_id = uuid4()
+    rows: List[Dict[str, Any]] = await execute_sql(
+        SUBMISSION_UPSERT, submission_id, datetime.utcnow(), url, challenge_id, user_id,
+    )
+    stored_id: Any = rows[0]["id"]
+
+    if str(stored_id) == str(submission_id):
+        await add_to_leaderboard(challenge_id=challenge_id, submission_id=submission_id)
+        await invalidate_challenge_detail(challenge_id)
+
+    return stored_id
@@ -0,0 +1,255 @@
+"""
+In-process prefix index of recommended tracks for autocomplete.
+
+Every track is indexed by normalized "author_name - name" and by normalized
+name: sorted keys array is searched by bisection, so lookup is O(log n + k)
+without database queries. Index is built on the first lookup and refreshed
+incrementally by tracks created after the last seen one, tracks ingested by
+the process are added at once.
+"""
+import asyncio
+import unicodedata
+import warnings
+
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from fastapi import FastAPI
+
+from app.models.db.track import Track
+from app.settings import TRACK_SUGGEST_REFRESH
+
+
+SUGGEST_FIELDS: Tuple[str, ...] = (
+    "id", "created_at", "name", "author_name", "cover_url",
+)
+# key and track id separator, sorts before every printable character
+KEY_SEPARATOR: str = "\x00"
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    Normalize text for prefix matching: case, accents and spaces are ignored.
+    :param text: text
+    :return: normalized text
+    """
+    if not text:
+        return ""
+
+    decomposed: str = unicodedata.normalize("NFKD", text.casefold())
+    letters: str = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+
+    return " ".join(letters.split())
+
+
+def get_track_keys(track: Dict[str, Any]) -> Set[str]:
+    """
+    Index keys of track.
+    :param track: track dict with name and author_name
+    :return: normalized keys
+    """
+    name: str = normalize(track["name"])
+    author_name: str = normalize(track["author_name"])
+    keys: Set[str] = {name}
+
+    if author_name:
+        keys.add(f"{author_name} - {name}")
+
+    keys.discard("")
+
+    return keys
+
+
+class TrackSuggestIndex:
+    """
+    Sorted "key\\x00track_id" entries, track fields by id.
+
+    Prefix lookup finds the first entry not less than prefix by bisection,
+    matching entries follow it.
+    """
+
+    def __init__(self) -> None:
+        self.entries: List[str] = []
+        self.tracks: Dict[str, Dict[str, Any]] = {}
+        self.last_created_at: Optional[datetime] = None
+        self.built: bool = False
+        self.lock: asyncio.Lock = asyncio.Lock()
+
+    def add_track(self, track: Track) -> None:
+        """
+        Add ingested track model if index is built and track is recommended,
+        otherwise it is added by the next build.
+        :param track: track model
+        """
+        if self.built and track.recommended:
+            self.add({field: getattr(track, field) for field in SUGGEST_FIELDS})
+
+    def add(self, track: Dict[str, Any]) -> None:
+        """
+        Add or replace track.
+        :param track: track dict with `SUGGEST_FIELDS`
+        """
+        for entry in self.store(track):
+            self.entries.insert(bisect_left(self.entries, entry), entry)
+
+    def extend(self, tracks: Iterable[Dict[str, Any]]) -> None:
+        """
+        Add or replace tracks, entries are sorted once for the whole batch
+        instead of insertion of every entry.
+        :param tracks: track dicts
+        """
+        # the last dict of track wins like with one by one adding
+        batch: Dict[str, Dict[str, Any]] = {str(track["id"]): track for track in tracks}
+        entries: List[str] = []
+
+        for track in batch.values():
+            entries.extend(self.store(track))
+
+        self.entries.extend(entries)
+        self.entries.sort()
+
+    def store(self, track: Dict[str, Any]) -> List[str]:
+        """
+        Replace fields of track and drop its old entries.
+        :param track: track dict with `SUGGEST_FIELDS`
+        :return: new entries of track to insert
+        """
+        track_id: str = str(track["id"])
+        self.remove(track_id)
+        self.tracks[track_id] = {
+            "id": track_id,
+            "name": track["name"],
+            "author_name": track["author_name"],
+            "cover_url": track["cover_url"],
+        }
+        created_at: Optional[datetime] = track.get("created_at")
+
+        if created_at is not None and (
+                self.last_created_at is None or created_at > self.last_created_at
+        ):
+            self.last_created_at = created_at
+
+        return [f"{key}{KEY_SEPARATOR}{track_id}" for key in get_track_keys(track)]
+
+    def remove(self, track_id: str) -> None:
+        """
+        Remove track if it is indexed.
+        :param track_id: track id
+        """
+        track: Optional[Dict[str, Any]] = self.tracks.pop(track_id, None)
+
+        if track is None:
+            return
+
+        for key in get_track_keys(track):
+            entry: str = f"{key}{KEY_SEPARATOR}{track_id}"
+            position: int = bisect_left(self.entries, entry)
+
+            if position < len(self.entries) and self.entries[position] == entry:
+                del self.entries[position]
+
+    def suggest(self, text: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Tracks which keys start with text, ordered by key.
+        :param text: typed text
+        :param limit: max tracks count
+        :return: track dicts: id, name, author_name, cover_url
+        """
+        prefix: str = normalize(text)
+        items: List[Dict[str, Any]] = []
+        seen: Set[str] = set()
+
+        if not prefix:
+            return items
+
+        position: int = bisect_left(self.entries, prefix)
+
+        while position < len(self.entries) and len(items) < limit:
+            entry: str = self.entries[position]
+            position += 1
+
+            if not entry.startswith(prefix):
+                break
+
+            track_id: str = entry.rsplit(KEY_SEPARATOR, 1)[1]
+
+            if track_id not in seen:
+                seen.add(track_id)
+                items.append(self.tracks[track_id])
+
+        return items
+
+    async def refresh(self) -> int:
+        """
+        Add recommended tracks created since the last indexed one(tracks
+        created at the same time are replaced), the first refresh builds
+        the whole index.
+        :return: added tracks count
+        """
+        async with self.lock:
+            queryset = Track.filter(recommended=True)
+
+            if self.last_created_at is not None:
+                queryset = queryset.filter(created_at__gte=self.last_created_at)
+
+            tracks: List[Dict[str, Any]] = await queryset.values(*SUGGEST_FIELDS)
+            self.extend(tracks)
+            self.built = True
+
+        return len(tracks)
+
+    async def ensure(self) -> None:
+        """Build index if it is not built."""
+        if not self.built:
+            await self.refresh()
+
+    def clear(self) -> None:
+        """Drop index, it is built again by the next lookup."""
+        self.entries = []
+        self.tracks = {}
+        self.last_created_at = None
+        self.built = False
+
+
+track_suggest_index = TrackSuggestIndex()  # pylint: disable-msg=C0103
+
+
+async def run_suggest_refresh_loop(interval: float) -> None:
+    """
+    Refresh index every interval, refresh errors do not stop the loop.
+    :param interval: seconds between refreshes
+    """
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            await track_suggest_index.refresh()
+        except Exception as error:  # pylint: disable=broad-except
+            warnings.warn(f"Tracks suggest index refresh error: {error}")
+
+
+def register_track_suggest(app: FastAPI) -> None:
+    """Build index on startup and refresh it while app works."""
+    refresh_task: Dict[str, asyncio.Task] = {}  # type: ignore
+
+    @app.on_event("startup")
+    async def startup() -> None:  # pylint: disable=unused-variable
+        """On startup build index and run refresh loop"""
+        await track_suggest_index.ensure()
+        refresh_task["task"] = asyncio.create_task(
+            run_suggest_refresh_loop(TRACK_SUGGEST_REFRESH)
+        )
+
+    @app.on_event("shutdown")
+    async def shutdown() -> None:  # pylint: disable=unused-variable
+        """On shutdown stop refresh loop"""
+        refresh_task["task"].cancel()
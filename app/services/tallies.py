@@ -0,0 +1,283 @@
+"""
+Live votes tallies of challenge.
+
+Vote path publishes ids of submissions which counters were changed to
+challenge channel after commit. Every process keeps one subscription per
+streamed challenge: changes are coalesced for `TALLY_STREAM_INTERVAL` ms,
+counts are read from leaderboard once and the encoded server-sent event
+is fanned out to every connection of the challenge. Connection which queue
+is full of `TALLY_STREAM_QUEUE_SIZE` not sent events is closed.
+"""
+import asyncio
+import warnings
+
+from collections import defaultdict
+from typing import Any
+from typing import AsyncGenerator
+from typing import Awaitable
+from typing import Callable
+from typing import DefaultDict
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from aioredis import ChannelClosedError
+from aioredis.pubsub import Channel
+from orjson import dumps  # pylint: disable-msg=E0611
+from orjson import loads  # pylint: disable-msg=E0611
+
+from app.extensions import redis_client
+from app.services.leaderboard import ensure_leaderboard
+from app.services.leaderboard import leaderboard_key
+from app.services.results import get_results
+from app.settings import TALLY_STREAM_HEARTBEAT
+from app.settings import TALLY_STREAM_INTERVAL
+from app.settings import TALLY_STREAM_QUEUE_SIZE
+
+
+HEARTBEAT_EVENT: bytes = b": ping\n\n"
+# queued instead of event to close connection of slow client
+CLOSE_EVENT: bytes = b""
+
+
+def tallies_channel(challenge_id: Any) -> str:
+    """
+    Redis channel of challenge votes changes.
+    :param challenge_id: challenge id
+    :return: channel name
+    """
+    return f"challenges:{challenge_id}:tallies"
+
+
+async def publish_tallies(challenge_id: Any, submission_ids: Iterable[Any]) -> None:
+    """
+    Notify streams about changed submissions counters.
+    :param challenge_id: challenge id
+    :param submission_ids: changed submissions ids
+    """
+    await redis_client.publish(
+        tallies_channel(challenge_id),
+        dumps([str(submission_id) for submission_id in submission_ids]),
+    )
+
+
+async def get_tallies_event(
+        challenge_id: Any, submission_ids: Optional[Iterable[str]] = None,
+) -> bytes:
+    """
+    Server-sent event with votes counts from leaderboard,
+    counts of closed challenge are taken from its results.
+    :param challenge_id: challenge id
+    :param submission_ids: submissions to include, all submissions by default
+    :return: encoded event
+    """
+    key: str = leaderboard_key(challenge_id)
+
+    if not await redis_client.exists(key):
+        results: Optional[Dict[str, Any]] = await get_results(challenge_id)
+
+        # leaderboard of closed challenge is evicted, final counts are in results
+        if results is not None:
+            wanted: Optional[Set[str]] = (
+                None if submission_ids is None else set(submission_ids)
+            )
+
+            return encode_tallies_event([
+                (item["submission_id"], item["count"]) for item in results["ranking"]
+                if wanted is None or item["submission_id"] in wanted
+            ])
+
+        await ensure_leaderboard(challenge_id)
+
+    if submission_ids is None:
+        counts: List[Tuple[str, Optional[float]]] = await redis_client.zrange(
+            key, withscores=True, encoding="utf-8",
+        )
+    else:
+        submission_ids = list(submission_ids)
+        transaction = redis_client.multi_exec()
+        futures = [
+            transaction.zscore(key, submission_id) for submission_id in submission_ids
+        ]
+        await transaction.execute()
+        counts = [
+            (submission_id, await future)
+            for submission_id, future in zip(submission_ids, futures)
+        ]
+
+    return encode_tallies_event(counts)
+
+
+def encode_tallies_event(counts: Iterable[Tuple[str, Optional[float]]]) -> bytes:
+    """
+    Encode server-sent event with votes counts.
+    :param counts: submission id and count pairs, missed counts are skipped
+    :return: encoded event
+    """
+    data: bytes = dumps({
+        "items": [
+            {"submission_id": submission_id, "count": int(count)}
+            for submission_id, count in counts
+            if count is not None
+        ]
+    })
+
+    return b"event: tallies\ndata: " + data + b"\n\n"
+
+
+class TalliesStream:
+    """
+    Challenge subscription shared by connections of the process.
+
+    Reader waits for the first change, collects changes for the interval
+    and sends one event with changed counts to every connection queue,
+    event errors are logged and the next changes are read.
+    """
+
+    def __init__(self, challenge_id: Any, interval: float):
+        self.challenge_id: Any = challenge_id
+        self.interval: float = interval
+        self.queues: Set[asyncio.Queue] = set()  # type: ignore
+        self.task: Optional[asyncio.Future] = None  # type: ignore
+
+    async def start(self) -> None:
+        """Subscribe challenge channel and run reader."""
+        channels: List[Channel] = await redis_client.subscribe(
+            tallies_channel(self.challenge_id)
+        )
+        self.task = asyncio.ensure_future(self.read(channels[0]))
+
+    async def stop(self) -> None:
+        """Unsubscribe challenge channel, reader stops on closed channel."""
+        await redis_client.unsubscribe(tallies_channel(self.challenge_id))
+
+    async def read(self, channel: Channel) -> None:
+        """
+        Coalesce channel messages to events.
+        :param channel: challenge channel
+        """
+        loop = asyncio.get_event_loop()
+
+        try:
+            while True:
+                changed: Set[str] = set(loads(await channel.get()))
+                deadline: float = loop.time() + self.interval
+
+                while loop.time() < deadline:
+                    try:
+                        message: bytes = await asyncio.wait_for(
+                            channel.get(), deadline - loop.time(),
+                        )
+                    except asyncio.TimeoutError:
+                        break
+
+                    changed.update(loads(message))
+
+                try:
+                    event: bytes = await get_tallies_event(self.challenge_id, changed)
+                except Exception as error:  # pylint: disable=broad-except
+                    warnings.warn(f"Tallies event error: {error}")
+                    continue
+
+                self.send(event)
+        except ChannelClosedError:
+            pass
+
+    def send(self, event: bytes) -> None:
+        """
+        Put event to every connection queue,
+        connections which queues are full are dropped.
+        :param event: encoded event
+        """
+        for queue in list(self.queues):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.queues.discard(queue)
+
+                while not queue.empty():
+                    queue.get_nowait()
+
+                queue.put_nowait(CLOSE_EVENT)
+
+
+tallies_streams: Dict[str, TalliesStream] = {}  # pylint: disable-msg=C0103
+# stream start and stop of a challenge are not interleaved
+tallies_locks: DefaultDict[str, asyncio.Lock] = defaultdict(  # pylint: disable-msg=C0103
+    asyncio.Lock
+)
+
+
+async def subscribe_tallies(challenge_id: Any) -> asyncio.Queue:  # type: ignore
+    """
+    Add connection to challenge stream, stream is started by the first one.
+    :param challenge_id: challenge id
+    :return: connection events queue
+    """
+    async with tallies_locks[str(challenge_id)]:
+        stream: Optional[TalliesStream] = tallies_streams.get(str(challenge_id))
+
+        if stream is None:
+            stream = TalliesStream(challenge_id, TALLY_STREAM_INTERVAL / 1000)
+            await stream.start()
+            tallies_streams[str(challenge_id)] = stream
+
+        queue: asyncio.Queue = asyncio.Queue(  # type: ignore
+            maxsize=TALLY_STREAM_QUEUE_SIZE
+        )
+        stream.queues.add(queue)
+
+    return queue
+
+
+async def unsubscribe_tallies(challenge_id: Any, queue: asyncio.Queue) -> None:  # type: ignore
+    """
+    Remove connection from challenge stream, stream is stopped with the last one.
+    :param challenge_id: challenge id
+    :param queue: connection events queue
+    """
+    async with tallies_locks[str(challenge_id)]:
+        stream: Optional[TalliesStream] = tallies_streams.get(str(challenge_id))
+
+        if stream is None:
+            return
+
+        stream.queues.discard(queue)
+
+        if not stream.queues:
+            await stream.stop()
+            del tallies_streams[str(challenge_id)]
+
+
+async def stream_tallies(
+        challenge_id: Any, is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncGenerator[bytes, None]:
+    """
+    Events of connection: all counts first, then changed counts,
+    heartbeat comments keep idle connection open. Dropped slow connection ends.
+    :param challenge_id: challenge id
+    :param is_disconnected: coroutine function which checks client connection
+    :return: encoded events
+    """
+    queue: asyncio.Queue = await subscribe_tallies(challenge_id)  # type: ignore
+
+    try:
+        yield await get_tallies_event(challenge_id)
+
+        while not await is_disconnected():
+            try:
+                event: bytes = await asyncio.wait_for(
+                    queue.get(), TALLY_STREAM_HEARTBEAT,
+                )
+            except asyncio.TimeoutError:
+                event = HEARTBEAT_EVENT
+
+            if event == CLOSE_EVENT:
+                break
+
+            yield event
+    finally:
+        await unsubscribe_tallies(challenge_id, queue)
@@ -6,6 +6,7 @@ from typing import Optional
 
 from app.models.db.playlist import Playlist
 from app.models.db.track import Track
+from app.services.suggest import track_suggest_index
 
 
 def format_track(track_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -70,5 +71,6 @@ async def add_tracks_to_playlist(
 
         track, _ = await Track.get_or_create(**formatted_track)
         await playlist.tracks.add(track)
+        track_suggest_index.add_track(track)
 
     return True
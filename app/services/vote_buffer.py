@@ -0,0 +1,314 @@
+"""
+Write-behind votes buffer.
+
+With `VOTE_BUFFER_ENABLED` votes are acknowledged after one redis transaction
+and stored to database by the flush loop every `VOTE_BUFFER_INTERVAL` ms.
+Buffer is a redis hash: "challenge_id:user_id" -> [submission_id, vote time],
+so user's last vote in a challenge wins like with the database upsert.
+
+Flush takes the whole buffer atomically by renaming it to a batch key, which
+is recorded in processing set with claim deadline until the batch is stored.
+Votes of a batch are upserted in chunks of `VOTE_BUFFER_BATCH_SIZE`, batches
+of crashed flushes are stored again by the next tick after
+`VOTE_BUFFER_CLAIM_TTL` seconds. When vote end of a buffered challenge
+has passed the buffer is drained until empty.
+"""
+import asyncio
+import time
+import warnings
+
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import FastAPI
+from orjson import dumps  # pylint: disable-msg=E0611
+from orjson import loads  # pylint: disable-msg=E0611
+
+from app.extensions import redis_client
+from app.services.votes import VoteRow
+from app.services.votes import get_vote_id
+from app.services.votes import store_votes
+from app.settings import VOTE_BUFFER_BATCH_SIZE
+from app.settings import VOTE_BUFFER_CLAIM_TTL
+from app.settings import VOTE_BUFFER_ENABLED
+from app.settings import VOTE_BUFFER_INTERVAL
+
+
+VOTE_BUFFER_KEY: str = "votes:buffer"
+# time of the oldest vote which is not taken by flush
+VOTE_BUFFER_SINCE_KEY: str = "votes:buffer:since"
+# challenge id -> vote end timestamp
+VOTE_BUFFER_DEADLINES_KEY: str = "votes:buffer:deadlines"
+# taken batches: batch key -> claim deadline timestamp
+VOTE_BUFFER_PROCESSING_KEY: str = "votes:buffer:processing"
+DRAIN_MAX_ROUNDS: int = 100
+# KEYS: buffer, since, processing; ARGV: batch key, claim deadline
+TAKE_BUFFER: str = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+redis.call("RENAME", KEYS[1], ARGV[1])
+redis.call("DEL", KEYS[2])
+redis.call("ZADD", KEYS[3], ARGV[2], ARGV[1])
+return 1
+"""
+# KEYS: processing; ARGV: max deadline timestamp, new claim deadline
+CLAIM_BATCHES: str = """
+local batches = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1])
+for _, batch in ipairs(batches) do
+    redis.call("ZADD", KEYS[1], ARGV[2], batch)
+end
+return batches
+"""
+
+
+async def buffer_vote(
+        challenge_id: Any, submission_id: Any, user_id: Any, vote_end: datetime,
+) -> Dict[str, Any]:
+    """
+    Save vote to buffer by one redis transaction.
+    :param challenge_id: challenge id
+    :param submission_id: submission id
+    :param user_id: user's id
+    :param vote_end: challenge vote end, buffer is drained after it
+    :return: acknowledged vote: id, created_at, updated_at
+    """
+    now_time: datetime = datetime.utcnow()
+    # naive datetimes of models are UTC
+    vote_end_timestamp: float = vote_end.replace(tzinfo=timezone.utc).timestamp()
+    transaction = redis_client.multi_exec()
+    transaction.hset(
+        VOTE_BUFFER_KEY,
+        f"{challenge_id}:{user_id}",
+        dumps([str(submission_id), now_time.isoformat()]),
+    )
+    transaction.set(
+        VOTE_BUFFER_SINCE_KEY, time.time(), exist=redis_client.SET_IF_NOT_EXIST,
+    )
+    transaction.zadd(VOTE_BUFFER_DEADLINES_KEY, vote_end_timestamp, str(challenge_id))
+    await transaction.execute()
+
+    return {
+        "id": get_vote_id(challenge_id, user_id),
+        "created_at": now_time,
+        "updated_at": now_time,
+    }
+
+
+def parse_buffer(buffer: Dict[str, bytes]) -> List[VoteRow]:
+    """
+    Convert buffer entries to votes rows.
+    :param buffer: buffer hash
+    :return: votes rows
+    """
+    votes: List[VoteRow] = []
+
+    for field, value in buffer.items():
+        challenge_id, user_id = field.split(":")
+        submission_id, vote_time = loads(value)
+        votes.append(
+            (challenge_id, submission_id, user_id, datetime.fromisoformat(vote_time))
+        )
+
+    return votes
+
+
+async def restore_buffer(buffer: Dict[str, bytes]) -> None:
+    """
+    Return not stored entries to buffer, newer votes are kept.
+    :param buffer: buffer hash
+    """
+    transaction = redis_client.multi_exec()
+
+    for field, value in buffer.items():
+        transaction.hsetnx(VOTE_BUFFER_KEY, field, value)
+
+    transaction.set(
+        VOTE_BUFFER_SINCE_KEY, time.time(), exist=redis_client.SET_IF_NOT_EXIST,
+    )
+    await transaction.execute()
+
+
+async def flush_votes() -> int:
+    """
+    Store buffered votes to database.
+    :return: stored votes count
+    """
+    batch_key: str = f"{VOTE_BUFFER_KEY}:{uuid4()}"
+    taken: int = await redis_client.eval(
+        TAKE_BUFFER,
+        keys=[VOTE_BUFFER_KEY, VOTE_BUFFER_SINCE_KEY, VOTE_BUFFER_PROCESSING_KEY],
+        args=[batch_key, time.time() + VOTE_BUFFER_CLAIM_TTL],
+    )
+
+    # buffer is empty
+    if not taken:
+        return 0
+
+    return await store_batch(batch_key)
+
+
+async def store_batch(batch_key: str) -> int:
+    """
+    Store votes of taken batch, batch is dropped after it is stored
+    or its votes are returned to buffer.
+    :param batch_key: redis key of batch hash
+    :return: stored votes count
+    """
+    raw_buffer: Dict[bytes, bytes] = await redis_client.hgetall(batch_key)
+    buffer: Dict[str, bytes] = {
+        field.decode("utf-8"): value for field, value in raw_buffer.items()
+    }
+    votes: List[VoteRow] = parse_buffer(buffer)
+
+    try:
+        for index in range(0, len(votes), VOTE_BUFFER_BATCH_SIZE):
+            await store_votes(votes[index:index + VOTE_BUFFER_BATCH_SIZE])
+    except Exception:
+        # chunks are upserts, repeated storing of stored ones changes nothing
+        await restore_buffer(buffer)
+        raise
+    finally:
+        transaction = redis_client.multi_exec()
+        transaction.delete(batch_key)
+        transaction.zrem(VOTE_BUFFER_PROCESSING_KEY, batch_key)
+        await transaction.execute()
+
+    return len(votes)
+
+
+async def claim_batches(max_deadline: float) -> List[str]:
+    """
+    Claim again batches which claim deadline is not later than `max_deadline`.
+    :param max_deadline: max claim deadline timestamp
+    :return: batch keys
+    """
+    batches: List[bytes] = await redis_client.eval(
+        CLAIM_BATCHES,
+        keys=[VOTE_BUFFER_PROCESSING_KEY],
+        args=[max_deadline, time.time() + VOTE_BUFFER_CLAIM_TTL],
+    )
+
+    return [batch.decode("utf-8") for batch in batches]
+
+
+async def flush_batches(max_deadline: float) -> int:
+    """
+    Store batches taken by flushes which claim deadline is not later than
+    `max_deadline`: expired ones of flushes which did not finish in
+    `VOTE_BUFFER_CLAIM_TTL`, e.g. process died between taking buffer and storing it,
+    or all taken ones with infinite deadline.
+    :param max_deadline: max claim deadline timestamp
+    :return: stored votes count
+    """
+    stored: int = 0
+
+    for batch_key in await claim_batches(max_deadline):
+        stored += await store_batch(batch_key)
+
+    return stored
+
+
+async def drain_votes() -> int:
+    """
+    Flush buffer until it is empty, votes acknowledged during flush are included,
+    then store batches being stored by other flushes, so every acknowledged
+    vote is in database when drain returns.
+    :return: stored votes count
+    """
+    stored: int = 0
+
+    for _ in range(DRAIN_MAX_ROUNDS):
+        flushed: int = await flush_votes()
+        stored += flushed
+
+        if not flushed:
+            break
+
+    # repeated storing of a batch stored concurrently changes nothing
+    stored += await flush_batches(float("inf"))
+
+    return stored
+
+
+async def flush_tick() -> int:
+    """
+    Store expired batches and flush buffer,
+    drain it if vote end of some buffered challenge has passed.
+    :return: stored votes count
+    """
+    now_timestamp: float = time.time()
+    stored: int = await flush_batches(now_timestamp)
+    ended: List[bytes] = await redis_client.zrangebyscore(
+        VOTE_BUFFER_DEADLINES_KEY, max=now_timestamp,
+    )
+
+    if not ended:
+        return stored + await flush_votes()
+
+    stored += await drain_votes()
+    await redis_client.zremrangebyscore(VOTE_BUFFER_DEADLINES_KEY, max=now_timestamp)
+
+    return stored
+
+
+async def get_buffer_stats() -> Dict[str, Any]:
+    """
+    Buffer metrics: pending votes and flush lag,
+    lag is age of the oldest vote which is not taken by flush.
+    :return: stats: enabled, pending, lag_ms
+    """
+    transaction = redis_client.multi_exec()
+    pending_future = transaction.hlen(VOTE_BUFFER_KEY)
+    since_future = transaction.get(VOTE_BUFFER_SINCE_KEY)
+    await transaction.execute()
+    since: Optional[bytes] = await since_future
+    lag_ms: int = 0
+
+    if since is not None:
+        lag_ms = max(int((time.time() - float(since)) * 1000), 0)
+
+    return {
+        "enabled": VOTE_BUFFER_ENABLED,
+        "pending": await pending_future,
+        "lag_ms": lag_ms,
+    }
+
+
+async def run_flush_loop(interval: float) -> None:
+    """
+    Flush buffer every interval, flush errors do not stop the loop.
+    :param interval: seconds between flushes
+    """
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            await flush_tick()
+        except Exception as error:  # pylint: disable=broad-except
+            warnings.warn(f"Votes buffer flush error: {error}")
+
+
+def register_vote_buffer(app: FastAPI) -> None:
+    """Run buffer flush loop while app works if buffer is enabled."""
+    if not VOTE_BUFFER_ENABLED:
+        return
+
+    flush_task: Dict[str, asyncio.Task] = {}  # type: ignore
+
+    @app.on_event("startup")
+    async def startup() -> None:  # pylint: disable=unused-variable
+        """On startup run flush loop"""
+        flush_task["task"] = asyncio.create_task(
+            run_flush_loop(VOTE_BUFFER_INTERVAL / 1000)
+        )
+
+    @app.on_event("shutdown")
+    async def shutdown() -> None:  # pylint: disable=unused-variable
+        """On shutdown stop flush loop, not flushed votes stay in redis"""
+        flush_task["task"].cancel()
@@ -0,0 +1,207 @@
+"""Vote services"""
+from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+from uuid import UUID
+from uuid import uuid5
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
+
+from app.models.db.submission import Submission
+from app.models.db.vote import Vote
+from app.services.leaderboard import change_leaderboard
+from app.services.tallies import publish_tallies
+from app.utils.db import execute_sql
+
+
+VOTE_ID_NAMESPACE: UUID = UUID("5b3e6a8e-3f0c-4d55-9a8e-2c1f7d0e9b41")
+
+# On conflict existing row values are available by table name,
+# so previous submission is saved before it is replaced.
+# Older vote does not replace newer one(buffered votes may be flushed
+# out of order), skipped rows are not returned.
+VOTE_UPSERT: str = (
+    'INSERT INTO "vote" '
+    '("id", "created_at", "updated_at", "challenge_id", "submission_id", "user_id") '
+    "VALUES {values} "
+    'ON CONFLICT ("challenge_id", "user_id") DO UPDATE SET '
+    '"previous_submission_id" = "vote"."submission_id", '
+    '"submission_id" = EXCLUDED."submission_id", '
+    '"updated_at" = EXCLUDED."updated_at" '
+    'WHERE "vote"."updated_at" < EXCLUDED."updated_at" '
+    'RETURNING "id", "created_at", "updated_at", "challenge_id", '
+    '"submission_id", "previous_submission_id"'
+)
+
+VOTE_FIELDS: Tuple[str, ...] = (
+    "id", "created_at", "updated_at", "challenge_id",
+    "submission_id", "previous_submission_id",
+)
+
+# challenge id, submission id, user id, vote time
+VoteRow = Tuple[Any, Any, Any, datetime]
+
+
+def get_vote_id(challenge_id: Any, user_id: Any) -> UUID:
+    """
+    Vote id is derived from its unique key, so it is known before vote is stored.
+    :param challenge_id: challenge id
+    :param user_id: user's id
+    :return: vote id
+    """
+    return uuid5(VOTE_ID_NAMESPACE, f"{challenge_id}:{user_id}")
+
+
+async def upsert_votes(
+        votes: Sequence[VoteRow], connection: BaseDBAsyncClient,
+) -> List[Dict[str, Any]]:
+    """
+    Create or move votes by single upsert statement,
+    every (challenge, user) pair has to be passed once.
+    :param votes: votes rows
+    :param connection: db client of current transaction
+    :return: upserted votes rows, votes older than stored ones are skipped
+    """
+    values: List[str] = []
+    params: List[Any] = []
+
+    for challenge_id, submission_id, user_id, vote_time in votes:
+        offset: int = len(params)
+        # created_at and updated_at share vote time placeholder
+        values.append(
+            f"(${offset + 1}, ${offset + 2}, ${offset + 2}, "
+            f"${offset + 3}, ${offset + 4}, ${offset + 5})"
+        )
+        params.extend((
+            get_vote_id(challenge_id, user_id),
+            vote_time,
+            challenge_id,
+            submission_id,
+            user_id,
+        ))
+
+    rows: List[Dict[str, Any]] = await execute_sql(
+        VOTE_UPSERT.format(values=", ".join(values)), *params, connection=connection,
+    )
+
+    return rows
+
+
+async def change_vote_count(
+        submission_id: Any, delta: int, connection: BaseDBAsyncClient,
+) -> None:
+    """
+    Change submission votes counter by delta in database.
+    :param submission_id: submission id
+    :param delta: counter change
+    :param connection: db client of current transaction
+    """
+    await Submission.filter(id=submission_id).using_db(connection).update(
+        vote_count=F("vote_count") + delta
+    )
+
+
+def get_vote_changes(vote: Dict[str, Any]) -> Dict[Any, int]:
+    """
+    Votes counters changes made by upsert.
+    :param vote: upserted vote row
+    :return: votes count delta by submission id
+    """
+    submission_id: Any = vote["submission_id"]
+    previous_submission_id: Any = vote["previous_submission_id"]
+
+    if previous_submission_id is None:
+        return {submission_id: 1}
+
+    if str(previous_submission_id) != str(submission_id):
+        return {previous_submission_id: -1, submission_id: 1}
+
+    return {}
+
+
+async def apply_vote_changes(
+        votes: Sequence[Dict[str, Any]], connection: BaseDBAsyncClient,
+) -> Dict[Any, Dict[Any, int]]:
+    """
+    Change submissions votes counters by upserted votes,
+    one update per changed submission.
+    :param votes: upserted votes rows
+    :param connection: db client of current transaction
+    :return: votes count delta by submission id by challenge id
+    """
+    changes: Dict[Any, Dict[Any, int]] = {}
+
+    for vote in votes:
+        challenge_changes: Dict[Any, int] = changes.setdefault(
+            str(vote["challenge_id"]), {},
+        )
+
+        for submission_id, delta in get_vote_changes(vote).items():
+            submission_id = str(submission_id)
+            challenge_changes[submission_id] = (
+                challenge_changes.get(submission_id, 0) + delta
+            )
+
+    for challenge_changes in changes.values():
+        for submission_id, delta in challenge_changes.items():
+            if delta:
+                await change_vote_count(submission_id, delta, connection)
+
+    return changes
+
+
+async def store_votes(votes: Sequence[VoteRow]) -> List[Dict[str, Any]]:
+    """
+    Upsert votes and change votes counters in one transaction,
+    leaderboards are changed and tallies streams are notified after commit.
+    :param votes: votes rows
+    :return: upserted votes rows
+    """
+    async with in_transaction() as connection:
+        rows: List[Dict[str, Any]] = await upsert_votes(votes, connection)
+        changes: Dict[Any, Dict[Any, int]] = await apply_vote_changes(rows, connection)
+
+    for challenge_id, challenge_changes in changes.items():
+        challenge_changes = {
+            submission_id: delta
+            for submission_id, delta in challenge_changes.items()
+            if delta
+        }
+
+        if challenge_changes:
+            await change_leaderboard(challenge_id, challenge_changes)
+            await publish_tallies(challenge_id, challenge_changes)
+
+    return rows
+
+
+async def cast_vote(challenge_id: Any, submission_id: Any, user_id: Any) -> Dict[str, Any]:
+    """
+    Create user's vote for a submission or move existing vote of the challenge
+    by single upsert, unique (challenge_id, user_id) makes double votes impossible.
+    Votes counters of submissions are changed in the same transaction,
+    leaderboard is changed after commit.
+    :param challenge_id: challenge id
+    :param submission_id: submission id
+    :param user_id: user's id
+    :return: vote row: id, created_at, updated_at, challenge_id,
+        submission_id, previous_submission_id
+    """
+    rows: List[Dict[str, Any]] = await store_votes(
+        [(challenge_id, submission_id, user_id, datetime.utcnow())]
+    )
+
+    if rows:
+        return rows[0]
+
+    # newer vote is stored already
+    votes: List[Dict[str, Any]] = await Vote.filter(
+        challenge_id=challenge_id, user_id=user_id,
+    ).values(*VOTE_FIELDS)
+
+    return votes[0]
@@ -63,6 +63,7 @@ REDIS_PASSWORD: str = config("REDIS_PASSWORD", cast=str, default="")
 # Auth section
 JWT_SECRET: str = config("JWT_SECRET", cast=str, default="dev")
 ITEM_SECRET: str = config("ITEM_SECRET", cast=str, default="dev")
+SECRET_KEY_CACHE_SIZE: int = config("SECRET_KEY_CACHE_SIZE", cast=int, default=4096)
 JWT_ALGORITHM: str = config("JWT_ALGORITHM", cast=str, default="HS256")
 ACCESS_TOKEN_LIFETIME: int = config(
     "ACCESS_TOKEN_LIFETIME", cast=int, default=7 * 24 * 60 * 60
@@ -74,3 +75,39 @@ REFRESH_TOKEN_LIFETIME: int = config(
 # Pagination section
 PAGE_LIMIT = config("PAGE_LIMIT", cast=int, default=10)
 PAGE_MAX_LIMIT = config("PAGE_MAX_LIMIT", cast=int, default=20)
+COUNT_CACHE_TTL: int = config("COUNT_CACHE_TTL", cast=int, default=60)
+COUNT_ESTIMATE_THRESHOLD: int = config("COUNT_ESTIMATE_THRESHOLD", cast=int, default=1000)
+# changes feed returns changes older than lag seconds
+CHANGES_SYNC_LAG: int = config("CHANGES_SYNC_LAG", cast=int, default=5)
+
+# Responses section
+DB_JSON_RESPONSES: bool = config("DB_JSON_RESPONSES", cast=bool, default=False)
+RESPONSE_CACHE_TTL: int = config("RESPONSE_CACHE_TTL", cast=int, default=60)
+LOCAL_CACHE_TTL: float = config("LOCAL_CACHE_TTL", cast=float, default=1.0)
+LOCAL_CACHE_SIZE: int = config("LOCAL_CACHE_SIZE", cast=int, default=1024)
+SINGLE_FLIGHT_LEASE_ENABLED: bool = config(
+    "SINGLE_FLIGHT_LEASE_ENABLED", cast=bool, default=False
+)
+SINGLE_FLIGHT_LEASE_TTL: int = config("SINGLE_FLIGHT_LEASE_TTL", cast=int, default=5000)
+SINGLE_FLIGHT_LEASE_POLL: int = config("SINGLE_FLIGHT_LEASE_POLL", cast=int, default=50)
+
+# Votes section
+VOTE_BUFFER_ENABLED: bool = config("VOTE_BUFFER_ENABLED", cast=bool, default=False)
+VOTE_BUFFER_INTERVAL: int = config("VOTE_BUFFER_INTERVAL", cast=int, default=200)
+VOTE_BUFFER_BATCH_SIZE: int = config("VOTE_BUFFER_BATCH_SIZE", cast=int, default=100)
+VOTE_BUFFER_CLAIM_TTL: int = config("VOTE_BUFFER_CLAIM_TTL", cast=int, default=60)
+TALLY_STREAM_INTERVAL: int = config("TALLY_STREAM_INTERVAL", cast=int, default=500)
+TALLY_STREAM_HEARTBEAT: int = config("TALLY_STREAM_HEARTBEAT", cast=int, default=15)
+TALLY_STREAM_QUEUE_SIZE: int = config("TALLY_STREAM_QUEUE_SIZE", cast=int, default=32)
+
+# Challenge lifecycle section
+LIFECYCLE_ENABLED: bool = config("LIFECYCLE_ENABLED", cast=bool, default=True)
+LIFECYCLE_INTERVAL: int = config("LIFECYCLE_INTERVAL", cast=int, default=1)
+LIFECYCLE_RETRY_DELAY: int = config("LIFECYCLE_RETRY_DELAY", cast=int, default=60)
+LIFECYCLE_CLAIM_TTL: int = config("LIFECYCLE_CLAIM_TTL", cast=int, default=300)
+CHALLENGE_HEADER_TTL: int = config("CHALLENGE_HEADER_TTL", cast=int, default=3600)
+MEMBERSHIPS_TTL: int = config("MEMBERSHIPS_TTL", cast=int, default=86400)
+
+# Tracks section
+TRACK_SUGGEST_LIMIT: int = config("TRACK_SUGGEST_LIMIT", cast=int, default=10)
+TRACK_SUGGEST_REFRESH: int = config("TRACK_SUGGEST_REFRESH", cast=int, default=60)
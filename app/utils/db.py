@@ -1,44 +1,401 @@
 """Base database utils"""
+import re
+
+from abc import ABC
+from abc import abstractmethod
 from asyncio import gather
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+from functools import partial
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 from typing import Type
+from uuid import UUID
 
 from fastapi import Query
+from orjson import JSONDecodeError  # pylint: disable-msg=E0611
+from orjson import dumps  # pylint: disable-msg=E0611
+from orjson import loads  # pylint: disable-msg=E0611
 from tortoise import QuerySet
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
 from tortoise.contrib.pydantic import PydanticListModel
 from tortoise.contrib.pydantic import PydanticModel
 from tortoise.models import MODEL
+from tortoise.query_utils import Q
 
+from app.extensions import redis_client
+from app.settings import COUNT_CACHE_TTL
+from app.settings import COUNT_ESTIMATE_THRESHOLD
 from app.settings import PAGE_LIMIT
 from app.settings import PAGE_MAX_LIMIT
+from app.utils.exceptions import BadRequestError
+from app.utils.single_flight import SingleFlight
+
+
+PLACEHOLDER_REGEX = re.compile(r"\$(\d+)")
+
+ItemsFetcher = Callable[[QuerySet[Any]], Awaitable[List[Any]]]
+JSONFetcher = Callable[[QuerySet[Any]], Awaitable[str]]
+
+
+def to_sqlite_value(value: Any) -> Any:
+    """
+    Convert query param to sqlite storage format.
+    :param value: query param
+    :return: sqlite value
+    """
+    if isinstance(value, UUID):
+        return str(value)
+
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+
+    return value
+
+
+async def execute_sql(
+        query: str, *values: Any, connection: Optional[BaseDBAsyncClient] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Execute raw query written with postgres `$n` placeholders,
+    placeholders and UUID, datetime values are converted for sqlite like tortoise does.
+    :param query: SQL query
+    :param values: query params
+    :param connection: db client, pass transaction client inside `in_transaction`
+    :return: result rows
+    """
+    connection = connection or Tortoise.get_connection("default")
+    params: List[Any] = list(values)
+
+    if connection.capabilities.dialect == "sqlite":
+        params = [
+            to_sqlite_value(values[int(index) - 1])
+            for index in PLACEHOLDER_REGEX.findall(query)
+        ]
+        query = PLACEHOLDER_REGEX.sub("?", query)
+
+    rows: List[Dict[str, Any]] = await connection.execute_query_dict(query, params)
+
+    return rows
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    """
+    Encode keyset position to opaque cursor.
+    :param created_at: last item creation date
+    :param item_id: last item id
+    :return: cursor string
+    """
+    raw_cursor: bytes = dumps([created_at.isoformat(), str(item_id)])
+
+    return urlsafe_b64encode(raw_cursor).decode("utf-8")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decode opaque cursor to keyset position.
+    :param cursor: cursor string
+    :return: last item creation date and id
+    """
+    try:
+        created_at, item_id = loads(urlsafe_b64decode(cursor.encode("utf-8")))
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except (BinasciiError, JSONDecodeError, TypeError, ValueError) as error:
+        raise BadRequestError from error
+
+
+class Counter(ABC):  # pylint: disable=too-few-public-methods
+    """Base count strategy for pagination."""
+
+    @abstractmethod
+    async def count(self, queryset: QuerySet[MODEL]) -> Optional[int]:
+        """
+        Count queryset items
+        :param queryset: Tortoise queryset
+        :return: items count
+        """
+
+
+class ExactCounter(Counter):  # pylint: disable=too-few-public-methods
+    """Exact `COUNT(*)` on every call."""
+
+    async def count(self, queryset: QuerySet[MODEL]) -> Optional[int]:
+        count: int = await queryset.count()
+
+        return count
+
+
+class CachedCounter(Counter):
+    """
+    Exact count cached in redis.
+
+    Count is stored for `ttl` seconds, writers should call `invalidate`
+    after changes which affect counted queryset.
+    Concurrent misses of the process share one count query.
+    """
+
+    def __init__(self, key: str, ttl: int = COUNT_CACHE_TTL):
+        self.key: str = key
+        self.ttl: int = ttl
+        self.flights: SingleFlight = SingleFlight()
+
+    async def count(self, queryset: QuerySet[MODEL]) -> Optional[int]:
+        cached_count: Optional[bytes] = await redis_client.get(self.key)
+
+        if cached_count is not None:
+            return int(cached_count)
+
+        return await self.flights.run(self.key, lambda: self.fill(queryset))
+
+    async def fill(self, queryset: QuerySet[MODEL]) -> int:
+        """
+        Count queryset and cache count.
+        :param queryset: counted queryset
+        :return: count
+        """
+        count: int = await queryset.count()
+        await redis_client.set(key=self.key, value=count, expire=self.ttl)
+
+        return count
+
+    async def invalidate(self) -> None:
+        """Drop cached count."""
+        await redis_client.delete(self.key)
+
+
+class EstimatedCounter(Counter):  # pylint: disable=too-few-public-methods
+    """
+    Postgres planner estimate.
+
+    Exact count is used when estimate is less than `threshold`
+    or database is not postgres.
+    """
+
+    def __init__(self, threshold: int = COUNT_ESTIMATE_THRESHOLD):
+        self.threshold: int = threshold
+
+    async def count(self, queryset: QuerySet[MODEL]) -> Optional[int]:
+        dialect: str = Tortoise.get_connection("default").capabilities.dialect
+
+        if dialect == "postgres":
+            plan: List[Any] = await queryset.explain()
+            estimate: int = loads(plan[0]["QUERY PLAN"])[0]["Plan"]["Plan Rows"]
+
+            if estimate >= self.threshold:
+                return estimate
+
+        count: int = await queryset.count()
+
+        return count
 
 
 class Paginate:  # pylint: disable=too-few-public-methods
-    """Pagination dependency."""
+    """
+    Pagination dependency.
+
+    Works in offset mode by default, if `cursor` is passed (even empty)
+    keyset mode is used: items are ordered by (-created_at, -id),
+    count is not calculated and `next_cursor` is set for the next page.
+    Count is also skipped with `with_count=false`.
+    """
 
     def __init__(
             self,
             limit: int = Query(default=PAGE_LIMIT, le=PAGE_MAX_LIMIT),
             offset: int = Query(default=0, ge=0),
+            cursor: Optional[str] = Query(default=None),
+            with_count: bool = Query(default=True),
     ):
         self.limit: int = limit
         self.offset: int = offset
+        self.cursor: Optional[str] = cursor
+        self.with_count: bool = with_count
+        self.next_cursor: Optional[str] = None
 
     async def paginate(
-            self, queryset: QuerySet[MODEL], serializer: Type[PydanticListModel],
-    ) -> Tuple[int, List[PydanticModel]]:
+            self,
+            queryset: QuerySet[MODEL],
+            serializer: Type[PydanticListModel],
+            counter: Optional[Counter] = None,
+    ) -> Tuple[Optional[int], List[PydanticModel]]:
         """
         Paginate query
         :param queryset: Tortoise queryset
         :param serializer: Tortoise pydantic serializer
-        :param offset: offset
-        :param limit: limit
-        :return: query count, filter counts
+        :param counter: count strategy, exact count by default
+        :return: query count(None in keyset mode or without count), items
+        """
+        fetcher: ItemsFetcher = partial(self.fetch_items, serializer=serializer)
+
+        return await self.paginate_with(
+            queryset=queryset, fetcher=fetcher, counter=counter,
+        )
+
+    async def paginate_with(
+            self,
+            queryset: QuerySet[MODEL],
+            fetcher: ItemsFetcher,
+            counter: Optional[Counter] = None,
+    ) -> Tuple[Optional[int], List[Any]]:
+        """
+        Paginate query with custom items fetcher,
+        e.g. lean fetcher which returns response dicts instead of pydantic models.
+        :param queryset: Tortoise queryset
+        :param fetcher: coroutine function which fetches items of the page queryset
+        :param counter: count strategy, exact count by default
+        :return: query count(None in keyset mode or without count), items
         """
+        if self.cursor is not None:
+            items: List[Any] = await self.paginate_keyset(
+                queryset=queryset, fetcher=fetcher,
+            )
+
+            return None, items
+
         count, items = await gather(
-            queryset.count(),
-            serializer.from_queryset(queryset.limit(self.limit).offset(self.offset)),
+            self.count(queryset=queryset, counter=counter),
+            fetcher(self.page(queryset)),
         )
 
-        return count, items.__root__
+        return count, items
+
+    async def paginate_json(
+            self,
+            queryset: QuerySet[MODEL],
+            fetcher: JSONFetcher,
+            counter: Optional[Counter] = None,
+    ) -> bytes:
+        """
+        Paginate query with fetcher which returns items as JSON array
+        built by database, the page document is assembled without decoding items.
+        Pages of both modes are ordered by (-created_at, -id) as fetcher orders items.
+        In keyset mode positions query finds page ids and next cursor,
+        then fetcher builds items of these ids.
+        :param queryset: Tortoise queryset
+        :param fetcher: coroutine function which fetches JSON of the page queryset
+        :param counter: count strategy, exact count by default
+        :return: JSON document with count, items and next_cursor
+        """
+        count: Optional[int] = None
+
+        if self.cursor is not None:
+            positions: List[Dict[str, Any]] = await self.keyset(queryset).limit(
+                self.limit + 1
+            ).values("created_at", "id")
+            page_positions: List[Dict[str, Any]] = positions[:self.limit]
+            items: str = "[]"
+
+            # page is fetched by ids of positions, so cursor follows sent items
+            # whatever is inserted between queries
+            if page_positions:
+                items = await fetcher(queryset.filter(
+                    id__in=[position["id"] for position in page_positions]
+                ))
+
+            if len(positions) > self.limit:
+                self.next_cursor = encode_cursor(
+                    created_at=page_positions[-1]["created_at"],
+                    item_id=page_positions[-1]["id"],
+                )
+        else:
+            count, items = await gather(
+                self.count(queryset=queryset, counter=counter),
+                fetcher(self.page(queryset.order_by("-created_at", "-id"))),
+            )
+
+        return b"".join((
+            b'{"count":',
+            dumps(count),
+            b',"items":',
+            items.encode("utf-8"),
+            b',"next_cursor":',
+            dumps(self.next_cursor),
+            b"}",
+        ))
+
+    async def count(
+            self, queryset: QuerySet[MODEL], counter: Optional[Counter] = None,
+    ) -> Optional[int]:
+        """
+        Count query with counter, None if count is not requested.
+        :param queryset: Tortoise queryset
+        :param counter: count strategy, exact count by default
+        :return: query count
+        """
+        if not self.with_count:
+            return None
+
+        counter = counter or ExactCounter()
+
+        return await counter.count(queryset)
+
+    def page(self, queryset: QuerySet[MODEL]) -> QuerySet[MODEL]:
+        """
+        Offset page of query.
+        :param queryset: Tortoise queryset
+        :return: page queryset
+        """
+        return queryset.limit(self.limit).offset(self.offset)
+
+    def keyset(self, queryset: QuerySet[MODEL]) -> QuerySet[MODEL]:
+        """
+        Query after cursor position ordered by (-created_at, -id).
+        :param queryset: Tortoise queryset
+        :return: ordered queryset
+        """
+        if self.cursor:
+            created_at, item_id = decode_cursor(self.cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=item_id)
+            )
+
+        return queryset.order_by("-created_at", "-id")
+
+    async def paginate_keyset(
+            self, queryset: QuerySet[MODEL], fetcher: ItemsFetcher,
+    ) -> List[Any]:
+        """
+        Paginate query by cursor, one extra item is fetched to find out next page.
+        :param queryset: Tortoise queryset
+        :param fetcher: coroutine function which fetches items of the page queryset
+        :return: items
+        """
+        page: List[Any] = await fetcher(self.keyset(queryset).limit(self.limit + 1))
+        items: List[Any] = page[:self.limit]
+
+        if len(page) > self.limit:
+            last_item: Any = items[-1]
+
+            if isinstance(last_item, dict):
+                self.next_cursor = encode_cursor(
+                    created_at=last_item["created_at"], item_id=last_item["id"],
+                )
+            else:
+                self.next_cursor = encode_cursor(
+                    created_at=last_item.created_at, item_id=last_item.id,
+                )
+
+        return items
+
+    @staticmethod
+    async def fetch_items(
+            queryset: QuerySet[MODEL], serializer: Type[PydanticListModel],
+    ) -> List[PydanticModel]:
+        """
+        Fetch page and serialize items, serializer prefetches relations
+        of the whole page with one query per relation.
+        :param queryset: Tortoise queryset
+        :param serializer: Tortoise pydantic serializer
+        :return: items
+        """
+        page: PydanticListModel = await serializer.from_queryset(queryset)
+
+        return page.__root__
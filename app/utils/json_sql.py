@@ -0,0 +1,98 @@
+"""
+SQL builders for JSON documents built by database.
+
+Postgres uses `json_build_object`/`json_agg`, sqlite uses `json_object`/
+`json_group_array`, values are converted to match pydantic JSON output.
+"""
+from typing import Tuple
+
+
+class JSONBuilder:
+    """Dialect aware JSON expressions."""
+
+    def __init__(self, dialect: str):
+        self.dialect: str = dialect
+
+    @property
+    def is_postgres(self) -> bool:
+        """Is target database postgres."""
+        return self.dialect == "postgres"
+
+    def object(self, *pairs: Tuple[str, str]) -> str:
+        """
+        JSON object expression.
+        :param pairs: keys and SQL expressions of values
+        :return: SQL expression
+        """
+        function: str = "json_build_object" if self.is_postgres else "json_object"
+        arguments: str = ", ".join(f"'{key}', {value}" for key, value in pairs)
+
+        return f"{function}({arguments})"
+
+    def array(self, expression: str, source: str, order_by: str) -> str:
+        """
+        JSON array of expression values over rows, empty array when no rows.
+        :param expression: SQL expression of item
+        :param source: FROM clause(with joins and conditions)
+        :param order_by: items order
+        :return: SQL expression
+        """
+        if self.is_postgres:
+            return (
+                f"COALESCE((SELECT json_agg({expression} ORDER BY {order_by}) "
+                f"FROM {source}), '[]'::json)"
+            )
+
+        # json subtype is lost between subqueries, values are quoted and parsed back
+        return (
+            f'json((SELECT json_group_array(json("value")) FROM '
+            f'(SELECT json_quote({expression}) AS "value" FROM {source} '
+            f"ORDER BY {order_by})))"
+        )
+
+    def datetime(self, column: str) -> str:
+        """
+        Datetime in ISO 8601 format.
+        :param column: datetime column
+        :return: SQL expression
+        """
+        if self.is_postgres:
+            return column
+
+        return f"replace({column}, ' ', 'T')"
+
+    def boolean(self, column: str) -> str:
+        """
+        Nullable boolean.
+        :param column: boolean column
+        :return: SQL expression
+        """
+        if self.is_postgres:
+            return column
+
+        return (
+            f"json(CASE WHEN {column} IS NULL THEN 'null' "
+            f"WHEN {column} THEN 'true' ELSE 'false' END)"
+        )
+
+    def json(self, column: str) -> str:
+        """
+        JSON column.
+        :param column: JSON column
+        :return: SQL expression
+        """
+        if self.is_postgres:
+            return column
+
+        return f"json({column})"
+
+    def text(self, expression: str) -> str:
+        """
+        JSON document as text, drivers return it as is without decoding.
+        :param expression: JSON expression
+        :return: SQL expression
+        """
+        if self.is_postgres:
+            return f"({expression})::text"
+
+        return expression
@@ -0,0 +1,517 @@
+"""
+Versioned schema changes.
+
+`generate_schemas` creates missing tables only, everything else
+(indexes, constraints, columns of existing tables) lives here.
+Statements must be idempotent, applied versions are stored in `schemaversion`.
+Sqlite databases(tests) are always created by `generate_schemas`,
+so columns are added for postgres only.
+"""
+import re
+
+from typing import List
+from typing import Match
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from fastapi import FastAPI
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.utils.db import execute_sql
+
+
+# advisory lock key of migrations, any number shared by all app workers
+MIGRATIONS_LOCK: int = 7_140_512
+CONCURRENT_INDEX_REGEX = re.compile(r'INDEX CONCURRENTLY IF NOT EXISTS "([^"]+)"')
+# interrupted concurrent build leaves invalid index, which is never used by planner
+INVALID_INDEX: str = (
+    'SELECT 1 FROM "pg_index" JOIN "pg_class" '
+    'ON "pg_class"."oid" = "pg_index"."indexrelid" '
+    'WHERE "pg_class"."relname" = $1 AND NOT "pg_index"."indisvalid"'
+)
+
+
+class Migration(NamedTuple):
+    """Schema change with statements for each supported dialect."""
+
+    version: int
+    description: str
+    postgres: Tuple[str, ...]
+    sqlite: Tuple[str, ...]
+
+
+def create_index(
+        name: str,
+        table: str,
+        columns: str,
+        *,
+        where: str = "",
+        concurrently: bool = False,
+        unique: bool = False,
+        method: str = "",
+) -> str:
+    """
+    Create index statement.
+    :param name: index name
+    :param table: table name
+    :param columns: columns expression
+    :param where: partial index condition
+    :param concurrently: build index without table write lock (postgres only)
+    :param unique: create unique index
+    :param method: index access method, e.g. GIN (postgres only)
+    :return: SQL statement
+    """
+    statement: str = (
+        f'CREATE {"UNIQUE " if unique else ""}INDEX '
+        f'{"CONCURRENTLY " if concurrently else ""}IF NOT EXISTS '
+        f'"{name}" ON "{table}" {f"USING {method} " if method else ""}({columns})'
+    )
+
+    if where:
+        statement = f"{statement} WHERE {where}"
+
+    return statement
+
+
+def concurrent_index_name(statement: str) -> Optional[str]:
+    """
+    Name of index built by `CREATE INDEX CONCURRENTLY` statement.
+    :param statement: SQL statement
+    :return: index name or None for other statements
+    """
+    match: Optional[Match[str]] = CONCURRENT_INDEX_REGEX.search(statement)
+
+    return match.group(1) if match else None
+
+
+async def drop_invalid_index(connection: BaseDBAsyncClient, name: str) -> bool:
+    """
+    Drop index left invalid by failed concurrent build,
+    so `IF NOT EXISTS` does not skip its rebuild.
+    :param connection: tortoise connection
+    :param name: index name
+    :return: true if index was dropped
+    """
+    if not await execute_sql(INVALID_INDEX, name, connection=connection):
+        return False
+
+    await connection.execute_script(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+    return True
+
+
+def hot_path_indexes(is_postgres: bool) -> Tuple[str, ...]:
+    """
+    Indexes for every list and lookup query in `app.routes`,
+    ordered columns match `BaseModel.Meta.ordering` and keyset pagination.
+    :param is_postgres: is target database postgres
+    :return: SQL statements
+    """
+    true_value: str = "true" if is_postgres else "1"
+    indexes: List[Tuple[str, str, str, str]] = [
+        (
+            "idx_challenge_public_created",
+            "challenge",
+            '"created_at" DESC, "id" DESC',
+            f'"is_public" = {true_value}',
+        ),
+        (
+            "idx_challenge_owner_created",
+            "challenge",
+            '"owner_id", "created_at" DESC, "id" DESC',
+            "",
+        ),
+        (
+            "idx_participants_user",
+            "challenges_participants",
+            '"user_id", "challenge_id"',
+            "",
+        ),
+        (
+            "idx_participants_challenge",
+            "challenges_participants",
+            '"challenge_id", "user_id"',
+            "",
+        ),
+        (
+            "idx_submission_challenge_created",
+            "submission",
+            '"challenge_id", "created_at" DESC, "id" DESC',
+            "",
+        ),
+        ("idx_vote_submission", "vote", '"submission_id"', ""),
+        ("idx_vote_user_submission", "vote", '"user_id", "submission_id"', ""),
+        ("idx_authaccount_external_id", "authaccount", '"_id"', ""),
+        (
+            "idx_authaccount_user_created",
+            "authaccount",
+            '"user_id", "created_at" DESC',
+            "",
+        ),
+        (
+            "idx_track_recommended_preview",
+            "track",
+            '"created_at" DESC',
+            f'"recommended" = {true_value} AND NOT "preview_url" IS NULL',
+        ),
+    ]
+
+    return tuple(
+        create_index(
+            name=name,
+            table=table,
+            columns=columns,
+            where=where,
+            concurrently=is_postgres,
+        )
+        for name, table, columns, where in indexes
+    )
+
+
+def user_profile_backfill(is_postgres: bool) -> str:
+    """
+    Copy public profile fields from the last auth account of every user,
+    see `User.update_profile`.
+    :param is_postgres: is target database postgres
+    :return: SQL statement
+    """
+    accounts: str = '"authaccount" WHERE "authaccount"."user_id" = "user"."id"'
+    providers: str = (
+        f'(SELECT jsonb_agg("provider" ORDER BY "created_at") FROM {accounts})'
+        if is_postgres else
+        f'(SELECT json_group_array("provider") FROM '
+        f'(SELECT "provider" FROM {accounts} ORDER BY "created_at"))'
+    )
+    empty_array: str = "'[]'::jsonb" if is_postgres else "'[]'"
+
+    def last_account(field: str) -> str:
+        return (
+            f'(SELECT "{field}" FROM {accounts} ORDER BY "created_at" DESC LIMIT 1)'
+        )
+
+    return (
+        f'UPDATE "user" SET "name" = {last_account("name")}, '
+        f'"image" = {last_account("image")}, "url" = {last_account("url")}, '
+        f'"providers" = COALESCE({providers}, {empty_array})'
+    )
+
+
+SUBMISSION_VOTE_COUNT_BACKFILL: str = (
+    'UPDATE "submission" SET "vote_count" = '
+    '(SELECT COUNT(*) FROM "vote" WHERE "vote"."submission_id" = "submission"."id")'
+)
+
+VOTE_CHALLENGE_POSTGRES: Tuple[str, ...] = (
+    'ALTER TABLE "vote" ADD COLUMN IF NOT EXISTS "challenge_id" UUID '
+    'REFERENCES "challenge" ("id") ON DELETE CASCADE',
+    'ALTER TABLE "vote" ADD COLUMN IF NOT EXISTS "previous_submission_id" UUID',
+    'UPDATE "vote" SET "challenge_id" = (SELECT "challenge_id" FROM "submission" '
+    'WHERE "submission"."id" = "vote"."submission_id") WHERE "challenge_id" IS NULL',
+    # the latest vote of a user in a challenge is kept
+    'DELETE FROM "vote" WHERE "id" IN (SELECT "id" FROM (SELECT "id", row_number() '
+    'OVER (PARTITION BY "challenge_id", "user_id" ORDER BY "updated_at" DESC) '
+    'AS "position" FROM "vote") AS "votes" WHERE "position" > 1)',
+    'ALTER TABLE "vote" ALTER COLUMN "challenge_id" SET NOT NULL',
+    create_index(
+        name="uid_vote_challenge_user",
+        table="vote",
+        columns='"challenge_id", "user_id"',
+        concurrently=True,
+        unique=True,
+    ),
+    SUBMISSION_VOTE_COUNT_BACKFILL,
+)
+
+PARTICIPANTS_COUNT_BACKFILL: str = (
+    'UPDATE "challenge" SET "participants_count" = (SELECT COUNT(*) '
+    'FROM "challenges_participants" WHERE "challenge_id" = "challenge"."id")'
+)
+
+
+def participants_unique(is_postgres: bool) -> Tuple[str, ...]:
+    """
+    Drop repeated participants and make (challenge_id, user_id) unique,
+    join upsert relies on it.
+    :param is_postgres: is target database postgres
+    :return: SQL statements
+    """
+    deduplicate: str = (
+        'DELETE FROM "challenges_participants" AS "repeated" '
+        'USING "challenges_participants" AS "kept" '
+        'WHERE "repeated"."ctid" > "kept"."ctid" '
+        'AND "repeated"."challenge_id" = "kept"."challenge_id" '
+        'AND "repeated"."user_id" = "kept"."user_id"'
+        if is_postgres else
+        'DELETE FROM "challenges_participants" WHERE "rowid" NOT IN '
+        '(SELECT MIN("rowid") FROM "challenges_participants" '
+        'GROUP BY "challenge_id", "user_id")'
+    )
+
+    return (
+        deduplicate,
+        create_index(
+            name="uid_participants_challenge_user",
+            table="challenges_participants",
+            columns='"challenge_id", "user_id"',
+            concurrently=is_postgres,
+            unique=True,
+        ),
+    )
+
+
+# the most voted submission of user in a challenge is kept, votes are moved to it
+SUBMISSION_CHALLENGE_USER_POSTGRES: Tuple[str, ...] = (
+    'WITH "ranked" AS (SELECT "id", first_value("id") OVER (PARTITION BY '
+    '"challenge_id", "user_id" ORDER BY "vote_count" DESC, "created_at") AS "kept_id" '
+    'FROM "submission") UPDATE "vote" SET "submission_id" = "ranked"."kept_id" '
+    'FROM "ranked" WHERE "vote"."submission_id" = "ranked"."id" '
+    'AND "ranked"."id" <> "ranked"."kept_id"',
+    'DELETE FROM "submission" WHERE "id" IN (SELECT "id" FROM (SELECT "id", '
+    'row_number() OVER (PARTITION BY "challenge_id", "user_id" '
+    'ORDER BY "vote_count" DESC, "created_at") AS "position" FROM "submission") '
+    'AS "ranked" WHERE "position" > 1)',
+    create_index(
+        name="uid_submission_challenge_user",
+        table="submission",
+        columns='"challenge_id", "user_id"',
+        concurrently=True,
+        unique=True,
+    ),
+    SUBMISSION_VOTE_COUNT_BACKFILL,
+)
+
+
+def submission_votes_index(is_postgres: bool) -> str:
+    """
+    Covering index of challenge stats: submissions count and votes sum
+    are read from index only.
+    :param is_postgres: is target database postgres
+    :return: SQL statement
+    """
+    return create_index(
+        name="idx_submission_challenge_votes",
+        table="submission",
+        columns='"challenge_id", "vote_count"',
+        concurrently=is_postgres,
+    )
+
+
+# expressions have to be the same as in `app.services.search` queries
+SEARCH_POSTGRES: Tuple[str, ...] = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    create_index(
+        name="idx_challenge_name_fts",
+        table="challenge",
+        columns="to_tsvector('simple', coalesce(\"name\", ''))",
+        where='"is_public" = true',
+        concurrently=True,
+        method="GIN",
+    ),
+    create_index(
+        name="idx_challenge_name_trgm",
+        table="challenge",
+        columns='"name" gin_trgm_ops',
+        where='"is_public" = true',
+        concurrently=True,
+        method="GIN",
+    ),
+    create_index(
+        name="idx_track_fts",
+        table="track",
+        columns=(
+            "to_tsvector('simple', coalesce(\"name\", '') || ' ' "
+            "|| coalesce(\"author_name\", ''))"
+        ),
+        concurrently=True,
+        method="GIN",
+    ),
+    create_index(
+        name="idx_track_name_trgm",
+        table="track",
+        columns='"name" gin_trgm_ops',
+        concurrently=True,
+        method="GIN",
+    ),
+    create_index(
+        name="idx_track_author_name_trgm",
+        table="track",
+        columns='"author_name" gin_trgm_ops',
+        concurrently=True,
+        method="GIN",
+    ),
+)
+
+
+def changes_indexes(is_postgres: bool) -> Tuple[str, ...]:
+    """
+    Indexes of challenges delta sync: changed public challenges and tombstones
+    are read in (time, id) order after cursor.
+    :param is_postgres: is target database postgres
+    :return: SQL statements
+    """
+    return (
+        create_index(
+            name="idx_challenge_public_updated",
+            table="challenge",
+            columns='"updated_at", "id"',
+            where=f'"is_public" = {"true" if is_postgres else "1"}',
+            concurrently=is_postgres,
+        ),
+        create_index(
+            name="idx_challengetombstone_created",
+            table="challengetombstone",
+            columns='"created_at", "id"',
+            concurrently=is_postgres,
+        ),
+    )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Indexes for hot query paths",
+        postgres=hot_path_indexes(is_postgres=True),
+        sqlite=hot_path_indexes(is_postgres=False),
+    ),
+    Migration(
+        version=2,
+        description="Denormalized user profile fields",
+        postgres=(
+            'ALTER TABLE "user" ADD COLUMN IF NOT EXISTS "name" VARCHAR(255)',
+            'ALTER TABLE "user" ADD COLUMN IF NOT EXISTS "image" VARCHAR(2048)',
+            'ALTER TABLE "user" ADD COLUMN IF NOT EXISTS "url" VARCHAR(2048)',
+            'ALTER TABLE "user" ADD COLUMN IF NOT EXISTS "providers" JSONB NOT NULL '
+            "DEFAULT '[]'::jsonb",
+            user_profile_backfill(is_postgres=True),
+        ),
+        sqlite=(user_profile_backfill(is_postgres=False),),
+    ),
+    Migration(
+        version=3,
+        description="Denormalized submission votes counter",
+        postgres=(
+            'ALTER TABLE "submission" ADD COLUMN IF NOT EXISTS "vote_count" INT '
+            "NOT NULL DEFAULT 0",
+            SUBMISSION_VOTE_COUNT_BACKFILL,
+        ),
+        sqlite=(SUBMISSION_VOTE_COUNT_BACKFILL,),
+    ),
+    Migration(
+        version=4,
+        description="Vote challenge and one vote per user in challenge",
+        postgres=VOTE_CHALLENGE_POSTGRES,
+        sqlite=(),
+    ),
+    Migration(
+        version=5,
+        description="Unique challenge participants and participants counter",
+        postgres=(
+            'ALTER TABLE "challenge" ADD COLUMN IF NOT EXISTS '
+            '"participants_count" INT NOT NULL DEFAULT 0',
+            *participants_unique(is_postgres=True),
+            PARTICIPANTS_COUNT_BACKFILL,
+        ),
+        sqlite=(*participants_unique(is_postgres=False), PARTICIPANTS_COUNT_BACKFILL),
+    ),
+    Migration(
+        version=6,
+        description="One submission per user in challenge",
+        postgres=SUBMISSION_CHALLENGE_USER_POSTGRES,
+        sqlite=(),
+    ),
+    Migration(
+        version=7,
+        description="Covering index of challenge stats",
+        postgres=(submission_votes_index(is_postgres=True),),
+        sqlite=(submission_votes_index(is_postgres=False),),
+    ),
+    Migration(
+        version=8,
+        description="Full-text and trigram search indexes",
+        postgres=SEARCH_POSTGRES,
+        sqlite=(),
+    ),
+    Migration(
+        version=9,
+        description="Challenges delta sync indexes",
+        postgres=changes_indexes(is_postgres=True),
+        sqlite=changes_indexes(is_postgres=False),
+    ),
+]
+
+
+async def apply_migrations(connection_name: str = "default") -> List[int]:
+    """
+    Apply not applied migrations, postgres workers apply them one by one
+    under advisory lock.
+    :param connection_name: tortoise connection name
+    :return: applied versions
+    """
+    connection: BaseDBAsyncClient = Tortoise.get_connection(connection_name)
+
+    if connection.capabilities.dialect != "postgres":
+        return await apply_pending_migrations(connection)
+
+    # session level lock is held by one pool connection while statements run
+    # on the others, `CREATE INDEX CONCURRENTLY` can't run inside transaction
+    async with connection.acquire_connection() as lock_connection:
+        await lock_connection.execute("SELECT pg_advisory_lock($1)", MIGRATIONS_LOCK)
+
+        try:
+            return await apply_pending_migrations(connection)
+        finally:
+            await lock_connection.execute(
+                "SELECT pg_advisory_unlock($1)", MIGRATIONS_LOCK,
+            )
+
+
+async def apply_pending_migrations(connection: BaseDBAsyncClient) -> List[int]:
+    """
+    Apply migrations which are not stored in `schemaversion`.
+    :param connection: tortoise connection
+    :return: applied versions
+    """
+    dialect: str = connection.capabilities.dialect
+    await connection.execute_script(
+        'CREATE TABLE IF NOT EXISTS "schemaversion" '
+        '("version" INT NOT NULL PRIMARY KEY, "description" VARCHAR(255) NOT NULL)'
+    )
+    applied: Set[int] = {
+        row["version"] for row in await execute_sql(
+            'SELECT "version" FROM "schemaversion"', connection=connection,
+        )
+    }
+    versions: List[int] = []
+
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+
+        for statement in getattr(migration, dialect):
+            index_name: Optional[str] = concurrent_index_name(statement)
+
+            if index_name is not None:
+                await drop_invalid_index(connection, index_name)
+
+            await connection.execute_script(statement)
+
+        await execute_sql(
+            'INSERT INTO "schemaversion" ("version", "description") VALUES ($1, $2)',
+            migration.version,
+            migration.description,
+            connection=connection,
+        )
+        versions.append(migration.version)
+
+    return versions
+
+
+def register_migrations(app: FastAPI) -> None:
+    """Apply migrations when app starts, should be registered after tortoise."""
+    @app.on_event("startup")
+    async def startup() -> None:  # pylint: disable=unused-variable
+        """On startup apply schema changes"""
+        await apply_migrations()
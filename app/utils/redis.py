@@ -16,22 +16,25 @@ from app.settings import REDIS_PASSWORD
 from app.settings import REDIS_PORT
 
 
+async def create_redis_pool() -> aioredis.ConnectionsPool:
+    """Create redis connections pool from settings."""
+    redis_kwargs: Dict[str, Union[str, int]] = {
+        "address": f"redis://{REDIS_HOST}:{REDIS_PORT}",
+        "db": REDIS_DB,
+        "password": REDIS_PASSWORD,
+    }
+    redis_kwargs = {key: value for key, value in redis_kwargs.items() if value}
+
+    return await aioredis.create_pool(**redis_kwargs)
+
+
 def register_redis(app: FastAPI) -> None:
     """Add redis logic for app events."""
     @app.on_event("startup")
     async def startup() -> None:  # pylint: disable=unused-variable
         """On startup app init redis connection"""
-        redis_kwargs: Dict[str, Union[str, int]] = {
-            "address": f"redis://{REDIS_HOST}:{REDIS_PORT}",
-            "db": REDIS_DB,
-            "password": REDIS_PASSWORD,
-        }
-        redis_kwargs = {key: value for key, value in redis_kwargs.items() if value}
-
         try:
-            redis_pool: aioredis.ConnectionsPool = await aioredis.create_redis_pool(
-                **redis_kwargs
-            )
+            redis_pool: aioredis.ConnectionsPool = await create_redis_pool()
         except ConnectionRefusedError:
             warnings.warn("REDIS error, check connection settings")
             sys.exit()
@@ -0,0 +1,278 @@
+"""Responses utils"""
+import time
+
+from collections import OrderedDict
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from fastapi.responses import ORJSONResponse as BaseORJSONResponse
+from orjson import dumps  # pylint: disable-msg=E0611
+from pydantic.json import pydantic_encoder  # pylint: disable-msg=E0611
+
+from app.extensions import redis_client
+from app.settings import LOCAL_CACHE_SIZE
+from app.settings import LOCAL_CACHE_TTL
+from app.settings import RESPONSE_CACHE_TTL
+from app.settings import SINGLE_FLIGHT_LEASE_ENABLED
+from app.utils.single_flight import Lease
+from app.utils.single_flight import SingleFlight
+
+
+# entry versions outlive any fill
+VERSION_TTL: int = 86400
+# KEYS: entry, version; ARGV: content, version read before fetch, ttl
+SET_IF_VERSION: str = """
+if (redis.call("GET", KEYS[2]) or "") ~= ARGV[2] then
+    return 0
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[3])
+else
+    redis.call("SET", KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+def encode_json(content: Any) -> bytes:
+    """
+    Encode response content by orjson, pydantic models are supported.
+    :param content: response content
+    :return: JSON bytes
+    """
+    return dumps(content, default=pydantic_encoder)
+
+
+class ORJSONResponse(BaseORJSONResponse):
+    """
+    Application default response.
+
+    Content is encoded by orjson, pre-encoded bytes(e.g. cache entries
+    or documents built by database) are sent as is.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+
+        return encode_json(content)
+
+
+class LocalCache:
+    """
+    In-process micro-cache for hot keys.
+
+    Entries live `ttl` seconds, the oldest ones are dropped over `size`.
+    Other processes are not invalidated, so entries may be stale for `ttl`.
+    """
+
+    instances: List["LocalCache"] = []
+
+    def __init__(self, ttl: float = LOCAL_CACHE_TTL, size: int = LOCAL_CACHE_SIZE):
+        self.ttl: float = ttl
+        self.size: int = size
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        LocalCache.instances.append(self)
+
+    def get(self, name: str) -> Optional[Any]:
+        """
+        Get entry.
+        :param name: entry name
+        :return: value or None if entry is missed or expired
+        """
+        entry: Optional[Tuple[float, Any]] = self.entries.get(name)
+
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+
+        if expires_at < time.monotonic():
+            self.entries.pop(name, None)
+            return None
+
+        return value
+
+    def set(self, name: str, value: Any) -> None:
+        """
+        Store entry.
+        :param name: entry name
+        :param value: value
+        """
+        self.entries[name] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(name)
+
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, name: str) -> None:
+        """
+        Drop entry.
+        :param name: entry name
+        """
+        self.entries.pop(name, None)
+
+    @classmethod
+    def clear_all(cls) -> None:
+        """Drop entries of every local cache of process."""
+        for instance in cls.instances:
+            instance.entries.clear()
+
+
+class ResponseCache:
+    """
+    Pre-encoded responses in redis.
+
+    Entries are stored for `ttl` seconds as response bytes(`ttl=0` keeps them
+    until invalidation), hits are returned without decoding.
+    Optional local cache is checked before redis. Misses of `get_or_set`
+    are filled once per process, and once per cluster with `lease`.
+    Invalidation increments entry version, content fetched before it
+    is not stored by fill.
+    """
+
+    def __init__(
+            self,
+            prefix: str,
+            ttl: int = RESPONSE_CACHE_TTL,
+            local: Optional[LocalCache] = None,
+            lease: bool = SINGLE_FLIGHT_LEASE_ENABLED,
+    ):
+        self.prefix: str = prefix
+        self.ttl: int = ttl
+        self.local: Optional[LocalCache] = local
+        self.lease: bool = lease
+        self.flights: SingleFlight = SingleFlight()
+
+    def key(self, name: str) -> str:
+        """
+        Redis key of entry.
+        :param name: entry name
+        :return: redis key
+        """
+        return f"{self.prefix}:{name}"
+
+    def version_key(self, name: str) -> str:
+        """
+        Redis key of entry version.
+        :param name: entry name
+        :return: redis key
+        """
+        return f"{self.key(name)}:version"
+
+    async def get(self, name: str) -> Optional[ORJSONResponse]:
+        """
+        Get cached response.
+        :param name: entry name
+        :return: response or None if entry is missed
+        """
+        content: Optional[bytes] = None
+
+        if self.local is not None:
+            content = self.local.get(name)
+
+            if content is not None:
+                return ORJSONResponse(content=content)
+
+        content = await redis_client.get(self.key(name))
+
+        if content is None:
+            return None
+
+        if self.local is not None:
+            self.local.set(name, content)
+
+        return ORJSONResponse(content=content)
+
+    async def set(self, name: str, content: Any) -> ORJSONResponse:
+        """
+        Encode content once, store and return it as response.
+        :param name: entry name
+        :param content: response content or pre-encoded bytes
+        :return: response
+        """
+        response = ORJSONResponse(content=content)
+        await redis_client.set(key=self.key(name), value=response.body, expire=self.ttl)
+
+        if self.local is not None:
+            self.local.set(name, response.body)
+
+        return response
+
+    async def invalidate(self, name: str) -> None:
+        """
+        Drop cached response.
+        :param name: entry name
+        """
+        if self.local is not None:
+            self.local.invalidate(name)
+
+        transaction = redis_client.multi_exec()
+        transaction.incr(self.version_key(name))
+        transaction.expire(self.version_key(name), VERSION_TTL)
+        transaction.delete(self.key(name))
+        await transaction.execute()
+
+    async def get_or_set(
+            self, name: str, fetch: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Optional[ORJSONResponse]:
+        """
+        Get cached response, concurrent misses share one fetch.
+        :param name: entry name
+        :param fetch: coroutine function which returns content or None if it is missed
+        :return: response or None if content is missed
+        """
+        response: Optional[ORJSONResponse] = await self.get(name)
+
+        if response is not None:
+            return response
+
+        return await self.flights.run(name, lambda: self.fill(name, fetch))
+
+    async def fill(
+            self, name: str, fetch: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Optional[ORJSONResponse]:
+        """
+        Fetch and store content, with lease other processes' fill is awaited first.
+        Content is not stored if entry was invalidated during fetch.
+        :param name: entry name
+        :param fetch: coroutine function which returns content or None if it is missed
+        :return: response or None if content is missed
+        """
+        lease: Optional[Lease] = None
+
+        if self.lease:
+            lease = Lease(key=f"{self.key(name)}:lease")
+
+            if not await lease.acquire():
+                response: Optional[ORJSONResponse] = await lease.wait(
+                    lambda: self.get(name)
+                )
+
+                if response is not None:
+                    return response
+
+        try:
+            version: bytes = await redis_client.get(self.version_key(name)) or b""
+            content: Optional[Any] = await fetch()
+
+            if content is None:
+                return None
+
+            response = ORJSONResponse(content=content)
+            stored: int = await redis_client.eval(
+                SET_IF_VERSION,
+                keys=[self.key(name), self.version_key(name)],
+                args=[response.body, version, self.ttl],
+            )
+
+            if stored and self.local is not None:
+                self.local.set(name, response.body)
+
+            return response
+        finally:
+            if lease is not None:
+                await lease.release()
@@ -0,0 +1,141 @@
+"""
+Single-flight requests coalescing.
+
+Concurrent calls with the same key share one in-flight computation per
+process: the first caller runs it, others await its result or error.
+Optional redis lease extends this across processes: the lease owner computes
+and fills the cache, other processes poll the cache until it is filled
+or the lease expires.
+"""
+import asyncio
+
+from functools import wraps
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+from typing import TypeVar
+from uuid import uuid4
+
+from app.extensions import redis_client
+from app.settings import SINGLE_FLIGHT_LEASE_POLL
+from app.settings import SINGLE_FLIGHT_LEASE_TTL
+
+
+RESULT = TypeVar("RESULT")
+
+# KEYS: lease; ARGV: owner token, lease taken by other owner after expiry is kept
+RELEASE_LEASE: str = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:  # pylint: disable=too-few-public-methods
+    """In-flight computations of process by key."""
+
+    def __init__(self) -> None:
+        self.flights: Dict[Hashable, asyncio.Future] = {}  # type: ignore
+
+    async def run(
+            self, key: Hashable, function: Callable[[], Awaitable[RESULT]],
+    ) -> RESULT:
+        """
+        Run function or join its in-flight run with the same key.
+        :param key: computation key
+        :param function: coroutine function without arguments
+        :return: function result
+        """
+        future: Optional[asyncio.Future] = self.flights.get(key)  # type: ignore
+
+        if future is None:
+            future = asyncio.ensure_future(function())
+            self.flights[key] = future
+            future.add_done_callback(lambda _: self.flights.pop(key, None))
+
+        # cancelled caller does not cancel computation of others
+        result: RESULT = await asyncio.shield(future)
+
+        return result
+
+
+def single_flight(
+        key: Optional[Callable[..., Hashable]] = None,
+) -> Callable[[Callable[..., Awaitable[RESULT]]], Callable[..., Awaitable[RESULT]]]:
+    """
+    Decorator of coroutine function(e.g. route): concurrent calls with
+    the same arguments share one call. Signature is kept for dependencies.
+    :param key: key builder from call arguments, all arguments by default
+    :return: decorator
+    """
+    def decorator(
+            function: Callable[..., Awaitable[RESULT]],
+    ) -> Callable[..., Awaitable[RESULT]]:
+        flights = SingleFlight()
+
+        @wraps(function)
+        async def wrapper(*args: Any, **kwargs: Any) -> RESULT:
+            call_key: Hashable = (
+                key(*args, **kwargs) if key is not None
+                else (args, tuple(sorted(kwargs.items())))
+            )
+
+            return await flights.run(call_key, lambda: function(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+class Lease:
+    """
+    Redis lease of computation across processes.
+
+    Lease expires after `ttl` ms, so crashed owner does not block others.
+    """
+
+    def __init__(self, key: str, ttl: int = SINGLE_FLIGHT_LEASE_TTL):
+        self.key: str = key
+        self.ttl: int = ttl
+        self.token: str = str(uuid4())
+        self.acquired: bool = False
+
+    async def acquire(self) -> bool:
+        """
+        Take lease if it is free.
+        :return: true if lease is taken
+        """
+        self.acquired = bool(await redis_client.set(
+            self.key, self.token, pexpire=self.ttl, exist=redis_client.SET_IF_NOT_EXIST,
+        ))
+
+        return self.acquired
+
+    async def release(self) -> None:
+        """Drop lease if it is still owned."""
+        if not self.acquired:
+            return
+
+        await redis_client.eval(RELEASE_LEASE, keys=[self.key], args=[self.token])
+        self.acquired = False
+
+    async def wait(
+            self, check: Callable[[], Awaitable[Optional[RESULT]]],
+    ) -> Optional[RESULT]:
+        """
+        Poll result of lease owner every `SINGLE_FLIGHT_LEASE_POLL` ms
+        until lease is free.
+        :param check: coroutine function which returns result or None
+        :return: result or None if lease is free without result
+        """
+        while True:
+            result: Optional[RESULT] = await check()
+
+            if result is not None or not await redis_client.exists(self.key):
+                return result
+
+            await asyncio.sleep(SINGLE_FLIGHT_LEASE_POLL / 1000)
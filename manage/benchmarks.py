@@ -0,0 +1,93 @@
+import json
+
+from datetime import datetime
+from datetime import timedelta
+from time import perf_counter
+from typing import Awaitable
+from typing import Callable
+
+import typer
+
+from fastapi.encoders import jsonable_encoder
+from orjson import dumps  # pylint: disable-msg=E0611
+from tortoise import Tortoise
+
+from app.models.api.challenge import ChallengeList
+from app.models.api.challenge import ChallengeListOut
+from app.models.db import AuthAccount
+from app.models.db import Challenge
+from app.models.db import Track
+from app.models.db import User
+from app.models.db.user import AuthProvider
+from app.services.challenges import get_challenge_rows
+from app.settings import APP_MODELS
+from app.settings import PAGE_MAX_LIMIT
+from app.settings import TORTOISE_TEST_DB
+from app.utils.db import Paginate
+from app.utils.migrations import apply_migrations
+
+
+async def populate_challenges(count: int):
+    track = await Track.create(name="track", author_name="author", meta={})
+
+    for index in range(count):
+        user = await User.create()
+        await AuthAccount.create(
+            _id=str(index),
+            name="name",
+            image="image",
+            url="url",
+            provider=AuthProvider.DEFAULT,
+            user=user,
+        )
+        await Challenge.create(
+            name=f"challenge {index}",
+            challenge_end=datetime.utcnow() + timedelta(days=1),
+            vote_end=datetime.utcnow() + timedelta(days=2),
+            is_public=True,
+            owner=user,
+            track=track,
+        )
+
+
+async def serializer_page() -> bytes:
+    pagination = Paginate(limit=PAGE_MAX_LIMIT, offset=0, cursor=None)
+    count, items = await pagination.paginate(
+        queryset=Challenge.filter(is_public=True),
+        serializer=ChallengeList,
+    )
+    response = ChallengeListOut(count=count, items=items)
+
+    return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+
+async def lean_page() -> bytes:
+    pagination = Paginate(limit=PAGE_MAX_LIMIT, offset=0, cursor=None)
+    count, items = await pagination.paginate_with(
+        queryset=Challenge.filter(is_public=True), fetcher=get_challenge_rows,
+    )
+
+    return dumps({"count": count, "items": items, "next_cursor": None})
+
+
+async def measure(page: Callable[[], Awaitable[bytes]], rounds: int) -> float:
+    await page()
+    started_at = perf_counter()
+
+    for _ in range(rounds):
+        await page()
+
+    return (perf_counter() - started_at) / rounds * 1000
+
+
+async def benchmark_challenge_list(challenges: int, rounds: int):
+    await Tortoise.init(db_url=TORTOISE_TEST_DB, modules={"models": APP_MODELS})
+    await Tortoise.generate_schemas()
+    await apply_migrations()
+    await populate_challenges(challenges)
+
+    for name, page in (("serializer", serializer_page), ("lean", lean_page)):
+        milliseconds = await measure(page=page, rounds=rounds)
+        typer.echo(f"{name}: {milliseconds:.2f} ms per page")
+
+    await Tortoise.close_connections()
@@ -1,10 +1,19 @@
 import asyncio
 
+from typing import List
+
 import typer
 
+from manage.benchmarks import benchmark_challenge_list
+from manage.services import backfill_results
+from manage.services import delete_challenges
 from manage.services import get_spotify_access_token_url
+from manage.services import migrate
 from manage.services import populate_playlists
 from manage.services import populate_texts
+from manage.services import rebuild_leaderboards
+from manage.services import rebuild_user_memberships
+from manage.services import schedule_challenges
 
 
 app = typer.Typer()
@@ -16,6 +25,42 @@ def populate_texts_command():
     loop.run_until_complete(populate_texts())
 
 
+@app.command(name="migrate", help="Apply schema changes: indexes, constraints")
+def migrate_command():
+    loop.run_until_complete(migrate())
+
+
+@app.command(name="rebuild_leaderboards", help="Rebuild redis leaderboards from db")
+def rebuild_leaderboards_command():
+    loop.run_until_complete(rebuild_leaderboards())
+
+
+@app.command(name="rebuild_memberships", help="Rebuild redis users challenges sets from db")
+def rebuild_memberships_command():
+    loop.run_until_complete(rebuild_user_memberships())
+
+
+@app.command(
+    name="schedule_challenges",
+    help="Schedule lifecycle events of challenges which voting is not ended",
+)
+def schedule_challenges_command():
+    loop.run_until_complete(schedule_challenges())
+
+
+@app.command(name="backfill_results", help="Store final results of closed challenges")
+def backfill_results_command():
+    loop.run_until_complete(backfill_results())
+
+
+@app.command(
+    name="delete_challenges",
+    help="Delete challenges and leave tombstones for delta sync clients",
+)
+def delete_challenges_command(challenge_ids: List[str]):
+    loop.run_until_complete(delete_challenges(challenge_ids))
+
+
 @app.command(
     name="populate_playlists",
     help="Populate spotify playlists",
@@ -29,5 +74,16 @@ def populate_playlists_command(
     loop.run_until_complete(populate_playlists(access_token))
 
 
+@app.command(
+    name="benchmark_challenge_list",
+    help="Compare serializer and lean challenge list paths on in-memory sqlite",
+)
+def benchmark_challenge_list_command(
+        challenges: int = typer.Option(1000, help="Challenges to populate"),
+        rounds: int = typer.Option(200, help="Pages to fetch per path"),
+):
+    loop.run_until_complete(benchmark_challenge_list(challenges, rounds))
+
+
 if __name__ == "__main__":
     app()
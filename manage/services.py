@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List
 from urllib.parse import urlencode
 
@@ -7,12 +8,23 @@ from orjson import loads
 from tortoise import Tortoise
 from tortoise.exceptions import DBConnectionError
 
+from app.extensions import redis_client
+from app.models.db import Challenge
+from app.models.db import ChallengeResult
 from app.models.db import Text
+from app.services.changes import delete_challenge
+from app.services.leaderboard import rebuild_leaderboard
+from app.services.lifecycle import schedule_challenge
+from app.services.memberships import rebuild_memberships
 from app.services.playlists import create_playlist
+from app.services.results import store_results
 from app.settings import APP_MODELS
 from app.settings import SPOTIFY_ID
 from app.settings import SPOTIFY_REDIRECT_URI
 from app.settings import TORTOISE_CONFIG
+from app.utils.db import execute_sql
+from app.utils.migrations import apply_migrations
+from app.utils.redis import create_redis_pool
 
 
 def with_db(function):
@@ -30,6 +42,18 @@ def with_db(function):
     return init_db
 
 
+def with_redis(function):
+    async def init_redis(*args, **kwargs):
+        redis_client.__init__(await create_redis_pool())
+
+        try:
+            return await function(*args, **kwargs)
+        finally:
+            redis_client.close()
+
+    return init_redis
+
+
 @with_db
 async def populate_texts():
     with open("manage/fixtures/texts.json", "r") as texts_file:
@@ -44,6 +68,17 @@ async def populate_texts():
             typer.echo(f"Exists - {text.content[:50]}")
 
 
+@with_db
+async def migrate():
+    versions: List[int] = await apply_migrations()
+
+    for version in versions:
+        typer.echo(f"Applied - {version}")
+
+    if not versions:
+        typer.echo("Nothing to apply")
+
+
 def get_spotify_access_token_url():
     login_url = f"https://accounts.spotify.com/authorize"
     scopes = "user-read-private,user-read-email"
@@ -68,3 +103,70 @@ async def populate_playlists(access_token):
     for spotify_url in spotify_urls:
         playlist = await create_playlist(link=spotify_url, access_token=access_token)
         typer.echo(f"Added - {playlist.name} - {spotify_url}")
+
+
+@with_db
+@with_redis
+async def rebuild_leaderboards():
+    challenge_ids: List[str] = await Challenge.all().values_list("id", flat=True)
+
+    for challenge_id in challenge_ids:
+        await rebuild_leaderboard(challenge_id)
+
+    typer.echo(f"Rebuilt - {len(challenge_ids)}")
+
+
+@with_db
+@with_redis
+async def schedule_challenges():
+    challenges: List[dict] = await Challenge.filter(
+        vote_end__gt=datetime.utcnow()
+    ).values("id", "challenge_end", "vote_end")
+
+    for challenge in challenges:
+        await schedule_challenge(
+            challenge_id=challenge["id"],
+            challenge_end=challenge["challenge_end"],
+            vote_end=challenge["vote_end"],
+        )
+
+    typer.echo(f"Scheduled - {len(challenges)}")
+
+
+@with_db
+async def backfill_results():
+    stored_ids: List[str] = await ChallengeResult.all().values_list(
+        "challenge_id", flat=True
+    )
+    challenge_ids: List[str] = await Challenge.filter(
+        vote_end__lt=datetime.utcnow()
+    ).exclude(id__in=stored_ids).values_list("id", flat=True)
+
+    for challenge_id in challenge_ids:
+        await store_results(challenge_id)
+
+    typer.echo(f"Stored - {len(challenge_ids)}")
+
+
+@with_db
+@with_redis
+async def rebuild_user_memberships():
+    rows: List[dict] = await execute_sql(
+        'SELECT DISTINCT "user_id" FROM "challenges_participants"'
+    )
+
+    for row in rows:
+        await rebuild_memberships(row["user_id"])
+
+    typer.echo(f"Rebuilt - {len(rows)}")
+
+
+@with_db
+@with_redis
+async def delete_challenges(challenge_ids: List[str]):
+    deleted: int = 0
+
+    for challenge_id in challenge_ids:
+        deleted += await delete_challenge(challenge_id)
+
+    typer.echo(f"Deleted - {deleted}")
@@ -13,10 +13,12 @@ from uuid import uuid4
 import pytest
 
 from asyncpg import ObjectInUseError
+from fakeredis.aioredis import create_pool
 from fastapi import FastAPI
 from tortoise import Tortoise
 from tortoise.exceptions import DBConnectionError
 
+from app.extensions import redis_client
 from app.models.db import AuthAccount
 from app.models.db import Challenge
 from app.models.db import Playlist
@@ -27,8 +29,14 @@ from app.models.db import User
 from app.models.db import Vote
 from app.models.db.user import AuthProvider
 from app.services.auth.base import bearer_auth
+from app.services.auth.base import optional_auth
+from app.services.challenges import join_challenge
+from app.services.suggest import track_suggest_index
+from app.services.votes import cast_vote
 from app.settings import APP_MODELS
 from app.settings import TORTOISE_TEST_DB
+from app.utils.migrations import apply_migrations
+from app.utils.responses import LocalCache
 from tests.test_services.test_auth.test_base import USER_UUID
 
 
@@ -48,6 +56,7 @@ async def test_db() -> AsyncGenerator:  # type: ignore
             db_url=TORTOISE_TEST_DB, modules={"models": APP_MODELS}, _create_db=True,
         )
     await Tortoise.generate_schemas()
+    await apply_migrations()
 
     yield
 
@@ -57,6 +66,20 @@ async def test_db() -> AsyncGenerator:  # type: ignore
         pass
 
     await Tortoise.close_connections()
+    track_suggest_index.clear()
+
+
+@pytest.fixture(scope="function", autouse=True)
+@pytest.mark.asyncio
+async def test_redis() -> AsyncGenerator:  # type: ignore
+    """Initialize fake redis connection before run test."""
+    redis_pool = await create_pool()
+    redis_client.__init__(redis_pool)
+
+    yield
+
+    redis_client.close()
+    LocalCache.clear_all()
 
 
 POPULATE_TRACK_ID: str = str(uuid4())
@@ -70,6 +93,7 @@ async def bearer_auth_mock() -> str:
 def mock_auth(application: FastAPI) -> FastAPI:
     """Mock auth dependency and token middleware."""
     application.dependency_overrides[bearer_auth] = bearer_auth_mock
+    application.dependency_overrides[optional_auth] = bearer_auth_mock
 
     application.user_middleware = []
     application.middleware_stack = application.build_middleware_stack()
@@ -152,7 +176,7 @@ async def populate_user(user_id: Optional[UUID] = USER_UUID) -> User:
         expires=0,
         user=user,
     )
-    await user.fetch_related("auth_accounts")
+    await user.update_profile()
 
     return user
 
@@ -206,7 +230,7 @@ async def populate_challenge(
         owner=user,
         track=track,
     )
-    await challenge.participants.add(user)
+    await join_challenge(challenge_id=challenge.id, user_id=user.id)
 
     return challenge
 
@@ -281,16 +305,22 @@ POPULATE_SUBMISSION_ID = uuid4()
 async def populate_submission(
         challenge: Challenge,
         submission_id: Optional[UUID] = POPULATE_SUBMISSION_ID,
+        user_id: Optional[UUID] = None,
 ) -> Submission:
-    """Populate submission for routes testing."""
+    """Populate submission for routes testing, challenge owner submits by default."""
     if not submission_id:
         submission_id = uuid4()
 
+    user: User = await User.get(id=challenge.owner_id)  # type: ignore
+
+    if user_id:
+        user = await populate_user(user_id=user_id)
+
     submission, _ = await Submission.get_or_create(
         id=submission_id,
         url="test",
         challenge=challenge,
-        user=challenge.owner,
+        user=user,
     )
 
     return submission
@@ -340,11 +370,13 @@ async def submission_ended_fixture() -> Submission:
 
 async def populate_vote(submission: Submission) -> Vote:
     """Populate vote for routes testing."""
-    vote, _ = await Vote.get_or_create(
-        submission=submission,
-        user=submission.challenge.owner,  # type: ignore
+    vote: Dict[str, Any] = await cast_vote(
+        challenge_id=submission.challenge_id,  # type: ignore
+        submission_id=submission.id,
+        user_id=submission.challenge.owner_id,  # type: ignore
     )
-    return vote
+
+    return await Vote.get(id=vote["id"])
 
 
 @pytest.fixture()
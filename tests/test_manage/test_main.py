@@ -0,0 +1,34 @@
+"""Manage commands tests."""
+import asyncio
+
+from unittest import mock
+
+from click.testing import Result
+from tortoise import Tortoise
+from truth.truth import AssertThat  # type: ignore
+from typer.testing import CliRunner
+
+from app.models.db import Challenge
+from app.models.db import ChallengeResult
+from manage import main
+
+
+runner = CliRunner()
+
+
+def test_backfill_results_command(
+        challenge_end_fixture: Challenge,
+) -> None:
+    """Check manage app imports and backfill command stores results of ended challenge."""
+    # command runs on the test database initialized by fixture
+    with mock.patch.object(main, "loop", asyncio.get_event_loop()), \
+            mock.patch.object(Tortoise, "init", mock.AsyncMock()), \
+            mock.patch.object(Tortoise, "generate_schemas", mock.AsyncMock()):
+        result: Result = runner.invoke(main.app, ["backfill_results"])
+        stored: bool = bool(main.loop.run_until_complete(
+            ChallengeResult.filter(challenge_id=challenge_end_fixture.id).exists()
+        ))
+
+    AssertThat(result.exit_code).IsEqualTo(0)
+    AssertThat(result.output).Contains("Stored - 1")
+    AssertThat(stored).IsTrue()
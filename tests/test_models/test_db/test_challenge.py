@@ -0,0 +1,52 @@
+"""Tests Challenge models."""
+from uuid import uuid4
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.models.db import Challenge
+from app.models.db.challenge import create_secret_key
+from app.models.db.challenge import sign_secret_key
+from app.utils.exceptions import PermissionsDeniedError
+
+
+def test_secret_key_memoized() -> None:
+    """Check secret key is signed once per challenge."""
+    challenge_id = uuid4()
+    sign_secret_key.cache_clear()
+
+    secret: str = create_secret_key(challenge_id)
+    same_secret: str = create_secret_key(str(challenge_id))  # type: ignore
+
+    AssertThat(same_secret).IsEqualTo(secret)
+    AssertThat(sign_secret_key.cache_info().misses).IsEqualTo(1)
+    AssertThat(sign_secret_key.cache_info().hits).IsEqualTo(1)
+
+
+def test_public_challenge_has_no_secret() -> None:
+    """Check public challenge secret key is empty and can not be checked."""
+    challenge = Challenge(id=uuid4(), is_public=True)
+
+    AssertThat(challenge.secret_key()).IsNone()
+
+    with AssertThat(PermissionsDeniedError).IsRaised():
+        challenge.check_secret(secret=create_secret_key(challenge.id))
+
+
+@pytest.mark.parametrize(  # pylint: disable=not-callable
+    "secret", [None, "", "trash", "тест"]
+)
+def test_check_secret_invalid(secret: str) -> None:
+    """Check invalid secrets are denied."""
+    challenge = Challenge(id=uuid4(), is_public=False)
+
+    with AssertThat(PermissionsDeniedError).IsRaised():
+        challenge.check_secret(secret=secret)
+
+
+def test_check_secret() -> None:
+    """Check valid secret is accepted."""
+    challenge = Challenge(id=uuid4(), is_public=False)
+
+    AssertThat(challenge.check_secret(secret=challenge.secret_key())).IsTrue()
@@ -3,7 +3,9 @@ import pytest
 
 from truth.truth import AssertThat  # type: ignore
 
+from app.models.db import AuthAccount
 from app.models.db import User
+from app.models.db.user import AuthProvider
 
 
 @pytest.mark.asyncio
@@ -12,4 +14,27 @@ async def test_str(
 ) -> None:
     """Check str of User model."""
     AssertThat(str(user_fixture)).IsInstanceOf(str)
-    AssertThat(str(user_fixture)).IsEqualTo(user_fixture.name())
+    AssertThat(str(user_fixture)).IsEqualTo(user_fixture.name)
+
+
+@pytest.mark.asyncio
+async def test_update_profile(user_fixture: User) -> None:
+    """Check profile fields are copied from the last linked auth account."""
+    await AuthAccount.create(
+        _id="last",
+        name="last",
+        image="last",
+        url="last",
+        provider=AuthProvider.SPOTIFY,
+        user=user_fixture,
+    )
+
+    await user_fixture.update_profile()
+    user: User = await User.get(id=user_fixture.id)
+
+    AssertThat(user.name).IsEqualTo("last")
+    AssertThat(user.image).IsEqualTo("last")
+    AssertThat(user.url).IsEqualTo("last")
+    AssertThat(user.providers).IsEqualTo(
+        [AuthProvider.DEFAULT.value, AuthProvider.SPOTIFY.value]
+    )
@@ -5,6 +5,8 @@ from typing import Any
 from typing import Dict
 from typing import List
 from typing import Tuple
+from unittest import mock
+from uuid import uuid4
 
 import pytest
 
@@ -16,6 +18,7 @@ from tests.conftest import POPULATE_CHALLENGE_FOREIGN_ID as FOREIGN_ID
 from tests.conftest import POPULATE_CHALLENGE_FOREIGN_SECRET as FOREIGN_SECRET
 from tests.conftest import POPULATE_CHALLENGE_ID
 from tests.conftest import POPULATE_CHALLENGE_SECRET
+from tests.conftest import POPULATE_SUBMISSION_ID
 from tests.conftest import POPULATE_TRACK_ID
 from tests.conftest import mock_auth
 
@@ -61,12 +64,23 @@ requests: List[Tuple[str, str, Dict[str, str], int]] = [
     ("POST", f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/submit/", submit_valid_data, 200),
     ("POST", f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/submit/", submit_invalid_data, 422),
     ("GET", f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/submissions/", {}, 200),
+    ("GET", f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/votes/", {}, 200),
+    ("GET", f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/stats/", {}, 200),
+    ("GET", f"/api/challenges/{str(uuid4())}/stats/", {}, 404),
     ("GET", f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/", {}, 200),
     ("POST", "/api/challenges/", challenge_data_challenge_end_invalid, 422),
     ("POST", "/api/challenges/", challenge_data_vote_end_less_start, 422),
     ("POST", "/api/challenges/", challenge_data_empty_name, 422),
     ("GET", "/api/challenges/", {}, 200),
+    ("GET", "/api/challenges/?cursor=", {}, 200),
+    ("GET", "/api/challenges/?cursor=trash", {}, 400),
+    ("GET", "/api/challenges/?with_count=false", {}, 200),
     ("GET", "/api/challenges/my/", {}, 200),
+    ("GET", "/api/challenges/search/?q=test", {}, 200),
+    ("GET", "/api/challenges/changes/", {}, 200),
+    ("GET", "/api/challenges/changes/?since=trash", {}, 400),
+    ("GET", "/api/challenges/search/?q=test&cursor=trash", {}, 400),
+    ("GET", "/api/challenges/search/", {}, 422),
     ("GET", "/api/challenges/participant/", {}, 200),
 ]
 
@@ -209,3 +223,94 @@ def test_exist_submission(  # type: ignore
     )
 
     AssertThat(response.status_code).IsEqualTo(expected_status)
+
+
+db_json_requests: List[str] = [
+    "/api/challenges/",
+    "/api/challenges/?cursor=",
+    f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/submissions/",
+    f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/submissions/?with_count=false",
+]
+
+
+@pytest.mark.parametrize("endpoint", db_json_requests)  # pylint: disable=not-callable
+def test_db_json_responses(  # type: ignore
+        endpoint: str,
+        submission_fixture,  # pylint: disable=unused-argument
+) -> None:
+    """Check responses built by database are the same as default ones."""
+    expected_response = client.get(endpoint)
+
+    with mock.patch("app.routes.challenges.DB_JSON_RESPONSES", True):
+        response = client.get(endpoint)
+
+    AssertThat(response.status_code).IsEqualTo(200)
+    AssertThat(response.json()).IsEqualTo(expected_response.json())
+
+
+def test_votes_stream_not_found() -> None:
+    """Check votes stream of missed challenge."""
+    response = client.get(f"/api/challenges/{str(uuid4())}/votes/stream/")
+
+    AssertThat(response.status_code).IsEqualTo(404)
+
+
+def test_results_not_closed(  # type: ignore
+        challenge_vote_fixture,  # pylint: disable=unused-argument
+) -> None:
+    """Check results of challenge which voting is not ended."""
+    response = client.get(f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/results/")
+
+    AssertThat(response.status_code).IsEqualTo(404)
+
+
+def test_submit_twice(  # type: ignore
+        user_fixture,  # pylint: disable=unused-argument
+        submission_fixture,  # pylint: disable=unused-argument
+) -> None:
+    """Check repeated submit changes url of the same submission."""
+    endpoint: str = f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/submit/"
+    response = client.post(endpoint, json=submit_valid_data)
+    submissions_response = client.get(
+        f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/submissions/"
+    )
+
+    AssertThat(response.json()["id"]).IsEqualTo(str(POPULATE_SUBMISSION_ID))
+    AssertThat(response.json()["url"]).IsEqualTo(submit_valid_data["url"])
+    AssertThat(submissions_response.json()["items"]).IsEqualTo([response.json()])
+
+
+def test_submit_db_json_response(  # type: ignore
+        user_fixture,  # pylint: disable=unused-argument
+        submission_fixture,  # pylint: disable=unused-argument
+) -> None:
+    """Check submit response built by database is the same as default one."""
+    endpoint: str = f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/submit/"
+    expected: Dict[str, Any] = client.post(endpoint, json=submit_valid_data).json()
+
+    with mock.patch("app.routes.challenges.DB_JSON_RESPONSES", True):
+        response = client.post(endpoint, json=submit_valid_data)
+
+    # repeated submit changes update time only
+    submission: Dict[str, Any] = response.json()
+    del submission["updated_at"], expected["updated_at"]
+
+    AssertThat(response.status_code).IsEqualTo(200)
+    AssertThat(submission).IsEqualTo(expected)
+
+
+def test_challenge_detail_after_accept(  # type: ignore
+        user_fixture,  # pylint: disable=unused-argument
+        challenge_foreign_fixture,  # pylint: disable=unused-argument
+) -> None:
+    """Check cached challenge is changed by accept."""
+    endpoint: str = f"/api/challenges/{str(FOREIGN_ID)}/"
+    params: Dict[str, str] = {"secret": str(FOREIGN_SECRET)}
+    response = client.get(endpoint, params=params)
+    client.post(f"{endpoint}accept/", params=params)
+    accepted_response = client.get(endpoint, params=params)
+
+    AssertThat(response.status_code).IsEqualTo(200)
+    AssertThat(accepted_response.json()["participants_count"]).IsEqualTo(
+        response.json()["participants_count"] + 1
+    )
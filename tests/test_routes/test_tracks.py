@@ -10,10 +10,12 @@ from truth.truth import AssertThat  # type: ignore
 
 from app import get_application
 from tests.conftest import POPULATE_TRACK_ID
+from tests.conftest import mock_auth
 
 
 application = get_application()
 client: TestClient = TestClient(application)
+application = mock_auth(application)
 
 requests: List[Tuple[str, str, Dict[str, str], int]] = [
     ("GET", "/api/tracks/random/", {}, 200),
@@ -41,3 +43,25 @@ def test_endpoint_exists(  # type: ignore
     response = client.request(method=method, url=endpoint, json=data)
 
     AssertThat(response.status_code).IsEqualTo(expected_status)
+
+
+def test_search_tracks() -> None:
+    """Check search returns cursor page and validates params."""
+    response = client.get("/api/tracks/search/", params={"q": "test"})
+    bad_cursor_response = client.get(
+        "/api/tracks/search/", params={"q": "test", "cursor": "trash"},
+    )
+
+    AssertThat(response.status_code).IsEqualTo(200)
+    AssertThat(response.json()).IsEqualTo({"count": None, "items": [], "next_cursor": None})
+    AssertThat(bad_cursor_response.status_code).IsEqualTo(400)
+    AssertThat(client.get("/api/tracks/search/").status_code).IsEqualTo(422)
+
+
+def test_suggest_tracks() -> None:
+    """Check suggest returns items and validates params."""
+    response = client.get("/api/tracks/suggest/", params={"q": "test"})
+
+    AssertThat(response.status_code).IsEqualTo(200)
+    AssertThat(response.json()).IsEqualTo({"items": []})
+    AssertThat(client.get("/api/tracks/suggest/").status_code).IsEqualTo(422)
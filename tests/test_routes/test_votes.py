@@ -1,9 +1,13 @@
 """Test votes endpoints"""
+from typing import Any
+from typing import Dict
+from unittest import mock
 
 from starlette.testclient import TestClient
 from truth.truth import AssertThat  # type: ignore
 
 from app import get_application
+from tests.conftest import POPULATE_CHALLENGE_ID
 from tests.conftest import POPULATE_SUBMISSION_ID
 from tests.conftest import mock_auth
 
@@ -91,3 +95,48 @@ def test_vote_exists(  # type: ignore
     )
 
     AssertThat(response.status_code).IsEqualTo(expected_status)
+
+
+def test_vote_counts(  # type: ignore
+        user_fixture,  # pylint: disable=unused-argument
+        vote_fixture,  # pylint: disable=unused-argument
+) -> None:
+    """Check votes counts of submission and all challenge submissions."""
+    submission_response = client.get(
+        f"/api/submissions/{str(POPULATE_SUBMISSION_ID)}/votes/"
+    )
+    challenge_response = client.get(f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/votes/")
+
+    AssertThat(submission_response.json()).IsEqualTo({"count": 1})
+    AssertThat(challenge_response.json()).IsEqualTo(
+        {"items": [{"submission_id": str(POPULATE_SUBMISSION_ID), "count": 1}]}
+    )
+
+
+def test_leaderboard(  # type: ignore
+        user_fixture,  # pylint: disable=unused-argument
+        vote_fixture,  # pylint: disable=unused-argument
+) -> None:
+    """Check leaderboard with current user's submission rank."""
+    response = client.get(f"/api/challenges/{str(POPULATE_CHALLENGE_ID)}/leaderboard/")
+    item: Dict[str, Any] = {
+        "submission_id": str(POPULATE_SUBMISSION_ID), "count": 1, "rank": 1,
+    }
+
+    AssertThat(response.json()).IsEqualTo({"items": [item], "my": item})
+
+
+def test_vote_buffered(  # type: ignore
+        user_fixture,  # pylint: disable=unused-argument
+        submission_vote_fixture,  # pylint: disable=unused-argument
+) -> None:
+    """Check buffered vote is acknowledged and shown in buffer metrics."""
+    with mock.patch("app.routes.votes.VOTE_BUFFER_ENABLED", True):
+        response = client.post(
+            "/api/votes/", json={"submission_id": str(POPULATE_SUBMISSION_ID)},
+        )
+
+    stats_response = client.get("/api/votes/buffer/")
+
+    AssertThat(response.status_code).IsEqualTo(200)
+    AssertThat(stats_response.json()["pending"]).IsEqualTo(1)
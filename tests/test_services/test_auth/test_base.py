@@ -175,6 +175,8 @@ async def test_base_auth_route_on_post(set_mock: MagicMock) -> None:
     AssertThat(AuthOut(**response_body).validate(response_body)).IsNotEmpty()
     AssertThat(auth_account).IsNotNone()
     AssertThat(user).IsNotNone()
+    AssertThat(user.name).IsEqualTo(auth_account.name)
+    AssertThat(user.providers).IsEqualTo([auth_account.provider.value])
 
 
 @pytest.mark.asyncio
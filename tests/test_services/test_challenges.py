@@ -0,0 +1,292 @@
+"""Challenge services tests."""
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from uuid import uuid4
+
+import pytest
+
+from orjson import dumps  # pylint: disable-msg=E0611
+from orjson import loads  # pylint: disable-msg=E0611
+from tortoise import QuerySet
+from truth.truth import AssertThat  # type: ignore
+
+from app.extensions import redis_client
+from app.models.api.challenge import ChallengeList
+from app.models.api.challenge import ChallengeOut
+from app.models.api.submission import SubmissionList
+from app.models.db import AuthAccount
+from app.models.db import Challenge
+from app.models.db import Submission
+from app.models.db import User
+from app.models.db import Vote
+from app.models.db.challenge import create_secret_key
+from app.models.db.user import AuthProvider
+from app.services.challenges import challenge_detail_cache
+from app.services.challenges import challenge_header_key
+from app.services.challenges import get_challenge_detail
+from app.services.challenges import get_challenge_header
+from app.services.challenges import get_challenge_rows
+from app.services.challenges import get_challenge_stats
+from app.services.challenges import get_challenges_json
+from app.services.challenges import get_submissions_json
+from app.services.challenges import join_challenge
+from app.services.votes import cast_vote
+from app.utils.db import Paginate
+from app.utils.db import execute_sql
+from app.utils.responses import LocalCache
+from tests.conftest import USER_UUID
+from tests.conftest import populate_challenge
+from tests.conftest import populate_submission
+from tests.conftest import populate_user
+
+
+@pytest.mark.asyncio
+async def test_challenge_rows_same_as_serializer() -> None:
+    """Check lean rows have the same shape and values as pydantic serializer."""
+    await populate_challenge()
+    await populate_challenge(is_public=False, user_id=None, challenge_id=uuid4())
+
+    rows: List[Dict[str, Any]] = await get_challenge_rows(Challenge.all())
+    serialized = await ChallengeList.from_queryset(Challenge.all())
+
+    AssertThat(rows).HasSize(2)
+    AssertThat(loads(dumps(rows))).IsEqualTo(loads(serialized.json()))
+
+
+@pytest.mark.asyncio
+async def test_challenge_rows_empty() -> None:
+    """Check lean rows of empty queryset."""
+    rows: List[Dict[str, Any]] = await get_challenge_rows(Challenge.all())
+
+    AssertThat(rows).IsEmpty()
+
+
+@pytest.mark.asyncio
+async def test_challenge_rows_keyset() -> None:
+    """Check keyset pagination works with lean rows."""
+    for _ in range(3):
+        await populate_challenge(challenge_id=uuid4())
+
+    pagination = Paginate(limit=2, offset=0, cursor="")
+    _, items = await pagination.paginate_with(
+        queryset=Challenge.all(), fetcher=get_challenge_rows,
+    )
+    next_pagination = Paginate(limit=2, offset=0, cursor=pagination.next_cursor)
+    _, next_items = await next_pagination.paginate_with(
+        queryset=Challenge.all(), fetcher=get_challenge_rows,
+    )
+
+    AssertThat(items).HasSize(2)
+    AssertThat(next_items).HasSize(1)
+    AssertThat(next_pagination.next_cursor).IsNone()
+
+
+@pytest.mark.asyncio
+async def test_challenges_json_same_as_serializer() -> None:
+    """Check JSON built by database is the same as pydantic serializer output."""
+    await populate_challenge()
+    await populate_challenge(user_id=None, challenge_id=uuid4())
+
+    queryset = Challenge.all().order_by("-created_at", "-id")
+    document: str = await get_challenges_json(queryset)
+    serialized = await ChallengeList.from_queryset(queryset)
+
+    AssertThat(loads(document)).HasSize(2)
+    AssertThat(loads(document)).IsEqualTo(loads(serialized.json()))
+
+
+@pytest.mark.asyncio
+async def test_challenges_json_owner_accounts_same_as_serializer() -> None:
+    """Check owner with several auth accounts is the same as pydantic serializer."""
+    await populate_challenge()
+    owner: User = await User.get(id=USER_UUID)
+    await AuthAccount.create(
+        _id="other", name="other", image="other", url="other",
+        provider=AuthProvider.GOOGLE, user=owner,
+    )
+    await owner.update_profile()
+
+    queryset = Challenge.all().order_by("-created_at", "-id")
+    document: str = await get_challenges_json(queryset)
+    serialized = await ChallengeList.from_queryset(queryset)
+
+    AssertThat(loads(document)[0]["owner"]["providers"]).HasSize(2)
+    AssertThat(loads(document)).IsEqualTo(loads(serialized.json()))
+
+
+@pytest.mark.asyncio
+async def test_challenges_json_empty() -> None:
+    """Check JSON built by database of empty queryset."""
+    document: str = await get_challenges_json(Challenge.all())
+
+    AssertThat(loads(document)).IsEmpty()
+
+
+@pytest.mark.parametrize("is_public", [True, False])
+@pytest.mark.asyncio
+async def test_submissions_json_same_as_serializer(is_public: bool) -> None:
+    """Check submissions JSON built by database, secret key of private challenge."""
+    challenge: Challenge = await populate_challenge(is_public=is_public)
+    await populate_submission(challenge=challenge)
+
+    queryset = Submission.filter(challenge_id=challenge.id)
+    document: str = await get_submissions_json(
+        queryset, secret_key=create_secret_key(challenge.id),
+    )
+    serialized = await SubmissionList.from_queryset(queryset)
+
+    AssertThat(loads(document)).HasSize(1)
+    AssertThat(loads(document)).IsEqualTo(loads(serialized.json()))
+
+
+@pytest.mark.asyncio
+async def test_challenges_json_pagination() -> None:
+    """Check page document assembled from JSON built by database."""
+    for _ in range(3):
+        await populate_challenge(challenge_id=uuid4())
+
+    pagination = Paginate(limit=2, offset=0, cursor=None)
+    document: Dict[str, Any] = loads(await pagination.paginate_json(
+        queryset=Challenge.all(), fetcher=get_challenges_json,
+    ))
+    keyset_pagination = Paginate(limit=2, offset=0, cursor="")
+    keyset_document: Dict[str, Any] = loads(await keyset_pagination.paginate_json(
+        queryset=Challenge.all(), fetcher=get_challenges_json,
+    ))
+    _, keyset_items = await Paginate(limit=2, offset=0, cursor="").paginate(
+        queryset=Challenge.all(), serializer=ChallengeList,
+    )
+
+    AssertThat(document["count"]).IsEqualTo(3)
+    AssertThat(document["items"]).HasSize(2)
+    AssertThat(document["next_cursor"]).IsNone()
+    AssertThat(keyset_document["count"]).IsNone()
+    AssertThat(keyset_document["items"]).IsEqualTo(
+        [loads(item.json()) for item in keyset_items]
+    )
+    AssertThat(keyset_document["next_cursor"]).IsEqualTo(
+        keyset_pagination.next_cursor
+    )
+
+
+@pytest.mark.asyncio
+async def test_challenges_json_keyset_insert() -> None:
+    """Check challenge created while page is fetched does not shift cursor."""
+    challenges: List[Challenge] = [
+        await populate_challenge(challenge_id=uuid4()) for _ in range(3)
+    ]
+
+    async def fetch_after_insert(queryset: QuerySet[Challenge]) -> str:
+        await populate_challenge(challenge_id=uuid4())
+
+        return await get_challenges_json(queryset)
+
+    first_pagination = Paginate(limit=2, offset=0, cursor="")
+    first_page: Dict[str, Any] = loads(await first_pagination.paginate_json(
+        queryset=Challenge.all(), fetcher=fetch_after_insert,
+    ))
+    second_page: Dict[str, Any] = loads(
+        await Paginate(limit=2, offset=0, cursor=first_pagination.next_cursor)
+        .paginate_json(queryset=Challenge.all(), fetcher=get_challenges_json)
+    )
+    ids: List[str] = [item["id"] for item in first_page["items"] + second_page["items"]]
+
+    AssertThat(ids).IsEqualTo([
+        str(challenge.id) for challenge in sorted(
+            challenges,
+            key=lambda challenge: (challenge.created_at, str(challenge.id)),
+            reverse=True,
+        )
+    ])
+
+
+@pytest.mark.asyncio
+async def test_join_challenge() -> None:
+    """Check repeated join writes one participant and counts it once."""
+    challenge: Challenge = await populate_challenge()
+    user_id = uuid4()
+    await populate_user(user_id=user_id)
+
+    joined: bool = await join_challenge(challenge_id=challenge.id, user_id=user_id)
+    repeated: bool = await join_challenge(challenge_id=challenge.id, user_id=user_id)
+    participants: List[Dict[str, Any]] = await execute_sql(
+        'SELECT COUNT(*) AS "count" FROM "challenges_participants" WHERE "user_id" = $1',
+        user_id,
+    )
+    challenge = await Challenge.get(id=challenge.id)
+
+    AssertThat(joined).IsTrue()
+    AssertThat(repeated).IsFalse()
+    AssertThat(participants[0]["count"]).IsEqualTo(1)
+    # owner joined on populate
+    AssertThat(challenge.participants_count).IsEqualTo(2)
+
+
+@pytest.mark.asyncio
+async def test_challenge_header_cached() -> None:
+    """Check cached header is the same as fetched one."""
+    challenge: Challenge = await populate_challenge()
+
+    header: Optional[Dict[str, Any]] = await get_challenge_header(challenge.id)
+    cached: int = await redis_client.exists(challenge_header_key(challenge.id))
+    LocalCache.clear_all()
+    cached_header: Optional[Dict[str, Any]] = await get_challenge_header(challenge.id)
+
+    AssertThat(cached).IsEqualTo(1)
+    AssertThat(header).IsEqualTo({
+        "id": str(challenge.id),
+        "is_public": True,
+        "challenge_end": challenge.challenge_end,
+        "vote_end": challenge.vote_end,
+    })
+    AssertThat(cached_header).IsEqualTo(header)
+    AssertThat(await get_challenge_header(uuid4())).IsNone()
+
+
+@pytest.mark.asyncio
+async def test_challenge_detail_cached() -> None:
+    """Check cached challenge is the same as serialized one and dropped on join."""
+    challenge: Challenge = await populate_challenge()
+    user_id = uuid4()
+    await populate_user(user_id=user_id)
+    serialized = await ChallengeOut.from_tortoise_orm(
+        await Challenge.get(id=challenge.id)
+    )
+
+    detail = await get_challenge_detail(challenge.id)
+    cached: int = await redis_client.exists(challenge_detail_cache.key(str(challenge.id)))
+    await join_challenge(challenge_id=challenge.id, user_id=user_id)
+    joined_detail = await get_challenge_detail(challenge.id)
+
+    AssertThat(cached).IsEqualTo(1)
+    AssertThat(loads(detail.body)).IsEqualTo(loads(serialized.json()))  # type: ignore
+    AssertThat(loads(joined_detail.body)["participants_count"]).IsEqualTo(2)  # type: ignore
+    AssertThat(await get_challenge_detail(uuid4())).IsNone()
+
+
+@pytest.mark.asyncio
+async def test_challenge_stats() -> None:
+    """Check stats are the same as counts of lists."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    empty_challenge: Challenge = await populate_challenge(challenge_id=uuid4())
+    submission: Submission = await populate_submission(challenge=challenge)
+    other_submission: Submission = await populate_submission(
+        challenge=challenge, submission_id=uuid4(), user_id=uuid4(),
+    )
+    await cast_vote(challenge.id, submission.id, challenge.owner_id)  # type: ignore
+    await cast_vote(challenge.id, submission.id, other_submission.user_id)  # type: ignore
+
+    stats: Optional[Dict[str, Any]] = await get_challenge_stats(challenge.id)
+    empty_stats: Optional[Dict[str, Any]] = await get_challenge_stats(empty_challenge.id)
+
+    AssertThat(stats).IsEqualTo({
+        "participants_count": await challenge.participants.all().count(),
+        "submissions_count": 2,
+        "votes_count": await Vote.filter(challenge_id=challenge.id).count(),
+    })
+    AssertThat(empty_stats).IsEqualTo(
+        {"participants_count": 1, "submissions_count": 0, "votes_count": 0}
+    )
+    AssertThat(await get_challenge_stats(uuid4())).IsNone()
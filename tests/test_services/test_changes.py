@@ -0,0 +1,120 @@
+"""Challenges delta sync tests."""
+from typing import Any
+from typing import Dict
+from typing import Generator
+from typing import List
+from typing import Optional
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.models.db import Challenge
+from app.models.db import ChallengeTombstone
+from app.models.db import Submission
+from app.services.challenges import join_challenge
+from app.services.challenges import public_challenges_counter
+from app.services.changes import delete_challenge
+from app.services.changes import get_challenge_changes
+from tests.conftest import populate_challenge
+from tests.conftest import populate_submission
+from tests.conftest import populate_user
+
+
+@pytest.fixture(scope="function", autouse=True)
+def no_sync_lag() -> Generator:  # type: ignore
+    """Sync fresh changes in tests."""
+    with mock.patch("app.services.changes.CHANGES_SYNC_LAG", 0):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_full_sync_pages() -> None:
+    """Check full sync returns public challenges page by page."""
+    for _ in range(3):
+        await populate_challenge(challenge_id=uuid4())
+    await populate_challenge(is_public=False, challenge_id=uuid4())
+
+    first_page: Dict[str, Any] = await get_challenge_changes(cursor=None, limit=2)
+    second_page: Dict[str, Any] = await get_challenge_changes(
+        cursor=first_page["next_cursor"], limit=2,
+    )
+    ids: List[Any] = [item["id"] for item in first_page["items"] + second_page["items"]]
+
+    AssertThat(first_page["has_more"]).IsTrue()
+    AssertThat(second_page["has_more"]).IsFalse()
+    AssertThat(set(ids)).HasSize(3)
+    AssertThat(second_page["deleted"]).IsEmpty()
+
+
+@pytest.mark.asyncio
+async def test_changes_since_cursor() -> None:
+    """Check only changed and deleted challenges follow cursor."""
+    challenge: Challenge = await populate_challenge()
+    deleted: Challenge = await populate_challenge(challenge_id=uuid4())
+    await populate_submission(challenge=deleted)
+    synced: Dict[str, Any] = await get_challenge_changes(cursor=None, limit=10)
+    user_id = uuid4()
+    await populate_user(user_id=user_id)
+
+    nothing: Dict[str, Any] = await get_challenge_changes(
+        cursor=synced["next_cursor"], limit=10,
+    )
+    await join_challenge(challenge_id=challenge.id, user_id=user_id)
+    was_deleted: bool = await delete_challenge(deleted.id)
+    changes: Dict[str, Any] = await get_challenge_changes(
+        cursor=synced["next_cursor"], limit=10,
+    )
+
+    AssertThat(nothing["items"]).IsEmpty()
+    AssertThat(nothing["next_cursor"]).IsEqualTo(synced["next_cursor"])
+    AssertThat(was_deleted).IsTrue()
+    AssertThat(await delete_challenge(deleted.id)).IsFalse()
+    AssertThat([item["id"] for item in changes["items"]]).IsEqualTo([challenge.id])
+    AssertThat(changes["items"][0]["participants_count"]).IsEqualTo(2)
+    AssertThat(changes["deleted"]).IsEqualTo([str(deleted.id)])
+    AssertThat(await ChallengeTombstone.filter(id=deleted.id).exists()).IsTrue()
+    AssertThat(await Submission.filter(challenge_id=deleted.id).exists()).IsFalse()
+
+
+@pytest.mark.asyncio
+async def test_private_deleted_without_tombstone() -> None:
+    """Check private challenge is deleted without tombstone, it is not synced."""
+    private: Challenge = await populate_challenge(is_public=False, challenge_id=uuid4())
+
+    was_deleted: bool = await delete_challenge(private.id)
+
+    AssertThat(was_deleted).IsTrue()
+    AssertThat(await Challenge.filter(id=private.id).exists()).IsFalse()
+    AssertThat(await ChallengeTombstone.filter(id=private.id).exists()).IsFalse()
+
+
+@pytest.mark.asyncio
+async def test_public_deleted_count_invalidated() -> None:
+    """Check cached count of public challenges is dropped by public challenge delete."""
+    challenge: Challenge = await populate_challenge()
+    await populate_challenge(challenge_id=uuid4())
+    queryset = Challenge.filter(is_public=True)
+    count: Optional[int] = await public_challenges_counter.count(queryset)
+
+    await delete_challenge(challenge.id)
+
+    AssertThat(count).IsEqualTo(2)
+    AssertThat(await public_challenges_counter.count(queryset)).IsEqualTo(1)
+
+
+@pytest.mark.asyncio
+async def test_changes_after_sync_lag() -> None:
+    """Check changes which may be not committed yet are not synced."""
+    await populate_challenge()
+
+    with mock.patch("app.services.changes.CHANGES_SYNC_LAG", 60):
+        fresh: Dict[str, Any] = await get_challenge_changes(cursor=None, limit=10)
+
+    synced: Dict[str, Any] = await get_challenge_changes(cursor=None, limit=10)
+
+    AssertThat(fresh["items"]).IsEmpty()
+    AssertThat(fresh["next_cursor"]).IsNone()
+    AssertThat(synced["items"]).HasSize(1)
@@ -0,0 +1,114 @@
+"""Leaderboard services tests."""
+from typing import Any
+from typing import Dict
+from typing import List
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.extensions import redis_client
+from app.models.db import Challenge
+from app.models.db import Submission
+from app.services.leaderboard import add_to_leaderboard
+from app.services.leaderboard import change_leaderboard
+from app.services.leaderboard import get_rank
+from app.services.leaderboard import get_top
+from app.services.leaderboard import leaderboard_key
+from app.services.leaderboard import rebuild_leaderboard
+from app.services.votes import cast_vote
+from tests.conftest import USER_UUID
+from tests.conftest import populate_challenge
+from tests.conftest import populate_submission
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_follows_votes() -> None:
+    """Check votes and moved votes change ranks."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    other_submission: Submission = await populate_submission(
+        challenge=challenge, submission_id=uuid4(), user_id=uuid4(),
+    )
+
+    await cast_vote(
+        challenge_id=challenge.id, submission_id=submission.id, user_id=USER_UUID,
+    )
+    top: List[Dict[str, Any]] = await get_top(challenge_id=challenge.id, limit=10)
+    await cast_vote(
+        challenge_id=challenge.id, submission_id=other_submission.id, user_id=USER_UUID,
+    )
+    moved_top: List[Dict[str, Any]] = await get_top(challenge_id=challenge.id, limit=1)
+
+    AssertThat(top).IsEqualTo([
+        {"submission_id": str(submission.id), "count": 1, "rank": 1},
+        {"submission_id": str(other_submission.id), "count": 0, "rank": 2},
+    ])
+    AssertThat(moved_top).IsEqualTo(
+        [{"submission_id": str(other_submission.id), "count": 1, "rank": 1}]
+    )
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_rebuild() -> None:
+    """Check missed leaderboard is rebuilt from database counters."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    await cast_vote(
+        challenge_id=challenge.id, submission_id=submission.id, user_id=USER_UUID,
+    )
+    await redis_client.delete(leaderboard_key(challenge.id))
+
+    new_submission_id = uuid4()
+    await add_to_leaderboard(challenge_id=challenge.id, submission_id=new_submission_id)
+    rank = await get_rank(challenge_id=challenge.id, submission_id=submission.id)
+
+    AssertThat(rank).IsEqualTo(
+        {"submission_id": str(submission.id), "count": 1, "rank": 1}
+    )
+    AssertThat(
+        await get_rank(challenge_id=challenge.id, submission_id=new_submission_id)
+    ).IsNone()
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_rebuild_keeps_existing() -> None:
+    """Check rebuild does not replace existing leaderboard and its increments."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    await get_top(challenge_id=challenge.id, limit=1)
+    await redis_client.zincrby(leaderboard_key(challenge.id), 1, str(submission.id))
+
+    installed: bool = await rebuild_leaderboard(challenge.id)
+    keys: List[bytes] = await redis_client.keys(f"{leaderboard_key(challenge.id)}*")
+
+    AssertThat(installed).IsFalse()
+    AssertThat(keys).HasSize(1)
+    AssertThat(await get_top(challenge_id=challenge.id, limit=1)).IsEqualTo(
+        [{"submission_id": str(submission.id), "count": 1, "rank": 1}]
+    )
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_change_after_lost_rebuild() -> None:
+    """Check change is applied when concurrent rebuild installs older snapshot."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    key: str = leaderboard_key(challenge.id)
+    await redis_client.delete(key)
+
+    async def install_older(challenge_id: Any) -> bool:  # pylint: disable=unused-argument
+        await redis_client.zadd(key, 0, str(submission.id))
+
+        return False
+
+    with mock.patch(
+            "app.services.leaderboard.rebuild_leaderboard", side_effect=install_older,
+    ):
+        await change_leaderboard(challenge.id, {submission.id: 1})
+
+    AssertThat(await get_top(challenge_id=challenge.id, limit=1)).IsEqualTo(
+        [{"submission_id": str(submission.id), "count": 1, "rank": 1}]
+    )
@@ -0,0 +1,144 @@
+"""Challenge lifecycle services tests."""
+import time
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.extensions import redis_client
+from app.models.db import Challenge
+from app.models.db import Submission
+from app.services.leaderboard import leaderboard_key
+from app.services.lifecycle import LIFECYCLE_KEY
+from app.services.lifecycle import LIFECYCLE_PROCESSING_KEY
+from app.services.lifecycle import close_votes
+from app.services.lifecycle import lifecycle_tick
+from app.services.lifecycle import schedule_challenge
+from app.services.lifecycle import unschedule_challenge
+from app.services.results import get_results
+from app.services.vote_buffer import VOTE_BUFFER_PROCESSING_KEY
+from app.services.vote_buffer import buffer_vote
+from app.services.vote_buffer import flush_votes
+from app.services.votes import cast_vote
+from tests.conftest import USER_UUID
+from tests.conftest import populate_challenge
+from tests.conftest import populate_submission
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_tick() -> None:
+    """Check due events are handled once and future ones are kept."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    await schedule_challenge(
+        challenge_id=challenge.id,
+        challenge_end=challenge.challenge_end,
+        vote_end=challenge.vote_end,
+    )
+
+    handled: List[str] = await lifecycle_tick()
+    repeated: List[str] = await lifecycle_tick()
+    scheduled: List[str] = await redis_client.zrange(LIFECYCLE_KEY, encoding="utf-8")
+
+    AssertThat(handled).IsEqualTo([f"{challenge.id}:submissions_closed"])
+    AssertThat(repeated).IsEmpty()
+    AssertThat(scheduled).IsEqualTo([f"{challenge.id}:votes_closed"])
+    AssertThat(await redis_client.zcard(LIFECYCLE_PROCESSING_KEY)).IsEqualTo(0)
+    AssertThat(await get_results(challenge.id)).IsNone()
+
+
+@pytest.mark.asyncio
+async def test_votes_closed() -> None:
+    """Check buffered votes are drained, counters frozen and results stored."""
+    challenge: Challenge = await populate_challenge(challenge_status="end")
+    submission: Submission = await populate_submission(challenge=challenge)
+    other_submission: Submission = await populate_submission(
+        challenge=challenge, submission_id=uuid4(), user_id=uuid4(),
+    )
+    await cast_vote(
+        challenge_id=challenge.id, submission_id=submission.id, user_id=USER_UUID,
+    )
+    await buffer_vote(
+        challenge_id=challenge.id,
+        submission_id=other_submission.id,
+        user_id=USER_UUID,
+        vote_end=challenge.vote_end,
+    )
+    # counter drift is fixed by recount
+    await Submission.filter(id=submission.id).update(vote_count=5)
+    await schedule_challenge(
+        challenge_id=challenge.id,
+        challenge_end=challenge.challenge_end,
+        vote_end=challenge.vote_end,
+    )
+
+    await lifecycle_tick()
+    results: Optional[Dict[str, Any]] = await get_results(challenge.id)
+
+    AssertThat(results).IsEqualTo({
+        "winner_id": other_submission.id,
+        "votes_count": 1,
+        "ranking": [
+            {"submission_id": str(other_submission.id), "count": 1, "rank": 1},
+            {"submission_id": str(submission.id), "count": 0, "rank": 2},
+        ],
+    })
+    AssertThat(await redis_client.exists(leaderboard_key(challenge.id))).IsEqualTo(0)
+    AssertThat(await redis_client.zcard(LIFECYCLE_KEY)).IsEqualTo(0)
+
+
+@pytest.mark.asyncio
+async def test_expired_claim_handled() -> None:
+    """Check event claimed by crashed process is handled after claim deadline."""
+    challenge: Challenge = await populate_challenge(challenge_status="end")
+    event: str = f"{challenge.id}:votes_closed"
+    await redis_client.zadd(LIFECYCLE_PROCESSING_KEY, time.time() - 1, event)
+
+    handled: List[str] = await lifecycle_tick()
+
+    AssertThat(handled).IsEqualTo([event])
+    AssertThat(await redis_client.zcard(LIFECYCLE_PROCESSING_KEY)).IsEqualTo(0)
+    AssertThat(await get_results(challenge.id)).IsNotNone()
+
+
+@pytest.mark.asyncio
+async def test_claimed_event_kept() -> None:
+    """Check event claimed by working process is not taken and can be unscheduled."""
+    challenge_id = uuid4()
+    event: str = f"{challenge_id}:votes_closed"
+    await redis_client.zadd(LIFECYCLE_PROCESSING_KEY, time.time() + 60, event)
+
+    handled: List[str] = await lifecycle_tick()
+    await unschedule_challenge(challenge_id)
+
+    AssertThat(handled).IsEmpty()
+    AssertThat(await redis_client.zcard(LIFECYCLE_PROCESSING_KEY)).IsEqualTo(0)
+
+
+@pytest.mark.asyncio
+async def test_votes_closed_with_taken_batch() -> None:
+    """Check votes of batch being stored by other flush are in results."""
+    challenge: Challenge = await populate_challenge(challenge_status="end")
+    submission: Submission = await populate_submission(challenge=challenge)
+    await buffer_vote(
+        challenge_id=challenge.id,
+        submission_id=submission.id,
+        user_id=USER_UUID,
+        vote_end=challenge.vote_end,
+    )
+
+    # other worker has taken buffer and has not stored it yet
+    with mock.patch("app.services.vote_buffer.store_batch"):
+        await flush_votes()
+
+    await close_votes(challenge.id)
+    results: Optional[Dict[str, Any]] = await get_results(challenge.id)
+
+    AssertThat(results).ContainsItem("votes_count", 1)
+    AssertThat(await redis_client.zcard(VOTE_BUFFER_PROCESSING_KEY)).IsEqualTo(0)
@@ -0,0 +1,65 @@
+"""Memberships services tests."""
+from uuid import uuid4
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.extensions import redis_client
+from app.models.db import Challenge
+from app.services.challenges import join_challenge
+from app.services.memberships import BUILT_MARKER
+from app.services.memberships import get_challenge_ids
+from app.services.memberships import is_member
+from app.services.memberships import memberships_key
+from app.services.memberships import rebuild_memberships
+from tests.conftest import USER_UUID
+from tests.conftest import populate_challenge
+from tests.conftest import populate_user
+
+
+@pytest.mark.asyncio
+async def test_memberships_follow_joins() -> None:
+    """Check joined challenges are in the set and missed set is rebuilt."""
+    challenge: Challenge = await populate_challenge()
+    other_challenge: Challenge = await populate_challenge(challenge_id=uuid4())
+
+    joined_member: bool = await is_member(USER_UUID, challenge.id)
+    await redis_client.delete(memberships_key(USER_UUID))
+    rebuilt_ids = await get_challenge_ids(USER_UUID)
+
+    AssertThat(joined_member).IsTrue()
+    AssertThat(rebuilt_ids).ContainsExactly(str(challenge.id), str(other_challenge.id))
+    AssertThat(await is_member(USER_UUID, uuid4())).IsFalse()
+
+
+@pytest.mark.asyncio
+async def test_memberships_without_challenges() -> None:
+    """Check set of user without challenges is built once and joins are added."""
+    challenge: Challenge = await populate_challenge()
+    user_id = uuid4()
+    await populate_user(user_id=user_id)
+
+    empty_ids = await get_challenge_ids(user_id)
+    built: int = await redis_client.exists(memberships_key(user_id))
+    await join_challenge(challenge_id=challenge.id, user_id=user_id)
+
+    AssertThat(empty_ids).IsEmpty()
+    AssertThat(built).IsEqualTo(1)
+    AssertThat(await get_challenge_ids(user_id)).IsEqualTo([str(challenge.id)])
+
+
+@pytest.mark.asyncio
+async def test_memberships_rebuild_keeps_joins() -> None:
+    """Check rebuild does not drop member added while set is rebuilt and sets expire."""
+    challenge: Challenge = await populate_challenge()
+    user_id = uuid4()
+    await populate_user(user_id=user_id)
+    key: str = memberships_key(user_id)
+
+    # join is applied to the set before stale rebuild writes its members
+    await redis_client.sadd(key, BUILT_MARKER, str(challenge.id))
+    await rebuild_memberships(user_id)
+
+    AssertThat(await get_challenge_ids(user_id)).IsEqualTo([str(challenge.id)])
+    AssertThat(await redis_client.ttl(key)).IsGreaterThan(0)
@@ -0,0 +1,37 @@
+"""Challenge results services tests."""
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.models.db import Challenge
+from app.models.db import ChallengeResult
+from app.models.db import Submission
+from app.services.results import get_results
+from app.services.results import store_results
+from tests.conftest import populate_challenge
+from tests.conftest import populate_submission
+
+
+@pytest.mark.asyncio
+async def test_store_results() -> None:
+    """Check results are replaced on repeated store and have no winner without votes."""
+    challenge: Challenge = await populate_challenge(challenge_status="end")
+    submission: Submission = await populate_submission(challenge=challenge)
+
+    missed_results: Optional[Dict[str, Any]] = await get_results(challenge.id)
+    await store_results(challenge.id)
+    stored: Dict[str, Any] = await store_results(challenge.id)
+    results: Optional[Dict[str, Any]] = await get_results(challenge.id)
+
+    AssertThat(missed_results).IsNone()
+    AssertThat(results).IsEqualTo(stored)
+    AssertThat(stored).IsEqualTo({
+        "winner_id": None,
+        "votes_count": 0,
+        "ranking": [{"submission_id": str(submission.id), "count": 0, "rank": 1}],
+    })
+    AssertThat(await ChallengeResult.all().count()).IsEqualTo(1)
@@ -0,0 +1,85 @@
+"""Search services tests."""
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from uuid import UUID
+from uuid import uuid4
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.models.db import Challenge
+from app.models.db import Track
+from app.services.search import decode_search_cursor
+from app.services.search import search_challenges
+from app.services.search import search_tracks
+from app.utils.exceptions import BadRequestError
+from tests.conftest import populate_challenge
+
+
+async def populate_named_challenge(name: str, is_public: bool = True) -> UUID:
+    """Populate challenge with name."""
+    challenge: Challenge = await populate_challenge(
+        is_public=is_public, challenge_id=uuid4(),
+    )
+    await Challenge.filter(id=challenge.id).update(name=name)
+
+    return challenge.id
+
+
+@pytest.mark.asyncio
+async def test_search_challenges_ranked() -> None:
+    """Check matched public challenges are ranked and private ones are skipped."""
+    prefix_id: UUID = await populate_named_challenge("Summer beats")
+    inner_id: UUID = await populate_named_challenge("Hot summer")
+    await populate_named_challenge("Summer secret", is_public=False)
+    await populate_named_challenge("Winter")
+
+    items, next_cursor = await search_challenges(text="summer", limit=10)
+
+    AssertThat([item["id"] for item in items]).IsEqualTo([prefix_id, inner_id])
+    AssertThat(items[0]["owner"]).IsNotNone()
+    AssertThat(next_cursor).IsNone()
+
+
+@pytest.mark.asyncio
+async def test_search_challenges_keyset() -> None:
+    """Check pages by cursor cover all matches once."""
+    for _ in range(5):
+        await populate_named_challenge("Summer")
+
+    first_page, cursor = await search_challenges(text="summer", limit=3)
+    second_page, last_cursor = await search_challenges(
+        text="summer", limit=3, cursor=cursor,
+    )
+    ids: List[Any] = [item["id"] for item in first_page + second_page]
+
+    AssertThat(first_page).HasSize(3)
+    AssertThat(cursor).IsNotNone()
+    AssertThat(second_page).HasSize(2)
+    AssertThat(last_cursor).IsNone()
+    AssertThat(set(ids)).HasSize(5)
+
+
+@pytest.mark.asyncio
+async def test_search_tracks() -> None:
+    """Check tracks are matched by name and author name."""
+    by_name: Track = await Track.create(name="Night drive", author_name="Band", meta={})
+    by_author: Track = await Track.create(name="Song", author_name="Nightwish", meta={})
+    await Track.create(name="Day", author_name=None, meta={})
+
+    items, _ = await search_tracks(text="NIGHT", limit=10)
+    missed: List[Dict[str, Any]] = (await search_tracks(text="evening", limit=10))[0]
+
+    AssertThat([item["id"] for item in items]).ContainsExactly(by_name.id, by_author.id)
+    AssertThat(missed).IsEmpty()
+
+
+def test_decode_search_cursor_invalid() -> None:
+    """Check broken cursor is bad request."""
+    cursor: Optional[str] = "trash"
+
+    with AssertThat(BadRequestError).IsRaised():
+        decode_search_cursor(cursor)  # type: ignore
@@ -0,0 +1,110 @@
+"""Tracks suggest index tests."""
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from typing import Dict
+from typing import List
+from uuid import uuid4
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.models.db import Track
+from app.services.suggest import TrackSuggestIndex
+from app.services.suggest import normalize
+
+
+def make_track(name: str, author_name: str) -> Dict[str, Any]:
+    """Track dict for index."""
+    return {
+        "id": uuid4(),
+        "created_at": datetime.utcnow(),
+        "name": name,
+        "author_name": author_name,
+        "cover_url": None,
+    }
+
+
+def test_normalize() -> None:
+    """Check case, accents and spaces are ignored."""
+    AssertThat(normalize("  Beyoncé   HALO ")).IsEqualTo("beyonce halo")
+    AssertThat(normalize(None)).IsEqualTo("")
+
+
+def test_suggest_prefix() -> None:
+    """Check tracks are found by author and name prefixes once."""
+    index = TrackSuggestIndex()
+    halo: Dict[str, Any] = make_track("Halo", "Beyoncé")
+    hello: Dict[str, Any] = make_track("Hello", "Adele")
+    index.extend([halo, hello, make_track("Rolling", "Adele")])
+
+    by_name: List[Dict[str, Any]] = index.suggest("hal", limit=10)
+    by_author: List[Dict[str, Any]] = index.suggest("BEYONCE - H", limit=10)
+    limited: List[Dict[str, Any]] = index.suggest("adele", limit=1)
+
+    AssertThat([item["id"] for item in by_name]).IsEqualTo([str(halo["id"])])
+    AssertThat([item["id"] for item in by_author]).IsEqualTo([str(halo["id"])])
+    AssertThat([item["id"] for item in index.suggest("h", limit=10)]).IsEqualTo(
+        [str(halo["id"]), str(hello["id"])]
+    )
+    AssertThat(limited).HasSize(1)
+    AssertThat(index.suggest("queen", limit=10)).IsEmpty()
+    AssertThat(index.suggest(" ", limit=10)).IsEmpty()
+
+
+def test_suggest_replace() -> None:
+    """Check re-added track replaces its keys."""
+    index = TrackSuggestIndex()
+    track: Dict[str, Any] = make_track("Halo", "Beyoncé")
+    index.add(track)
+    index.add({**track, "name": "Crazy"})
+
+    AssertThat(index.suggest("halo", limit=10)).IsEmpty()
+    AssertThat(index.suggest("crazy", limit=10)).HasSize(1)
+    AssertThat(index.entries).HasSize(2)
+
+
+def test_suggest_extend_replace() -> None:
+    """Check batch keeps entries sorted and replaces indexed and repeated tracks."""
+    index = TrackSuggestIndex()
+    track: Dict[str, Any] = make_track("Halo", "Beyoncé")
+    other_track: Dict[str, Any] = make_track("Hello", "Adele")
+    index.add(track)
+    index.extend([
+        {**track, "name": "Crazy"},
+        other_track,
+        {**other_track, "name": "Skyfall"},
+    ])
+
+    AssertThat(index.entries).IsEqualTo(sorted(index.entries))
+    AssertThat(index.entries).HasSize(4)
+    AssertThat(index.suggest("halo", limit=10)).IsEmpty()
+    AssertThat(index.suggest("hello", limit=10)).IsEmpty()
+    AssertThat(
+        [item["name"] for item in index.suggest("adele", limit=10)]
+    ).IsEqualTo(["Skyfall"])
+
+
+@pytest.mark.asyncio
+async def test_suggest_refresh() -> None:
+    """Check index is built from recommended tracks and refreshed by new ones."""
+    index = TrackSuggestIndex()
+    await Track.create(name="Halo", author_name="Beyoncé", recommended=True, meta={})
+    await Track.create(name="Hidden", author_name="Band", recommended=False, meta={})
+
+    built: int = await index.refresh()
+    await Track.create(
+        name="Hello",
+        author_name="Adele",
+        recommended=True,
+        meta={},
+        created_at=datetime.utcnow() + timedelta(seconds=1),
+    )
+    await index.refresh()
+
+    AssertThat(built).IsEqualTo(1)
+    AssertThat(index.suggest("hid", limit=10)).IsEmpty()
+    AssertThat(
+        [item["name"] for item in index.suggest("h", limit=10)]
+    ).IsEqualTo(["Halo", "Hello"])
@@ -0,0 +1,173 @@
+"""Votes tallies services tests."""
+import asyncio
+
+from typing import AsyncGenerator
+from typing import List
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from orjson import loads  # pylint: disable-msg=E0611
+from truth.truth import AssertThat  # type: ignore
+
+from app.extensions import redis_client
+from app.models.db import Challenge
+from app.models.db import Submission
+from app.services.leaderboard import leaderboard_key
+from app.services.lifecycle import close_votes
+from app.services.tallies import CLOSE_EVENT
+from app.services.tallies import TalliesStream
+from app.services.tallies import get_tallies_event
+from app.services.tallies import publish_tallies
+from app.services.tallies import stream_tallies
+from app.services.tallies import subscribe_tallies
+from app.services.tallies import tallies_streams
+from app.services.tallies import unsubscribe_tallies
+from app.services.votes import cast_vote
+from tests.conftest import USER_UUID
+from tests.conftest import populate_challenge
+from tests.conftest import populate_submission
+from tests.conftest import populate_user
+
+
+def parse_event(event: bytes) -> dict:  # type: ignore
+    """Get data of tallies event."""
+    name, data = event.decode("utf-8").strip().split("\n")
+
+    AssertThat(name).IsEqualTo("event: tallies")
+
+    return loads(data[len("data: "):])
+
+
+@pytest.mark.asyncio
+async def test_tallies_coalesced() -> None:
+    """Check votes changes are sent as one event with current counts."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    other_user_id = uuid4()
+    await populate_user(user_id=other_user_id)
+
+    queue: asyncio.Queue = await subscribe_tallies(challenge.id)  # type: ignore
+    await cast_vote(
+        challenge_id=challenge.id, submission_id=submission.id, user_id=USER_UUID,
+    )
+    await cast_vote(
+        challenge_id=challenge.id, submission_id=submission.id, user_id=other_user_id,
+    )
+    event: bytes = await asyncio.wait_for(queue.get(), 2)
+    await unsubscribe_tallies(challenge.id, queue)
+
+    AssertThat(parse_event(event)).IsEqualTo(
+        {"items": [{"submission_id": str(submission.id), "count": 2}]}
+    )
+    AssertThat(queue.empty()).IsTrue()
+    AssertThat(tallies_streams).DoesNotContainKey(str(challenge.id))
+
+
+@pytest.mark.asyncio
+async def test_stream_tallies() -> None:
+    """Check stream starts with all counts and stops on disconnect."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    other_submission: Submission = await populate_submission(
+        challenge=challenge, submission_id=uuid4(), user_id=uuid4(),
+    )
+    await cast_vote(
+        challenge_id=challenge.id, submission_id=submission.id, user_id=USER_UUID,
+    )
+
+    async def is_disconnected() -> bool:
+        return True
+
+    stream: AsyncGenerator[bytes, None] = stream_tallies(challenge.id, is_disconnected)
+    events: List[bytes] = [event async for event in stream]
+    items: List[dict] = parse_event(events[0])["items"]  # type: ignore
+
+    AssertThat(events).HasSize(1)
+    AssertThat(items).ContainsExactly(
+        {"submission_id": str(other_submission.id), "count": 0},
+        {"submission_id": str(submission.id), "count": 1},
+    )
+    AssertThat(tallies_streams).DoesNotContainKey(str(challenge.id))
+
+
+@pytest.mark.asyncio
+async def test_tallies_event_error() -> None:
+    """Check event error is logged and stream keeps reading changes."""
+    challenge_id = uuid4()
+
+    with mock.patch("app.services.tallies.TALLY_STREAM_INTERVAL", 0):
+        queue: asyncio.Queue = await subscribe_tallies(challenge_id)  # type: ignore
+
+    with mock.patch(
+        "app.services.tallies.get_tallies_event",
+        side_effect=[ValueError("event error"), b"event"],
+    ), pytest.warns(UserWarning, match="event error"):
+        await publish_tallies(challenge_id, ["first"])
+        await asyncio.sleep(0.1)
+        await publish_tallies(challenge_id, ["second"])
+        event: bytes = await asyncio.wait_for(queue.get(), 2)
+
+    await unsubscribe_tallies(challenge_id, queue)
+
+    AssertThat(event).IsEqualTo(b"event")
+
+
+@pytest.mark.asyncio
+async def test_subscribe_while_last_unsubscribes() -> None:
+    """Check connection subscribed while stream stops gets events of a new stream."""
+    challenge_id = uuid4()
+    stop = TalliesStream.stop
+
+    async def slow_stop(stream: TalliesStream) -> None:
+        await asyncio.sleep(0.05)
+        await stop(stream)
+
+    with mock.patch("app.services.tallies.TALLY_STREAM_INTERVAL", 0), \
+            mock.patch.object(TalliesStream, "stop", slow_stop):
+        queue: asyncio.Queue = await subscribe_tallies(challenge_id)  # type: ignore
+        _, new_queue = await asyncio.gather(
+            unsubscribe_tallies(challenge_id, queue), subscribe_tallies(challenge_id),
+        )
+
+    with mock.patch("app.services.tallies.get_tallies_event", return_value=b"event"):
+        await publish_tallies(challenge_id, ["first"])
+        event: bytes = await asyncio.wait_for(new_queue.get(), 1)
+
+    await unsubscribe_tallies(challenge_id, new_queue)
+
+    AssertThat(event).IsEqualTo(b"event")
+    AssertThat(tallies_streams).DoesNotContainKey(str(challenge_id))
+
+
+def test_slow_connection_dropped() -> None:
+    """Check connection which queue is full is dropped with close event."""
+    stream = TalliesStream(challenge_id=uuid4(), interval=0)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2)  # type: ignore
+    stream.queues.add(queue)
+
+    for event in (b"first", b"second", b"third"):
+        stream.send(event)
+
+    AssertThat(stream.queues).IsEmpty()
+    AssertThat(queue.qsize()).IsEqualTo(1)
+    AssertThat(queue.get_nowait()).IsEqualTo(CLOSE_EVENT)
+
+
+@pytest.mark.asyncio
+async def test_closed_tallies_from_results() -> None:
+    """Check closed challenge event is built from results without leaderboard."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    await cast_vote(
+        challenge_id=challenge.id, submission_id=submission.id, user_id=USER_UUID,
+    )
+    await close_votes(challenge.id)
+
+    event: bytes = await get_tallies_event(challenge.id, [str(submission.id)])
+
+    AssertThat(parse_event(event)).IsEqualTo(
+        {"items": [{"submission_id": str(submission.id), "count": 1}]}
+    )
+    AssertThat(await redis_client.exists(leaderboard_key(challenge.id))).IsEqualTo(0)
@@ -0,0 +1,111 @@
+"""Votes buffer services tests."""
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from typing import Dict
+from typing import List
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.extensions import redis_client
+from app.models.db import Challenge
+from app.models.db import Submission
+from app.models.db import Vote
+from app.services.vote_buffer import VOTE_BUFFER_DEADLINES_KEY
+from app.services.vote_buffer import VOTE_BUFFER_PROCESSING_KEY
+from app.services.vote_buffer import buffer_vote
+from app.services.vote_buffer import flush_tick
+from app.services.vote_buffer import flush_votes
+from app.services.vote_buffer import get_buffer_stats
+from tests.conftest import USER_UUID
+from tests.conftest import populate_challenge
+from tests.conftest import populate_submission
+
+
+@pytest.mark.asyncio
+async def test_flush_votes() -> None:
+    """Check last buffered vote of user is stored with counters on flush."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    other_submission: Submission = await populate_submission(
+        challenge=challenge, submission_id=uuid4(), user_id=uuid4(),
+    )
+
+    vote: Dict[str, Any] = await buffer_vote(
+        challenge_id=challenge.id,
+        submission_id=submission.id,
+        user_id=USER_UUID,
+        vote_end=challenge.vote_end,
+    )
+    await buffer_vote(
+        challenge_id=challenge.id,
+        submission_id=other_submission.id,
+        user_id=USER_UUID,
+        vote_end=challenge.vote_end,
+    )
+    buffered_stats: Dict[str, Any] = await get_buffer_stats()
+    buffered_votes: int = await Vote.all().count()
+    stored: int = await flush_votes()
+    stored_vote: Vote = await Vote.get(user_id=USER_UUID)
+    other_submission = await Submission.get(id=other_submission.id)
+
+    AssertThat(buffered_stats["pending"]).IsEqualTo(1)
+    AssertThat(buffered_stats["lag_ms"]).IsAtLeast(0)
+    AssertThat(buffered_votes).IsEqualTo(0)
+    AssertThat(stored).IsEqualTo(1)
+    AssertThat(stored_vote.id).IsEqualTo(vote["id"])
+    AssertThat(stored_vote.submission_id).IsEqualTo(other_submission.id)  # type: ignore
+    AssertThat(other_submission.vote_count).IsEqualTo(1)
+    AssertThat(await get_buffer_stats()).ContainsItem("pending", 0)
+    AssertThat(await flush_votes()).IsEqualTo(0)
+
+
+@pytest.mark.asyncio
+async def test_flush_tick_drains_ended() -> None:
+    """Check buffer is drained and deadline is dropped after vote end."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+
+    await buffer_vote(
+        challenge_id=challenge.id,
+        submission_id=submission.id,
+        user_id=USER_UUID,
+        vote_end=datetime.utcnow() - timedelta(seconds=1),
+    )
+    stored: int = await flush_tick()
+
+    AssertThat(stored).IsEqualTo(1)
+    AssertThat(await redis_client.zcard(VOTE_BUFFER_DEADLINES_KEY)).IsEqualTo(0)
+    AssertThat(await Vote.all().count()).IsEqualTo(1)
+
+
+@pytest.mark.asyncio
+async def test_crashed_flush_batch_stored() -> None:
+    """Check batch of flush which died before storing is stored after claim expiry."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    await buffer_vote(
+        challenge_id=challenge.id,
+        submission_id=submission.id,
+        user_id=USER_UUID,
+        vote_end=challenge.vote_end,
+    )
+
+    with mock.patch("app.services.vote_buffer.store_batch", side_effect=SystemExit):
+        with AssertThat(SystemExit).IsRaised():
+            await flush_votes()
+
+    claimed_stored: int = await flush_tick()
+    batches: List[bytes] = await redis_client.zrange(VOTE_BUFFER_PROCESSING_KEY)
+    await redis_client.zadd(VOTE_BUFFER_PROCESSING_KEY, 0, batches[0])
+    stored: int = await flush_tick()
+
+    AssertThat(claimed_stored).IsEqualTo(0)
+    AssertThat(stored).IsEqualTo(1)
+    AssertThat(await Vote.all().count()).IsEqualTo(1)
+    AssertThat(await redis_client.zcard(VOTE_BUFFER_PROCESSING_KEY)).IsEqualTo(0)
+    AssertThat(await redis_client.exists(batches[0])).IsEqualTo(0)
@@ -0,0 +1,99 @@
+"""Votes services tests."""
+from asyncio import gather
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from typing import Dict
+from typing import List
+from uuid import uuid4
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.models.db import Challenge
+from app.models.db import Submission
+from app.models.db import Vote
+from app.services.votes import cast_vote
+from app.services.votes import store_votes
+from tests.conftest import USER_UUID
+from tests.conftest import populate_challenge
+from tests.conftest import populate_submission
+
+
+async def get_vote_counts(*submissions: Submission) -> List[int]:
+    """Get stored votes counters of submissions."""
+    return [
+        (await Submission.get(id=submission.id)).vote_count
+        for submission in submissions
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cast_vote() -> None:
+    """Check vote counter is changed on create and move only."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    other_submission: Submission = await populate_submission(
+        challenge=challenge, submission_id=uuid4(), user_id=uuid4(),
+    )
+
+    vote: Dict[str, Any] = await cast_vote(
+        challenge_id=challenge.id, submission_id=submission.id, user_id=USER_UUID,
+    )
+    created_counts: List[int] = await get_vote_counts(submission, other_submission)
+    await cast_vote(
+        challenge_id=challenge.id, submission_id=submission.id, user_id=USER_UUID,
+    )
+    repeated_counts: List[int] = await get_vote_counts(submission, other_submission)
+    moved_vote: Dict[str, Any] = await cast_vote(
+        challenge_id=challenge.id, submission_id=other_submission.id, user_id=USER_UUID,
+    )
+    moved_counts: List[int] = await get_vote_counts(submission, other_submission)
+    stored_vote: Vote = await Vote.get(user_id=USER_UUID)
+
+    AssertThat(created_counts).IsEqualTo([1, 0])
+    AssertThat(repeated_counts).IsEqualTo([1, 0])
+    AssertThat(moved_counts).IsEqualTo([0, 1])
+    AssertThat(str(moved_vote["id"])).IsEqualTo(str(vote["id"]))
+    AssertThat(stored_vote.challenge_id).IsEqualTo(challenge.id)  # type: ignore
+    AssertThat(stored_vote.submission_id).IsEqualTo(other_submission.id)  # type: ignore
+    AssertThat(await Vote.all().count()).IsEqualTo(1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_votes() -> None:
+    """Check concurrent votes of one user make one vote."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+
+    await gather(*[
+        cast_vote(
+            challenge_id=challenge.id, submission_id=submission.id, user_id=USER_UUID,
+        )
+        for _ in range(5)
+    ])
+
+    AssertThat(await Vote.all().count()).IsEqualTo(1)
+    AssertThat(await get_vote_counts(submission)).IsEqualTo([1])
+
+
+@pytest.mark.asyncio
+async def test_older_vote_skipped() -> None:
+    """Check out of order stored vote does not replace newer one."""
+    challenge: Challenge = await populate_challenge(challenge_status="vote")
+    submission: Submission = await populate_submission(challenge=challenge)
+    other_submission: Submission = await populate_submission(
+        challenge=challenge, submission_id=uuid4(), user_id=uuid4(),
+    )
+    vote_time: datetime = datetime.utcnow()
+
+    await store_votes([(challenge.id, submission.id, USER_UUID, vote_time)])
+    rows: List[Dict[str, Any]] = await store_votes([(
+        challenge.id, other_submission.id, USER_UUID, vote_time - timedelta(seconds=1),
+    )])
+    stored_vote: Vote = await Vote.get(user_id=USER_UUID)
+
+    AssertThat(rows).IsEmpty()
+    AssertThat(stored_vote.submission_id).IsEqualTo(submission.id)  # type: ignore
+    AssertThat(await get_vote_counts(submission, other_submission)).IsEqualTo([1, 0])
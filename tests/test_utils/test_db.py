@@ -0,0 +1,207 @@
+"""Database utils tests."""
+import logging
+
+from datetime import datetime
+from typing import Dict
+from typing import List
+from typing import Optional
+from unittest import mock
+from uuid import UUID
+from uuid import uuid4
+
+import pytest
+
+from orjson import dumps  # pylint: disable-msg=E0611
+from tortoise import QuerySet
+from tortoise.backends.base.client import Capabilities
+from tortoise.contrib.pydantic import PydanticModel
+from truth.truth import AssertThat  # type: ignore
+
+from app.models.api.challenge import ChallengeList
+from app.models.db import Challenge
+from app.utils.db import CachedCounter
+from app.utils.db import Counter
+from app.utils.db import EstimatedCounter
+from app.utils.db import Paginate
+from app.utils.db import decode_cursor
+from app.utils.db import encode_cursor
+from app.utils.exceptions import BadRequestError
+from tests.conftest import populate_challenge
+
+
+def test_cursor_encode_decode() -> None:
+    """Check cursor keeps keyset position."""
+    created_at: datetime = datetime.utcnow()
+    item_id = uuid4()
+
+    cursor: str = encode_cursor(created_at=created_at, item_id=item_id)
+
+    AssertThat(decode_cursor(cursor)).IsEqualTo((created_at, item_id))
+
+
+@pytest.mark.parametrize(  # pylint: disable=not-callable
+    "cursor", ["trash", "W10=", encode_cursor(datetime.utcnow(), uuid4())[:-4]]
+)
+def test_cursor_decode_invalid(cursor: str) -> None:
+    """Check invalid cursor raises bad request."""
+    with AssertThat(BadRequestError).IsRaised():
+        decode_cursor(cursor)
+
+
+@pytest.mark.asyncio
+async def test_paginate_keyset() -> None:
+    """Check keyset pagination walks through all items without count."""
+    challenges: List[Challenge] = [
+        await populate_challenge(challenge_id=uuid4()) for _ in range(3)
+    ]
+    expected_ids = [
+        challenge.id for challenge in sorted(
+            challenges,
+            key=lambda challenge: (challenge.created_at, str(challenge.id)),
+            reverse=True,
+        )
+    ]
+    cursor: Optional[str] = ""
+    result_ids: List[UUID] = []
+
+    while cursor is not None:
+        pagination = Paginate(limit=2, offset=0, cursor=cursor)
+        count, items = await pagination.paginate(
+            queryset=Challenge.all(), serializer=ChallengeList,
+        )
+        AssertThat(count).IsNone()
+        result_ids.extend(item.dict()["id"] for item in items)
+        cursor = pagination.next_cursor
+
+    AssertThat(result_ids).IsEqualTo(expected_ids)
+
+
+@pytest.mark.asyncio
+async def test_paginate_offset(challenge_process_fixture: Challenge) -> None:
+    """Check offset pagination returns count."""
+    pagination = Paginate(limit=2, offset=0, cursor=None)
+    count, items = await pagination.paginate(
+        queryset=Challenge.all(), serializer=ChallengeList,
+    )
+    first_item: PydanticModel = items[0]
+
+    AssertThat(count).IsEqualTo(1)
+    AssertThat(first_item.id).IsEqualTo(challenge_process_fixture.id)  # type: ignore
+    AssertThat(pagination.next_cursor).IsNone()
+
+
+@pytest.mark.asyncio
+async def test_paginate_without_count(
+        challenge_process_fixture: Challenge,  # pylint: disable=unused-argument
+) -> None:
+    """Check count is skipped when it is not requested."""
+    pagination = Paginate(limit=2, offset=0, cursor=None, with_count=False)
+    count, items = await pagination.paginate(
+        queryset=Challenge.all(), serializer=ChallengeList,
+    )
+
+    AssertThat(count).IsNone()
+    AssertThat(items).HasSize(1)
+
+
+@pytest.mark.asyncio
+async def test_counter_abstract() -> None:
+    """Check base counter has no strategy."""
+    with AssertThat(TypeError).IsRaised():
+        Counter()  # type: ignore  # pylint: disable=abstract-class-instantiated
+
+
+@pytest.mark.asyncio
+async def test_cached_counter(
+        challenge_process_fixture: Challenge,  # pylint: disable=unused-argument
+) -> None:
+    """Check cached count is used until invalidation."""
+    counter = CachedCounter(key="test:count")
+
+    AssertThat(await counter.count(queryset=Challenge.all())).IsEqualTo(1)
+
+    await populate_challenge(challenge_id=uuid4())
+
+    AssertThat(await counter.count(queryset=Challenge.all())).IsEqualTo(1)
+
+    await counter.invalidate()
+
+    AssertThat(await counter.count(queryset=Challenge.all())).IsEqualTo(2)
+
+
+@pytest.mark.asyncio
+async def test_estimated_counter_fallback(
+        challenge_process_fixture: Challenge,  # pylint: disable=unused-argument
+) -> None:
+    """Check estimated counter uses exact count when it is not postgres."""
+    counter = EstimatedCounter()
+
+    AssertThat(await counter.count(queryset=Challenge.all())).IsEqualTo(1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # pylint: disable=not-callable
+    "estimate,expected_count", [(5000, 5000), (10, 1)]
+)
+async def test_estimated_counter_postgres(
+        estimate: int,
+        expected_count: int,
+        challenge_process_fixture: Challenge,  # pylint: disable=unused-argument
+) -> None:
+    """Check planner estimate is used for big postgres tables only."""
+    counter = EstimatedCounter(threshold=1000)
+    plan: List[Dict[str, str]] = [
+        {"QUERY PLAN": dumps([{"Plan": {"Plan Rows": estimate}}]).decode("utf-8")}
+    ]
+
+    with mock.patch.object(
+            Challenge._meta.db,  # pylint: disable=protected-access
+            "capabilities",
+            Capabilities(dialect="postgres"),
+    ), mock.patch.object(QuerySet, "explain", return_value=plan):
+        count: Optional[int] = await counter.count(queryset=Challenge.all())
+
+    AssertThat(count).IsEqualTo(expected_count)
+
+
+class QueryCounter(logging.Handler):
+    """Count executed queries by tortoise db client logs."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.count: int = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.count += 1
+
+
+async def count_page_queries(limit: int) -> int:
+    """Count queries of challenges page."""
+    for _ in range(limit):
+        await populate_challenge(user_id=None, challenge_id=uuid4())
+
+    query_counter = QueryCounter()
+    logger: logging.Logger = logging.getLogger("db_client")
+    level: int = logger.level
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(query_counter)
+    pagination = Paginate(limit=limit, offset=0, cursor=None, with_count=False)
+
+    try:
+        _, items = await pagination.paginate(
+            queryset=Challenge.all(), serializer=ChallengeList,
+        )
+    finally:
+        logger.removeHandler(query_counter)
+        logger.setLevel(level)
+
+    AssertThat(items).HasSize(limit)
+
+    return query_counter.count
+
+
+@pytest.mark.asyncio
+async def test_paginate_constant_queries() -> None:
+    """Check page costs one query per relation whatever page size is."""
+    AssertThat(await count_page_queries(limit=2)).IsEqualTo(3)
+    AssertThat(await count_page_queries(limit=20)).IsEqualTo(3)
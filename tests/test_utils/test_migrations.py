@@ -0,0 +1,139 @@
+"""Migrations tests."""
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from tortoise import QuerySet
+from truth.truth import AssertThat  # type: ignore
+
+from app.models.db import AuthAccount
+from app.models.db import Challenge
+from app.models.db import Submission
+from app.models.db import Track
+from app.models.db import User
+from app.models.db import Vote
+from app.models.db.user import AuthProvider
+from app.utils.db import execute_sql
+from app.utils.migrations import apply_migrations
+from app.utils.migrations import concurrent_index_name
+from app.utils.migrations import create_index
+from app.utils.migrations import drop_invalid_index
+from app.utils.migrations import user_profile_backfill
+from tests.test_services.test_auth.test_base import USER_UUID
+
+
+@pytest.mark.asyncio
+async def test_apply_migrations_once() -> None:
+    """Check applied migrations are skipped, they are applied in test_db fixture."""
+    versions: List[int] = await apply_migrations()
+
+    AssertThat(versions).IsEmpty()
+
+
+def test_create_index_concurrently() -> None:
+    """Check postgres index is created without write lock."""
+    statement: str = create_index(
+        name="idx", table="table", columns='"id"', where='"id" > 0', concurrently=True,
+    )
+
+    AssertThat(statement).IsEqualTo(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx" ON "table" ("id") WHERE "id" > 0'
+    )
+
+
+def test_concurrent_index_name() -> None:
+    """Check invalid index is looked up for concurrent builds only."""
+    concurrent: str = create_index(
+        name="idx", table="table", columns='"id"', unique=True, concurrently=True,
+    )
+    locking: str = create_index(name="idx", table="table", columns='"id"')
+
+    AssertThat(concurrent_index_name(concurrent)).IsEqualTo("idx")
+    AssertThat(concurrent_index_name(locking)).IsNone()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # pylint: disable=not-callable
+    "rows,dropped", [([{"invalid": 1}], True), ([], False)]
+)
+async def test_drop_invalid_index(rows: List[Dict[str, int]], dropped: bool) -> None:
+    """Check only invalid index is dropped before concurrent build."""
+    connection = mock.Mock(execute_script=mock.AsyncMock())
+
+    with mock.patch("app.utils.migrations.execute_sql", return_value=rows):
+        result: bool = await drop_invalid_index(connection, "idx")
+
+    AssertThat(result).IsEqualTo(dropped)
+    AssertThat(connection.execute_script.called).IsEqualTo(dropped)
+
+
+index_usage: List[Any] = [
+    (
+        lambda: Challenge.filter(is_public=True).order_by("-created_at", "-id"),
+        "idx_challenge_public_created",
+    ),
+    (lambda: Challenge.filter(owner_id=USER_UUID), "idx_challenge_owner_created"),
+    (
+        lambda: Submission.filter(challenge_id=uuid4()).order_by("-created_at", "-id"),
+        "idx_submission_challenge_created",
+    ),
+    (
+        lambda: Submission.filter(challenge_id=uuid4()).only("challenge_id", "vote_count"),
+        "COVERING INDEX idx_submission_challenge_votes",
+    ),
+    # unique (challenge_id, user_id) index
+    (
+        lambda: Submission.filter(challenge_id=uuid4(), user_id=USER_UUID),
+        "(challenge_id=? AND user_id=?)",
+    ),
+    (
+        lambda: Challenge.filter(is_public=True).order_by("updated_at", "id"),
+        "idx_challenge_public_updated",
+    ),
+    (lambda: Vote.filter(submission_id=uuid4()), "idx_vote_submission"),
+    (lambda: AuthAccount.filter(_id="test"), "idx_authaccount_external_id"),
+    (
+        lambda: Track.filter(recommended=True, preview_url__isnull=False),
+        "idx_track_recommended_preview",
+    ),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(  # pylint: disable=not-callable
+    "queryset_factory,index_name", index_usage
+)
+async def test_index_usage(
+        queryset_factory: Callable[[], QuerySet[Any]], index_name: str,
+) -> None:
+    """Check hot queries use indexes via EXPLAIN."""
+    plan: List[Any] = await queryset_factory().explain()
+    details: str = " ".join(str(row["detail"]) for row in plan)
+
+    AssertThat(details).Contains(index_name)
+
+
+@pytest.mark.asyncio
+async def test_user_profile_backfill() -> None:
+    """Check profile fields are copied from the last auth account of existing users."""
+    user: User = await User.create()
+    for name, provider in (("first", AuthProvider.VK), ("last", AuthProvider.GOOGLE)):
+        await AuthAccount.create(
+            _id=name, name=name, image=name, url=name, provider=provider, user=user,
+        )
+    empty_user: User = await User.create()
+
+    await execute_sql(user_profile_backfill(is_postgres=False))
+    user = await User.get(id=user.id)
+    empty_user = await User.get(id=empty_user.id)
+
+    AssertThat(user.name).IsEqualTo("last")
+    AssertThat(user.url).IsEqualTo("last")
+    AssertThat(user.providers).IsEqualTo(["VK", "GOOGLE"])
+    AssertThat(empty_user.name).IsNone()
+    AssertThat(empty_user.providers).IsEqualTo([])
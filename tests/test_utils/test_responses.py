@@ -0,0 +1,123 @@
+"""Responses utils tests."""
+from datetime import datetime
+from typing import Dict
+from typing import Optional
+from uuid import uuid4
+
+import pytest
+
+from orjson import loads  # pylint: disable-msg=E0611
+from truth.truth import AssertThat  # type: ignore
+
+from app.models.api.challenge import ChallengeOut
+from app.models.db import Challenge
+from app.utils.responses import LocalCache
+from app.utils.responses import ORJSONResponse
+from app.utils.responses import ResponseCache
+from app.utils.responses import encode_json
+from tests.conftest import populate_challenge
+
+
+def test_orjson_response_pre_encoded() -> None:
+    """Check pre-encoded content is sent as is."""
+    content: bytes = b'{"count":1}'
+
+    response = ORJSONResponse(content=content)
+
+    AssertThat(response.body).IsEqualTo(content)
+
+
+def test_orjson_response_encode() -> None:
+    """Check content types are encoded like default JSON response."""
+    item_id = uuid4()
+    created_at: datetime = datetime(2020, 1, 1, 12, 30)
+
+    response = ORJSONResponse(content={"id": item_id, "created_at": created_at})
+
+    AssertThat(loads(response.body)).IsEqualTo(
+        {"id": str(item_id), "created_at": "2020-01-01T12:30:00"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_encode_pydantic_model() -> None:
+    """Check pydantic models are encoded the same as by pydantic."""
+    challenge: Challenge = await populate_challenge()
+    challenge_out = await ChallengeOut.from_tortoise_orm(challenge)
+
+    AssertThat(loads(encode_json({"item": challenge_out}))).IsEqualTo(
+        {"item": loads(challenge_out.json())}
+    )
+
+
+@pytest.mark.asyncio
+async def test_response_cache() -> None:
+    """Check cache stores response bytes and returns them on hit."""
+    cache = ResponseCache(prefix="test")
+
+    missed: Optional[ORJSONResponse] = await cache.get("item")
+    stored: ORJSONResponse = await cache.set("item", {"count": 1})
+    cached: Optional[ORJSONResponse] = await cache.get("item")
+    await cache.invalidate("item")
+
+    AssertThat(missed).IsNone()
+    AssertThat(cached.body).IsEqualTo(stored.body)  # type: ignore
+    AssertThat(await cache.get("item")).IsNone()
+
+
+def test_local_cache() -> None:
+    """Check local cache expires entries and drops the oldest ones over size."""
+    cache = LocalCache(ttl=60, size=2)
+    expired_cache = LocalCache(ttl=-1)
+
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.set("third", 3)
+    cache.invalidate("third")
+    expired_cache.set("first", 1)
+
+    AssertThat(cache.get("first")).IsNone()
+    AssertThat(cache.get("second")).IsEqualTo(2)
+    AssertThat(cache.get("third")).IsNone()
+    AssertThat(expired_cache.get("first")).IsNone()
+
+
+@pytest.mark.asyncio
+async def test_response_cache_local() -> None:
+    """Check local cache is filled on redis hit and dropped on invalidate."""
+    cache = ResponseCache(prefix="test", local=LocalCache(ttl=60))
+
+    stored: ORJSONResponse = await cache.set("item", {"count": 1})
+    cache.local.invalidate("item")  # type: ignore
+    cached: Optional[ORJSONResponse] = await cache.get("item")
+    local_content: Optional[bytes] = cache.local.get("item")  # type: ignore
+    await cache.invalidate("item")
+
+    AssertThat(cached.body).IsEqualTo(stored.body)  # type: ignore
+    AssertThat(local_content).IsEqualTo(stored.body)
+    AssertThat(await cache.get("item")).IsNone()
+
+
+@pytest.mark.asyncio
+async def test_response_cache_fill_invalidated() -> None:
+    """Check content fetched before invalidation is returned but not stored."""
+    cache = ResponseCache(prefix="test", local=LocalCache(ttl=60), lease=False)
+
+    async def fetch_invalidated() -> Dict[str, int]:
+        await cache.invalidate("item")
+
+        return {"count": 1}
+
+    async def fetch() -> Dict[str, int]:
+        return {"count": 2}
+
+    response: Optional[ORJSONResponse] = await cache.fill("item", fetch_invalidated)
+    local_content: Optional[bytes] = cache.local.get("item")  # type: ignore
+    missed: Optional[ORJSONResponse] = await cache.get("item")
+    stored: Optional[ORJSONResponse] = await cache.fill("item", fetch)
+    cached: Optional[ORJSONResponse] = await cache.get("item")
+
+    AssertThat(loads(response.body)).IsEqualTo({"count": 1})  # type: ignore
+    AssertThat(local_content).IsNone()
+    AssertThat(missed).IsNone()
+    AssertThat(cached.body).IsEqualTo(stored.body)  # type: ignore
@@ -0,0 +1,139 @@
+"""Single-flight utils tests."""
+import asyncio
+import inspect
+
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pytest
+
+from truth.truth import AssertThat  # type: ignore
+
+from app.utils.responses import ORJSONResponse
+from app.utils.responses import ResponseCache
+from app.utils.single_flight import Lease
+from app.utils.single_flight import SingleFlight
+from app.utils.single_flight import single_flight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_call() -> None:
+    """Check concurrent calls with the same key run function once."""
+    flights = SingleFlight()
+    calls: List[str] = []
+
+    async def fetch() -> int:
+        calls.append("fetch")
+        number: int = len(calls)
+        await asyncio.sleep(0.01)
+
+        return number
+
+    results: List[int] = await asyncio.gather(
+        *[flights.run("item", fetch) for _ in range(5)],
+        flights.run("other", fetch),
+    )
+
+    AssertThat(calls).HasSize(2)
+    AssertThat(results).IsEqualTo([1, 1, 1, 1, 1, 2])
+    AssertThat(flights.flights).IsEmpty()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_error() -> None:
+    """Check error of shared call is raised to every caller."""
+    flights = SingleFlight()
+
+    async def fail() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("fetch error")
+
+    results: Tuple[Optional[BaseException], ...] = await asyncio.gather(
+        flights.run("item", fail), flights.run("item", fail), return_exceptions=True,
+    )
+
+    AssertThat(results).HasSize(2)
+    AssertThat(all(isinstance(result, ValueError) for result in results)).IsTrue()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_decorator() -> None:
+    """Check decorated function keeps signature and shares calls by arguments."""
+    calls: Dict[str, int] = {}
+
+    @single_flight()
+    async def fetch(item_id: str, limit: int = 10) -> str:
+        calls[item_id] = calls.get(item_id, 0) + 1
+        await asyncio.sleep(0.01)
+
+        return f"{item_id}:{limit}"
+
+    results: Tuple[str, str, str] = await asyncio.gather(
+        fetch("first"), fetch("first"), fetch("second", limit=1),
+    )
+
+    AssertThat(list(inspect.signature(fetch).parameters)).IsEqualTo(["item_id", "limit"])
+    AssertThat(list(results)).IsEqualTo(["first:10", "first:10", "second:1"])
+    AssertThat(calls).IsEqualTo({"first": 1, "second": 1})
+
+
+@pytest.mark.asyncio
+async def test_lease() -> None:
+    """Check lease is owned by one holder until release."""
+    lease = Lease(key="test:lease")
+    other_lease = Lease(key="test:lease")
+
+    acquired: bool = await lease.acquire()
+    other_acquired: bool = await other_lease.acquire()
+    await other_lease.release()
+    await lease.release()
+
+    AssertThat(acquired).IsTrue()
+    AssertThat(other_acquired).IsFalse()
+    AssertThat(await other_lease.acquire()).IsTrue()
+
+
+@pytest.mark.asyncio
+async def test_lease_expired_release() -> None:
+    """Check expired lease owner does not release lease of the next owner."""
+    lease = Lease(key="test:lease", ttl=10)
+    next_lease = Lease(key="test:lease")
+
+    await lease.acquire()
+    await asyncio.sleep(0.05)
+    next_acquired: bool = await next_lease.acquire()
+    await lease.release()
+
+    AssertThat(next_acquired).IsTrue()
+    AssertThat(await Lease(key="test:lease").acquire()).IsFalse()
+
+
+@pytest.mark.asyncio
+async def test_response_cache_lease_wait() -> None:
+    """Check cache miss waits for fill of lease owner instead of fetching."""
+    cache = ResponseCache(prefix="test", lease=True)
+    owner_lease = Lease(key=f"{cache.key('item')}:lease")
+    await owner_lease.acquire()
+    calls: List[str] = []
+
+    async def fetch() -> Dict[str, int]:
+        calls.append("fetch")
+
+        return {"count": 0}
+
+    async def owner_fill() -> None:
+        await asyncio.sleep(0.1)
+        await cache.set("item", {"count": 1})
+        await owner_lease.release()
+
+    response, _ = await asyncio.gather(cache.get_or_set("item", fetch), owner_fill())
+    missed: Optional[ORJSONResponse] = await cache.get_or_set(
+        "missed", lambda: asyncio.sleep(0),
+    )
+
+    assert response is not None
+    AssertThat(calls).IsEmpty()
+    AssertThat(response.body).IsEqualTo(b'{"count":1}')
+    AssertThat(missed).IsNone()